@@ -1,46 +1,105 @@
+import importlib
+import json
+import os
+from datetime import datetime
+from bson import ObjectId
 from flask import Flask
 from flask_cors import CORS
 from flask_login import LoginManager
-from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
 
-# Load environment variables
+# Load environment variables before Config reads them at import time
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__,
-           template_folder='templates',
-           static_folder='static')
-app.secret_key = os.getenv('SECRET_KEY')
-CORS(app)
+from app.config import Config
+from app.database import Database
+from app.services.export import ExportService
+from app.services.journal_index import JournalIndex
+from app.services.llm_usage import LLMUsage
+from app.services.metrics import metrics, MongoCommandTimer, MongoPoolMonitor
+from app.services.mood_series import MoodSeries
+from app.services.profiling import RequestProfiler
+from app.services.stats import UserStats
+from app.services.wellness_scores import WellnessScores
+from app.services.writebehind import WriteBehindQueue
 
-# MongoDB setup
-client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
-db = client.emotio_db
-
-# Flask-Login setup
+# Shared, lazily connected per-process handles; nothing touches Mongo at import time
+db = Database()
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'auth.login'
+journal_index = JournalIndex(db)
+mood_series = MoodSeries(db)
+export_service = ExportService(db)
+profiler = RequestProfiler(db)
+user_stats = UserStats(db)
+wellness_scores = WellnessScores(db)
+persistence = WriteBehindQueue(db, user_stats)
+llm_usage = LLMUsage(db)
+
+# Core blueprints are always registered; feature blueprints only when enabled
+CORE_BLUEPRINTS = ('main', 'auth', 'profile', 'journal', 'insights')
+FEATURE_BLUEPRINTS = {
+    'chat': 'chat',
+    'counseling': 'counseling',
+    'bmi': 'bmi',
+    'professionals': 'professionals',
+}
+
+
+class JSONEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def create_app(config_object=Config):
+    """Build the Flask app; the Mongo client is created per worker, after fork"""
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+
+    app = Flask(__name__,
+                template_folder='templates',
+                static_folder='static')
+    app.config.from_object(config_object)
+
+    # Environment safety checks
+    if not all(app.config.get(key) for key in config_object.REQUIRED):
+        raise EnvironmentError(f"Missing one of: {', '.join(config_object.REQUIRED)}")
+
+    app.secret_key = app.config['SECRET_KEY']
+    app.json_encoder = JSONEncoder
+    CORS(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+
+    # MongoDB setup; indexes are applied by `python -m app.indexes`, not at boot
+    db.init_app(app)
+    db.client_options['event_listeners'] = [MongoCommandTimer(metrics), MongoPoolMonitor(metrics)]
+    persistence.init_app(app)
+
+    # Flask-Login setup
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+
+    from app.services import emotion, llm
+    emotion.init_app(app)
+    llm_usage.init_app(app)
+    llm.init_app(app, llm_usage)
 
-# Import routes
-from app.routes import auth, chat, counseling, journal, insights, professionals, main
+    enabled = [name for name in app.config['FEATURES'] if name in FEATURE_BLUEPRINTS]
+    for name in CORE_BLUEPRINTS + tuple(FEATURE_BLUEPRINTS[name] for name in enabled):
+        module = importlib.import_module(f'app.routes.{name}')
+        app.register_blueprint(module.bp)
 
-# Register blueprints
-app.register_blueprint(main.bp)
-app.register_blueprint(auth.bp)
-app.register_blueprint(chat.bp)
-app.register_blueprint(counseling.bp)
-app.register_blueprint(journal.bp)
-app.register_blueprint(insights.bp)
-app.register_blueprint(professionals.bp)
+    return app
 
-# Import and register models
-from app.models.user import User
-from app.models.session import CounselingSession
 
 @login_manager.user_loader
 def load_user(user_id):
-    user_data = db.users.find_one({'_id': user_id})
-    return User(user_data) if user_data else None 
\ No newline at end of file
+    from app.models.user import User
+    user_data = db.users.find_one(
+        {'_id': ObjectId(user_id)},
+        {'username': 1, 'email': 1, 'created_at': 1}
+    )
+    return User(user_data) if user_data else None
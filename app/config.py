@@ -0,0 +1,73 @@
+import json
+import os
+
+
+class Config:
+    SECRET_KEY = os.getenv('SECRET_KEY')
+    MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+    MONGODB_DB = os.getenv('MONGODB_DB', 'emotio_db')
+
+    # Connection pool, per gunicorn worker process
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '10'))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '60000'))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '2000'))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '5000'))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '30000'))
+    MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS', 'zlib')
+    MONGODB_READ_PREFERENCE = os.getenv('MONGODB_READ_PREFERENCE', 'primary')
+
+    # Write-behind buffer for chat persistence, per worker
+    WRITE_BEHIND = os.getenv('WRITE_BEHIND', '1') == '1'
+    WRITE_BEHIND_INTERVAL_MS = int(os.getenv('WRITE_BEHIND_INTERVAL_MS', '200'))
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '100'))
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '10000'))
+    WRITE_BEHIND_SPILL_DIR = os.getenv('WRITE_BEHIND_SPILL_DIR')
+
+    GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+    GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
+    GITHUB_CLIENT_ID = os.getenv('GITHUB_CLIENT_ID')
+    GITHUB_CLIENT_SECRET = os.getenv('GITHUB_CLIENT_SECRET')
+    GITHUB_REDIRECT_URI = os.getenv('GITHUB_REDIRECT_URI', 'http://localhost:5000/github-callback')
+
+    OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
+    OPENROUTER_API_BASE = os.getenv('OPENROUTER_API_BASE', 'https://openrouter.ai/api/v1')
+
+    # LLM backends, tried in order: JSON list of {"name", "base_url", "api_key" or "api_key_env",
+    # "headers", "models": {requested: backend model}, "timeout"}; defaults to OpenRouter alone
+    LLM_BACKENDS = json.loads(os.getenv('LLM_BACKENDS', '[]'))
+    LLM_HEDGE_DELAY_MS = int(os.getenv('LLM_HEDGE_DELAY_MS', '2000'))
+    LLM_HEDGE_MIN_DELAY_MS = int(os.getenv('LLM_HEDGE_MIN_DELAY_MS', '300'))
+    LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+    # Concurrent LLM attempts per worker; calls beyond it fail fast into the local fallback
+    LLM_MAX_INFLIGHT = int(os.getenv('LLM_MAX_INFLIGHT', '32'))
+    # Chat replies that miss this budget, or fail on every backend, come from the local reply engine
+    LLM_LOCAL_FALLBACK = os.getenv('LLM_LOCAL_FALLBACK', '1') == '1'
+    LLM_REPLY_BUDGET_MS = int(os.getenv('LLM_REPLY_BUDGET_MS', '8000'))
+
+    # LLM budgets; token buckets are per worker, so global limits scale with worker count
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '30'))
+    LLM_DEFAULT_MAX_TOKENS = int(os.getenv('LLM_DEFAULT_MAX_TOKENS', '400'))
+    LLM_MAX_TOKENS_CAP = int(os.getenv('LLM_MAX_TOKENS_CAP', '1000'))
+    LLM_USER_TOKENS_PER_MINUTE = int(os.getenv('LLM_USER_TOKENS_PER_MINUTE', '4000'))
+    LLM_GLOBAL_TOKENS_PER_MINUTE = int(os.getenv('LLM_GLOBAL_TOKENS_PER_MINUTE', '60000'))
+    # Send cache_control hints on static system prompts (OpenRouter passes them to providers that use them)
+    LLM_PROMPT_CACHE_HINTS = os.getenv('LLM_PROMPT_CACHE_HINTS', '0') == '1'
+    LLM_USAGE_FLUSH_SECONDS = float(os.getenv('LLM_USAGE_FLUSH_SECONDS', '10'))
+    # model -> [USD per 1K prompt tokens, USD per 1K completion tokens]
+    LLM_PRICES = json.loads(os.getenv('LLM_PRICES', '{"gpt-3.5-turbo": [0.0005, 0.0015]}'))
+
+    # Sentiment engine for mood detection: 'textblob', or 'lexicon' for the compiled
+    # reimplementation in app/services/sentiment.py (same scores, several times faster)
+    SENTIMENT_ENGINE = os.getenv('SENTIMENT_ENGINE', 'textblob')
+
+    # /insights-data streams users with more moods and journal entries than this
+    # from cursors in fixed-size chunks instead of loading them in one piece
+    INSIGHTS_STREAMING_THRESHOLD = int(os.getenv('INSIGHTS_STREAMING_THRESHOLD', '20000'))
+
+    # Optional feature blueprints; only the listed ones are imported and registered
+    FEATURES = [f.strip() for f in os.getenv('EMOTIO_FEATURES', 'chat,counseling,bmi,professionals').split(',') if f.strip()]
+
+    REQUIRED = ('GOOGLE_CLIENT_ID', 'GOOGLE_CLIENT_SECRET', 'OPENROUTER_API_KEY')
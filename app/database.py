@@ -0,0 +1,108 @@
+import os
+import threading
+from pymongo import MongoClient
+
+# Config key -> MongoClient keyword argument
+CLIENT_OPTIONS = {
+    'MONGODB_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGODB_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGODB_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGODB_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGODB_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGODB_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGODB_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+    'MONGODB_COMPRESSORS': 'compressors',
+    'MONGODB_READ_PREFERENCE': 'readPreference',
+}
+
+
+class Database:
+    """Lazily connected, per-process MongoDB handle.
+
+    Nothing connects at import time. The client is created on first use in
+    each process and recreated if the process has forked since, so gunicorn
+    workers never share a client inherited from the master. Callers use it
+    exactly like a pymongo Database: `db.users.find_one(...)`.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._database = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.uri = 'mongodb://localhost:27017/'
+        self.name = 'emotio_db'
+        self.client_options = {}
+        self.connect_hooks = []
+
+    def init_app(self, app):
+        self.configure(app.config)
+
+    def configure(self, config):
+        """Read the URI, database name and pool settings from a config mapping"""
+        self.uri = config['MONGODB_URI']
+        self.name = config['MONGODB_DB']
+        for key, option in CLIENT_OPTIONS.items():
+            if config.get(key) not in (None, ''):
+                self.client_options[option] = config[key]
+
+    def on_connect(self, hook):
+        """Register a callable run with the database once per process after connecting"""
+        self.connect_hooks.append(hook)
+        return hook
+
+    def get(self):
+        if self._database is None or self._pid != os.getpid():
+            with self._lock:
+                if self._database is None or self._pid != os.getpid():
+                    self._client = MongoClient(self.uri, **self.client_options)
+                    self._database = self._client[self.name]
+                    self._pid = os.getpid()
+                    for hook in self.connect_hooks:
+                        try:
+                            hook(self._database)
+                        except Exception as e:
+                            print(f"Error in database connect hook {hook.__name__}: {str(e)}")
+        return self._database
+
+    def connect(self):
+        """Open the pool eagerly; gunicorn calls this once each worker has loaded the app"""
+        try:
+            self.client.admin.command('ping')
+        except Exception as e:
+            print(f"Error connecting to MongoDB: {str(e)}")
+
+    def reset(self):
+        """Forget a client inherited across fork without touching its sockets"""
+        with self._lock:
+            self._client = None
+            self._database = None
+            self._pid = None
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._database = None
+            self._pid = None
+
+    @property
+    def client(self):
+        self.get()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __getitem__(self, name):
+        return self.get()[name]
+
+
+def connect_from_config(config=None):
+    """Standalone handle for command-line jobs that run outside the Flask app"""
+    from app.config import Config
+    config = config or {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    database = Database()
+    database.configure(config)
+    return database
@@ -0,0 +1,243 @@
+"""Index manifest and migration tool.
+
+INDEXES declares every index the app's queries need, QUERY_SHAPES lists
+those queries, and `python -m app.indexes` makes a database match the
+manifest. It is idempotent and safe to run on every deploy.
+
+    python -m app.indexes              # create missing or changed indexes
+    python -m app.indexes --dry-run    # print the plan only
+    python -m app.indexes --prune      # also drop indexes not in the manifest
+    python -m app.indexes --check      # explain() every query shape, fail on COLLSCAN
+"""
+import argparse
+import sys
+from datetime import datetime
+from bson import ObjectId
+from pymongo import IndexModel
+from pymongo.errors import CollectionInvalid
+from app.services.profiling import PROFILE_STORE_BYTES
+
+# collection -> [(keys, options)]; index names are pymongo's defaults, e.g. `user_id_1_timestamp_-1`
+INDEXES = {
+    'users': [
+        ([('email', 1)], {'unique': True}),
+        ([('username', 1)], {}),
+        ([('journal_entries.timestamp', -1)], {}),
+    ],
+    'conversations': [
+        ([('user_id', 1), ('timestamp', 1)], {}),
+    ],
+    'chat_messages': [
+        ([('user_id', 1), ('timestamp', -1)], {}),
+    ],
+    'journal_entries': [
+        ([('user_id', 1), ('timestamp', -1)], {}),
+    ],
+    'counseling_sessions': [
+        ([('user_id', 1), ('created_at', -1)], {}),
+    ],
+    'counseling_message_buckets': [
+        ([('session_id', 1), ('bucket', 1)], {'unique': True}),
+    ],
+    'journal_entry_terms': [
+        ([('user_id', 1), ('tokens', 1)], {}),
+    ],
+    'mood_series': [
+        ([('user_id', 1), ('gen', 1), ('sealed', 1)], {}),
+        ([('user_id', 1), ('gen', 1), ('end', 1)], {}),
+    ],
+    'cohort_checkpoints': [
+        ([('run_id', 1)], {}),
+    ],
+    'llm_usage': [
+        ([('hour', 1), ('route', 1), ('backend', 1), ('model', 1), ('template', 1)], {'unique': True}),
+    ],
+    'llm_user_usage': [
+        ([('day', 1), ('user_id', 1)], {'unique': True}),
+    ],
+}
+
+# Indexes replaced by a manifest entry: collection -> [name]. Dropped wherever they exist,
+# once their replacements are built, since an old unique key can reject writes the new one
+# allows and an old non-unique one only costs writes.
+RETIRED = {
+    'llm_usage': ['hour_1_route_1_model_1_template_1'],
+    'mood_series': ['user_id_1_end_1'],
+}
+
+# Capped collections: name -> size in bytes
+CAPPED = {
+    'request_profiles': PROFILE_STORE_BYTES,
+}
+
+# Options compared against index_information() when deciding whether an index changed
+COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds')
+
+_USER = ObjectId('000000000000000000000001')
+_GEN = ObjectId('000000000000000000000003')
+_DOC = ObjectId('000000000000000000000002')
+
+# Every query the routes issue, as (route, collection, kind, spec). `kind` is
+# 'find' (spec: filter, sort) or 'aggregate' (spec: pipeline). Collection
+# scans that are intended, like listing all professionals or reading the
+# capped profile store in natural order, are left out.
+QUERY_SHAPES = [
+    ('/login', 'users', 'find', ({'username': 'someone'}, None)),
+    ('/signup', 'users', 'find', ({'$or': [{'username': 'someone'}, {'email': 'a@b.c'}]}, None)),
+    ('/google-callback', 'users', 'find', ({'email': 'a@b.c'}, None)),
+    ('load_user', 'users', 'find', ({'_id': _USER}, None)),
+    ('/journal-entries', 'users', 'aggregate', [
+        {'$match': {'_id': _USER}},
+        {'$project': {'journal_entries': 1}}
+    ]),
+    ('/user-data', 'user_stats', 'find', ({'_id': _USER}, None)),
+    ('UserStats.reconcile', 'conversations', 'find', ({'user_id': _USER}, None)),
+    ('UserStats.reconcile', 'chat_messages', 'find', ({'user_id': _USER}, None)),
+    ('UserStats.reconcile', 'counseling_sessions', 'find', ({'user_id': _USER}, None)),
+    ('/export', 'conversations', 'find', ({'user_id': _USER}, [('timestamp', 1)])),
+    ('/chat/history', 'chat_messages', 'find', ({'user_id': _USER}, [('timestamp', -1)])),
+    ('JournalEntry.get_user_entries', 'journal_entries', 'find', ({'user_id': _USER}, [('timestamp', -1)])),
+    ('/counseling-sessions', 'counseling_sessions', 'find', ({'user_id': _USER}, [('created_at', -1)])),
+    ('/counseling-summary/<id>', 'counseling_sessions', 'find', ({'_id': _DOC, 'user_id': _USER}, None)),
+    ('/counseling-messages/<id>', 'counseling_message_buckets', 'find', (
+        {'session_id': _DOC, 'bucket': {'$gte': 0, '$lte': 2}}, [('bucket', 1)]
+    )),
+    ('/v2/journal-entries?q=', 'journal_entry_terms', 'find', ({'user_id': _USER, 'tokens': {'$all': ['calm']}}, None)),
+    ('/generate-report', 'journal_entry_terms', 'find', ({'user_id': _USER, '_id': {'$in': [_DOC]}}, None)),
+    ('/journal/bulk/delete', 'journal_term_stats', 'find', ({'_id': _USER}, None)),
+    ('/insights-data', 'mood_series', 'find', ({'user_id': _USER, 'gen': _GEN, 'end': {'$gte': datetime(2024, 1, 1)}}, None)),
+    ('/insights-data', 'mood_series', 'find', ({'user_id': _USER, 'gen': _GEN, 'end': {'$gte': datetime(2024, 1, 1)}}, [('end', -1)])),
+    ('/profile', 'wellness_state', 'find', ({'_id': _USER, 'version': 1}, None)),
+    ('/track-mood', 'mood_series', 'find', ({'user_id': _USER, 'gen': _GEN, 'sealed': False, 'count': {'$lt': 1000}}, None)),
+    ('/track-mood', 'mood_series', 'find', ({'user_id': _USER, 'gen': _GEN}, [('end', -1)])),
+    ('/llm/usage', 'llm_usage', 'aggregate', [
+        {'$match': {'hour': {'$gte': datetime(2024, 1, 1)}}},
+        {'$group': {'_id': '$route', 'calls': {'$sum': '$calls'}}}
+    ]),
+    ('/llm/usage', 'llm_user_usage', 'aggregate', [
+        {'$match': {'day': {'$gte': datetime(2024, 1, 1)}}},
+        {'$group': {'_id': '$user_id', 'tokens': {'$sum': '$tokens'}}}
+    ]),
+]
+
+
+def _models(specs):
+    return [IndexModel(keys, **options) for keys, options in specs]
+
+
+def _matches(existing, model):
+    document = model.document
+    if list(existing['key']) != list(document['key'].items()):
+        return False
+    return all(existing.get(option) == document.get(option) for option in COMPARED_OPTIONS)
+
+
+def plan(database, prune=False):
+    """Compare the database with the manifest; returns [(action, collection, name, model)]"""
+    actions = []
+    existing_collections = set(database.list_collection_names())
+
+    for name in CAPPED:
+        if name not in existing_collections:
+            actions.append(('create_capped', name, name, None))
+
+    for collection, specs in INDEXES.items():
+        existing = database[collection].index_information() if collection in existing_collections else {}
+        wanted = {model.document['name']: model for model in _models(specs)}
+        for index_name, model in wanted.items():
+            if index_name not in existing:
+                actions.append(('create', collection, index_name, model))
+            elif not _matches(existing[index_name], model):
+                actions.append(('rebuild', collection, index_name, model))
+        for index_name in RETIRED.get(collection, []):
+            if index_name in existing:
+                actions.append(('drop', collection, index_name, None))
+        if prune:
+            for index_name in existing:
+                if index_name != '_id_' and index_name not in wanted and index_name not in RETIRED.get(collection, []):
+                    actions.append(('drop', collection, index_name, None))
+    return actions
+
+
+def apply(database, actions):
+    for action, collection, name, model in actions:
+        if action == 'create_capped':
+            try:
+                database.create_collection(name, capped=True, size=CAPPED[name])
+            except CollectionInvalid:
+                pass
+        elif action == 'create':
+            database[collection].create_indexes([model])
+        elif action == 'rebuild':
+            database[collection].drop_index(name)
+            database[collection].create_indexes([model])
+        elif action == 'drop':
+            database[collection].drop_index(name)
+
+
+def ensure_indexes(database, prune=False):
+    """Bring the database in line with the manifest and return what was done"""
+    actions = plan(database, prune)
+    apply(database, actions)
+    return actions
+
+
+def _collection_scans(node):
+    """Yield every COLLSCAN stage inside an explain() winning plan"""
+    if isinstance(node, dict):
+        if node.get('stage') == 'COLLSCAN':
+            yield node
+        for key, value in node.items():
+            if key not in ('rejectedPlans', 'allPlansExecution'):
+                yield from _collection_scans(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _collection_scans(item)
+
+
+def check_query_shapes(database):
+    """Explain every query shape; returns [(route, collection)] that scan the whole collection"""
+    failures = []
+    for route, collection, kind, spec in QUERY_SHAPES:
+        if kind == 'find':
+            query, sort = spec
+            cursor = database[collection].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            explained = cursor.explain()
+        else:
+            explained = database.command('aggregate', collection, pipeline=spec, explain=True)
+        if any(True for _ in _collection_scans(explained)):
+            failures.append((route, collection))
+    return failures
+
+
+def migrate(config=None, dry_run=False, prune=False, check=False):
+    """One-shot index migration; run on deploy rather than on every worker boot"""
+    from app.database import connect_from_config
+    database = connect_from_config(config)
+    try:
+        actions = plan(database, prune)
+        for action, collection, name, model in actions:
+            print(f"{'would ' if dry_run else ''}{action} {collection}.{name}")
+        if not dry_run:
+            apply(database, actions)
+        print(f"{len(actions)} index change(s) on {database.name}")
+
+        if check:
+            failures = check_query_shapes(database)
+            for route, collection in failures:
+                print(f"COLLSCAN: {route} on {collection}")
+            return 1 if failures else 0
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply the index manifest')
+    parser.add_argument('--dry-run', action='store_true', help='print the plan without changing anything')
+    parser.add_argument('--prune', action='store_true', help='drop indexes that are not in the manifest')
+    parser.add_argument('--check', action='store_true', help='fail if any query shape uses a collection scan')
+    args = parser.parse_args()
+    sys.exit(migrate(dry_run=args.dry_run, prune=args.prune, check=args.check))
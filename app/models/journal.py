@@ -1,6 +1,7 @@
 from datetime import datetime
 from app import db
 from bson import ObjectId
+from app.models.mood import encode_mood, decode_mood
 
 class JournalEntry:
     def __init__(self, user_id, content, emotion, timestamp=None):
@@ -13,7 +14,7 @@ class JournalEntry:
         entry_data = {
             'user_id': ObjectId(self.user_id),
             'content': self.content,
-            'emotion': self.emotion,
+            'emotion': encode_mood(self.emotion),
             'timestamp': self.timestamp
         }
         result = db.journal_entries.insert_one(entry_data)
@@ -27,7 +28,7 @@ class JournalEntry:
             entry = JournalEntry(
                 user_id=str(entry_data['user_id']),
                 content=entry_data['content'],
-                emotion=entry_data['emotion'],
+                emotion=decode_mood(entry_data['emotion']),
                 timestamp=entry_data['timestamp']
             )
             entry.id = str(entry_data['_id'])
@@ -45,7 +46,7 @@ class JournalEntry:
             entry = JournalEntry(
                 user_id=str(entry_data['user_id']),
                 content=entry_data['content'],
-                emotion=entry_data['emotion'],
+                emotion=decode_mood(entry_data['emotion']),
                 timestamp=entry_data['timestamp']
             )
             entry.id = str(entry_data['_id'])
@@ -0,0 +1,189 @@
+"""Mood taxonomy and its compact storage encoding.
+
+Every mood vocabulary in the app maps onto one `Mood`: the mood picker
+(happy/calm/neutral/anxious/sad), the emotion classifier
+(joy/anger/fear/surprise/disgust/sadness/neutral), the sentiment labels
+and older free-text values like 'excited'. Mood and journal records store
+the small integer code instead of the label, and aggregations look codes
+up in NumPy tables rather than dicts of strings. Labels that match no mood
+are stored as given, so nothing a client sends is lost.
+
+Codes are persisted: never renumber a member, only append new ones.
+
+    python -m app.models.mood --dry-run    # count the string moods to convert
+    python -m app.models.mood              # convert them to codes
+"""
+import argparse
+import sys
+from enum import IntEnum
+import numpy as np
+
+
+class Mood(IntEnum):
+    HAPPY = 1
+    EXCITED = 2
+    CALM = 3
+    NEUTRAL = 4
+    SURPRISED = 5
+    ANXIOUS = 6
+    ANGRY = 7
+    DISGUSTED = 8
+    SAD = 9
+
+
+# Mood -> (label, score 1-5, valence)
+MOODS = {
+    Mood.HAPPY: ('happy', 5, 1),
+    Mood.EXCITED: ('excited', 5, 1),
+    Mood.CALM: ('calm', 4, 0),
+    Mood.NEUTRAL: ('neutral', 3, 0),
+    Mood.SURPRISED: ('surprised', 3, 0),
+    Mood.ANXIOUS: ('anxious', 2, -1),
+    Mood.ANGRY: ('angry', 2, -1),
+    Mood.DISGUSTED: ('disgusted', 2, -1),
+    Mood.SAD: ('sad', 1, -1),
+}
+
+# Other vocabularies' labels for the same moods
+ALIASES = {
+    'joy': Mood.HAPPY,
+    'surprise': Mood.SURPRISED,
+    'fear': Mood.ANXIOUS,
+    'anger': Mood.ANGRY,
+    'disgust': Mood.DISGUSTED,
+    'sadness': Mood.SAD,
+}
+
+CODES = dict({label: mood for mood, (label, _, _) in MOODS.items()}, **ALIASES)
+LABELS = {mood: label for mood, (label, _, _) in MOODS.items()}
+
+# Lookup tables indexed by code; index 0 is any mood outside the taxonomy
+SCORES = np.array([3] + [MOODS[mood][1] for mood in Mood], dtype=np.float64)
+VALENCES = np.array([0] + [MOODS[mood][2] for mood in Mood], dtype=np.int8)
+CODE_LABELS = np.array(['other'] + [MOODS[mood][0] for mood in Mood])
+
+EMOJIS = {5: '😄', 4: '😊', 3: '😐', 2: '😰', 1: '😢'}
+
+# Stored values seen by the aggregations: codes, and labels not yet migrated
+_LOOKUP = dict({int(mood): int(mood) for mood in Mood}, **{label: int(mood) for label, mood in CODES.items()})
+
+
+def parse_mood(value):
+    """The Mood for a code or any known label, else None"""
+    if isinstance(value, str):
+        return CODES.get(value.strip().lower())
+    if isinstance(value, int) and not isinstance(value, bool) and value in LABELS:
+        return Mood(value)
+    return None
+
+
+def encode_mood(value):
+    """What to store for a client-supplied mood: its code, or the value itself when unknown"""
+    mood = parse_mood(value)
+    return int(mood) if mood is not None else value
+
+
+def decode_mood(value):
+    """The label for a stored mood, whether it is a code or a legacy string"""
+    mood = parse_mood(value)
+    return LABELS[mood] if mood is not None else value
+
+
+def mood_query_values(value):
+    """Every stored form of a mood, for filters that must also match unmigrated records"""
+    mood = parse_mood(value)
+    if mood is None:
+        return [value]
+    return [int(mood)] + [label for label, other in CODES.items() if other == mood]
+
+
+def _code(value):
+    code = _LOOKUP.get(value)
+    if code is None:
+        mood = parse_mood(value)
+        code = int(mood) if mood is not None else 0
+    return code
+
+
+def mood_codes(values):
+    """int8 array of mood codes for stored values; unknown moods are 0"""
+    values = list(values)
+    return np.fromiter((_code(value) for value in values), dtype=np.int8, count=len(values))
+
+
+def mood_scores(values):
+    """float array of 1-5 scores for stored values; unknown moods score 3"""
+    return SCORES[mood_codes(values)]
+
+
+def mood_valences(values):
+    """int8 array of +1/0/-1 valences for stored values"""
+    return VALENCES[mood_codes(values)]
+
+
+def mood_emoji(score):
+    return EMOJIS.get(round(score), '😐')
+
+
+# (collection, array field or None, mood field) for every stored mood
+MOOD_FIELDS = [
+    ('users', 'mood_history', 'mood'),
+    ('users', 'journal_entries', 'mood'),
+    ('chat_messages', None, 'mood'),
+    ('journal_entries', None, 'emotion'),
+]
+
+
+def plan(database):
+    """String moods still in the database; returns [(collection, path, value, code, documents)].
+    `code` is None for values outside the taxonomy, which are left as they are."""
+    actions = []
+    for collection, array, field in MOOD_FIELDS:
+        path = f'{array}.{field}' if array else field
+        for value in database[collection].distinct(path):
+            if isinstance(value, str):
+                code = encode_mood(value)
+                count = database[collection].count_documents({path: value})
+                actions.append((collection, path, value, code if code != value else None, count))
+    return actions
+
+
+def apply(database, actions):
+    for collection, path, value, code, _ in actions:
+        if code is None:
+            continue
+        if '.' in path:
+            array, field = path.split('.')
+            database[collection].update_many(
+                {path: value},
+                {'$set': {f'{array}.$[e].{field}': code}},
+                array_filters=[{f'e.{field}': value}]
+            )
+        else:
+            database[collection].update_many({path: value}, {'$set': {path: code}})
+
+
+def migrate(config=None, dry_run=False):
+    """Convert stored mood labels to codes; idempotent, and safe while the app is running"""
+    from app.database import connect_from_config
+    database = connect_from_config(config)
+    try:
+        actions = plan(database)
+        for collection, path, value, code, count in actions:
+            if code is None:
+                print(f"keep {collection}.{path} {value!r} in {count} document(s): not a known mood")
+            else:
+                print(f"{'would ' if dry_run else ''}convert {collection}.{path} {value!r} -> {code} in {count} document(s)")
+        if not dry_run:
+            apply(database, actions)
+        print(f"{sum(1 for action in actions if action[3] is not None)} mood label(s) to convert on {database.name}")
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert stored mood labels to compact codes')
+    parser.add_argument('--dry-run', action='store_true', help='print the plan without changing anything')
+    args = parser.parse_args()
+    sys.exit(migrate(dry_run=args.dry_run))
@@ -1,5 +1,11 @@
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
+
+# Turns kept inline on the session document; the full transcript lives in buckets
+RECENT_MESSAGES = 20
+MESSAGE_BUCKET_SIZE = 50
+MAX_PAGE_SIZE = 100
 
 class CounselingSession:
     def __init__(self, session_data):
@@ -18,6 +24,7 @@ class CounselingSession:
             '_id': ObjectId(),
             'user_id': ObjectId(user_id),
             'messages': [],
+            'message_count': 0,
             'session_type': session_type,
             'goals': [],
             'exercises': [],
@@ -48,4 +55,124 @@ class CounselingSession:
             'exercises': self.exercises,
             'created_at': self.created_at,
             'status': self.status
-        } 
\ No newline at end of file
+        }
+
+    @staticmethod
+    def append_message(db, session_id, user_message, ai_response):
+        """Store a counseling turn in the bucketed transcript and the capped recent window"""
+        message = {
+            'user_message': user_message,
+            'ai_response': ai_response,
+            'timestamp': datetime.utcnow()
+        }
+
+        # Reserve a sequence number and keep only the most recent turns inline
+        def reserve():
+            return db.counseling_sessions.find_one_and_update(
+                {'_id': ObjectId(session_id), 'message_count': {'$exists': True}},
+                {
+                    '$inc': {'message_count': 1},
+                    '$push': {'messages': {'$each': [message], '$slice': -RECENT_MESSAGES}}
+                },
+                projection={'message_count': 1, 'user_id': 1},
+                return_document=ReturnDocument.AFTER
+            )
+
+        session = reserve()
+        if not session:
+            # Legacy sessions have no message_count; bucket their transcript first
+            if not CounselingSession.bucket_legacy_messages(db, session_id):
+                return None
+            session = reserve()
+            if not session:
+                return None
+
+        seq = session['message_count'] - 1
+        message['seq'] = seq
+        db.counseling_message_buckets.update_one(
+            {'session_id': ObjectId(session_id), 'bucket': seq // MESSAGE_BUCKET_SIZE},
+            {
+                '$push': {'messages': message},
+                '$inc': {'count': 1},
+                '$setOnInsert': {'user_id': session['user_id']}
+            },
+            upsert=True
+        )
+        return message
+
+    @staticmethod
+    def bucket_legacy_messages(db, session_id):
+        """Move a legacy session's inline transcript into buckets and start its message_count.
+        Returns False if the session does not exist."""
+        session = db.counseling_sessions.find_one(
+            {'_id': ObjectId(session_id)},
+            {'messages': 1, 'message_count': 1, 'user_id': 1}
+        )
+        if not session:
+            return False
+        if 'message_count' in session:
+            return True
+
+        messages = session.get('messages', [])
+        for start in range(0, len(messages), MESSAGE_BUCKET_SIZE):
+            bucket = [dict(message, seq=start + offset) for offset, message in enumerate(messages[start:start + MESSAGE_BUCKET_SIZE])]
+            # $setOnInsert: a concurrent migration of the same session may have written it already
+            db.counseling_message_buckets.update_one(
+                {'session_id': session['_id'], 'bucket': start // MESSAGE_BUCKET_SIZE},
+                {'$setOnInsert': {'messages': bucket, 'count': len(bucket), 'user_id': session['user_id']}},
+                upsert=True
+            )
+        db.counseling_sessions.update_one(
+            {'_id': session['_id'], 'message_count': {'$exists': False}},
+            {'$set': {'message_count': len(messages), 'messages': messages[-RECENT_MESSAGES:]}}
+        )
+        return True
+
+    @staticmethod
+    def get_messages_page(db, session, before=None, limit=RECENT_MESSAGES):
+        """Return one page of a session transcript, oldest first, ending just before `before`"""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        if 'message_count' not in session:
+            # Legacy sessions keep their whole transcript inline
+            sized = list(db.counseling_sessions.aggregate([
+                {'$match': {'_id': session['_id']}},
+                {'$project': {'total': {'$size': {'$ifNull': ['$messages', []]}}}}
+            ]))
+            total = sized[0]['total'] if sized else 0
+            end = total if before is None else max(0, min(int(before), total))
+            start = max(0, end - limit)
+            doc = db.counseling_sessions.find_one(
+                {'_id': session['_id']},
+                {'messages': {'$slice': [start, max(end - start, 1)]}}
+            )
+            messages = (doc or {}).get('messages', [])[:end - start]
+            for offset, message in enumerate(messages):
+                message['seq'] = start + offset
+            return {'messages': messages, 'total': total, 'next_before': start if start > 0 else None}
+
+        total = session['message_count']
+        end = total if before is None else max(0, min(int(before), total))
+        start = max(0, end - limit)
+        if end <= start:
+            return {'messages': [], 'total': total, 'next_before': None}
+
+        buckets = db.counseling_message_buckets.find(
+            {
+                'session_id': session['_id'],
+                'bucket': {'$gte': start // MESSAGE_BUCKET_SIZE, '$lte': (end - 1) // MESSAGE_BUCKET_SIZE}
+            },
+            {'messages': 1}
+        ).sort('bucket', 1)
+
+        messages = [
+            message
+            for bucket in buckets
+            for message in bucket.get('messages', [])
+            if start <= message['seq'] < end
+        ]
+        return {'messages': messages, 'total': total, 'next_before': start if start > 0 else None}
+
+    @staticmethod
+    def delete_messages(db, session_id):
+        db.counseling_message_buckets.delete_many({'session_id': ObjectId(session_id)})
@@ -1,6 +1,7 @@
 from flask_login import UserMixin
 from bson import ObjectId
 from datetime import datetime
+from app.models.mood import encode_mood
 
 class User(UserMixin):
     def __init__(self, user_data):
@@ -42,14 +43,14 @@ class User(UserMixin):
 
     def add_mood_entry(self, mood):
         self.mood_history.append({
-            'mood': mood,
+            'mood': encode_mood(mood),
             'timestamp': datetime.utcnow()
         })
 
     def add_journal_entry(self, content, mood):
         self.journal_entries.append({
             'content': content,
-            'mood': mood,
+            'mood': encode_mood(mood),
             'timestamp': datetime.utcnow()
         })
 
@@ -1,41 +1,202 @@
-from flask import Blueprint, request, jsonify, session
+import json
+import secrets
+import requests
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import Blueprint, current_app, request, render_template, redirect, url_for, session
+from flask_login import login_user, logout_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
+from oauthlib.oauth2 import WebApplicationClient
 from app import db
 from app.models.user import User
-from flask_login import login_user, logout_user, login_required
 
 bp = Blueprint('auth', __name__)
 
-@bp.route('/login', methods=['POST'])
+# OAuth2 setup
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+
+def get_oauth_client():
+    return WebApplicationClient(current_app.config['GOOGLE_CLIENT_ID'])
+
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
-    data = request.get_json()
-    user = db.users.find_one({'email': data.get('email')})
-    
-    if user and check_password_hash(user['password'], data.get('password')):
-        user_obj = User(user)
-        login_user(user_obj)
-        return jsonify({'message': 'Login successful'})
-    
-    return jsonify({'error': 'Invalid credentials'}), 401
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        user_data = db.users.find_one({'username': username})
+        if user_data and check_password_hash(user_data['password'], password):
+            user = User(user_data)
+            login_user(user)
+            session['username'] = username
+            session['show_welcome'] = True  # Set flag to show welcome message
+            return redirect(url_for('main.index'))
+        return render_template('login.html', error="Invalid credentials")
+    return render_template('login.html')
 
-@bp.route('/signup', methods=['POST'])
+@bp.route('/signup', methods=['GET', 'POST'])
 def signup():
-    data = request.get_json()
-    
-    if db.users.find_one({'email': data.get('email')}):
-        return jsonify({'error': 'Email already exists'}), 400
-    
-    user_data = {
-        'email': data.get('email'),
-        'password': generate_password_hash(data.get('password')),
-        'username': data.get('username')
-    }
-    
-    db.users.insert_one(user_data)
-    return jsonify({'message': 'User created successfully'})
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+        if db.users.find_one({'$or': [{'username': username}, {'email': email}]}):
+            return render_template('signup.html', error="Username or email already exists")
+        hashed_password = generate_password_hash(password)
+        user_data = {
+            'username': username,
+            'email': email,
+            'password': hashed_password,
+            'created_at': datetime.utcnow()
+        }
+        db.users.insert_one(user_data)
+        user = User(user_data)
+        login_user(user)
+        return redirect(url_for('main.index'))
+    return render_template('signup.html')
+
+@bp.route('/login/google')
+def google_login():
+    google_cfg = requests.get(GOOGLE_DISCOVERY_URL).json()
+    auth_uri = get_oauth_client().prepare_request_uri(
+        google_cfg["authorization_endpoint"],
+        redirect_uri=url_for('auth.google_callback', _external=True),
+        scope=["openid", "email", "profile"]
+    )
+    return redirect(auth_uri)
+
+@bp.route('/login/google/callback')
+def google_callback():
+    code = request.args.get("code")
+    oauth_client = get_oauth_client()
+    google_cfg = requests.get(GOOGLE_DISCOVERY_URL).json()
+    token_endpoint = google_cfg["token_endpoint"]
+
+    token_url, headers, body = oauth_client.prepare_token_request(
+        token_endpoint,
+        authorization_response=request.url,
+        redirect_url=url_for('auth.google_callback', _external=True),
+        code=code
+    )
+    token_response = requests.post(
+        token_url,
+        headers=headers,
+        data=body,
+        auth=(current_app.config['GOOGLE_CLIENT_ID'], current_app.config['GOOGLE_CLIENT_SECRET']),
+    )
+    oauth_client.parse_request_body_response(json.dumps(token_response.json()))
+
+    userinfo_endpoint = google_cfg["userinfo_endpoint"]
+    uri, headers, body = oauth_client.add_token(userinfo_endpoint)
+    userinfo_response = requests.get(uri, headers=headers, data=body).json()
+
+    if userinfo_response.get("email_verified"):
+        email = userinfo_response["email"]
+        username = email.split('@')[0]
+        user_data = db.users.find_one({'email': email})
+        if not user_data:
+            user_data = {
+                'username': username,
+                'email': email,
+                'google_id': userinfo_response["sub"],
+                'created_at': datetime.utcnow()
+            }
+            db.users.insert_one(user_data)
+        user = User(user_data)
+        login_user(user)
+        session['username'] = username
+        session['show_welcome'] = True  # Set flag to show welcome message
+        return redirect(url_for('main.index'))
+    return "Email not verified", 400
 
 @bp.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return jsonify({'message': 'Logged out successfully'}) 
\ No newline at end of file
+    return redirect(url_for('auth.login'))
+
+@bp.route('/github-login')
+def github_login():
+    """Redirect to GitHub OAuth login page"""
+    params = {
+        'client_id': current_app.config['GITHUB_CLIENT_ID'],
+        'redirect_uri': current_app.config['GITHUB_REDIRECT_URI'],
+        'scope': 'user:email',
+        'state': secrets.token_urlsafe(16)
+    }
+    return redirect(f'https://github.com/login/oauth/authorize?{urlencode(params)}')
+
+@bp.route('/github-callback')
+def github_callback():
+    """Handle GitHub OAuth callback"""
+    code = request.args.get('code')
+    state = request.args.get('state')
+    
+    if not code:
+        return redirect(url_for('auth.login', error='GitHub login failed'))
+    
+    # Exchange code for access token
+    token_url = 'https://github.com/login/oauth/access_token'
+    token_data = {
+        'client_id': current_app.config['GITHUB_CLIENT_ID'],
+        'client_secret': current_app.config['GITHUB_CLIENT_SECRET'],
+        'code': code,
+        'redirect_uri': current_app.config['GITHUB_REDIRECT_URI']
+    }
+    headers = {'Accept': 'application/json'}
+    
+    try:
+        response = requests.post(token_url, data=token_data, headers=headers)
+        response.raise_for_status()
+        access_token = response.json().get('access_token')
+        
+        if not access_token:
+            return redirect(url_for('auth.login', error='Failed to get access token'))
+        
+        # Get user info from GitHub
+        user_url = 'https://api.github.com/user'
+        headers = {'Authorization': f'token {access_token}'}
+        response = requests.get(user_url, headers=headers)
+        response.raise_for_status()
+        user_data = response.json()
+        
+        # Get user email
+        email_url = 'https://api.github.com/user/emails'
+        response = requests.get(email_url, headers=headers)
+        response.raise_for_status()
+        emails = response.json()
+        primary_email = next((email['email'] for email in emails if email['primary']), None)
+        
+        if not primary_email:
+            return redirect(url_for('auth.login', error='No primary email found'))
+        
+        # Check if user exists
+        user = db.users.find_one({'email': primary_email})
+        
+        if not user:
+            # Create new user
+            username = user_data.get('login')
+            # Ensure username is unique
+            base_username = username
+            counter = 1
+            while db.users.find_one({'username': username}, {'_id': 1}):
+                username = f"{base_username}{counter}"
+                counter += 1
+            
+            user = {
+                'username': username,
+                'email': primary_email,
+                'password': generate_password_hash(secrets.token_urlsafe(16)),
+                'created_at': datetime.utcnow()
+            }
+            db.users.insert_one(user)
+        
+        # Log in user
+        login_user(User(user))
+        session['username'] = user['username']
+        session['last_activity'] = datetime.utcnow()
+        
+        return redirect(url_for('main.index'))
+        
+    except Exception as e:
+        print(f"GitHub login error: {str(e)}")
+        return redirect(url_for('auth.login', error='GitHub login failed'))
@@ -0,0 +1,52 @@
+from datetime import datetime
+from bson import ObjectId
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from app import db, wellness_scores
+from app.services.llm import chat_completion
+from app.services.prompts import get_prompt
+from app.services.wellness import get_bmi_category
+
+bp = Blueprint('bmi', __name__)
+
+@bp.route('/track-bmi', methods=['POST'])
+@login_required
+def track_bmi():
+    try:
+        data = request.get_json()
+        height = float(data.get('height'))
+        weight = float(data.get('weight'))
+        
+        bmi = weight / ((height / 100) ** 2)
+        category = get_bmi_category(bmi)
+        
+        # Generate AI analysis using OpenRouter
+        try:
+            response = chat_completion(**get_prompt('bmi_analysis').render(bmi=bmi, category=category))
+            analysis = response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"OpenRouter API error: {str(e)}")
+            analysis = f"Your BMI of {bmi:.1f} falls in the {category} category. Consider consulting a healthcare professional for personalized advice."
+        
+        # Store BMI in user's history
+        db.users.update_one(
+            {'_id': ObjectId(current_user.id)},
+            {
+                '$push': {
+                    'bmi_history': {
+                        'bmi': bmi,
+                        'timestamp': datetime.utcnow()
+                    }
+                }
+            }
+        )
+        wellness_scores.add_bmi(current_user.id, bmi)
+        
+        return jsonify({
+            'bmi': bmi,
+            'category': category,
+            'analysis': analysis
+        })
+    except Exception as e:
+        print(f"Error in track_bmi: {str(e)}")
+        return jsonify({'error': str(e)}), 500
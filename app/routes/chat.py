@@ -3,7 +3,10 @@ from flask_login import login_required, current_user
 from bson import ObjectId
 from datetime import datetime
 
+from app import db, persistence
+from app.models.mood import encode_mood, decode_mood
 from app.services.ai import AIService
+from app.services.llm import LLMRateLimited
 from app.services.emotion import EmotionService
 from app.services.chat import ChatService
 
@@ -32,13 +35,13 @@ def chat():
         ai_response = ai_service.get_chat_response(message, mood)
 
         # Save the conversation
-        db.chat_messages.insert_one({
+        persistence.put('chat_messages', {
             'user_id': ObjectId(current_user.id),
             'message': message,
             'response': ai_response,
-            'mood': mood,
+            'mood': encode_mood(mood),
             'timestamp': datetime.now()
-        })
+        }, counter='chat_messages')
 
         return jsonify({
             'status': 'success',
@@ -46,6 +49,9 @@ def chat():
             'mood': mood
         })
 
+    except LLMRateLimited as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 429, {'Retry-After': str(int(e.retry_after) + 1)}
+
     except Exception as e:
         print(f"Error in chat: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -57,6 +63,9 @@ def get_chat_history():
         messages = list(db.chat_messages.find(
             {'user_id': ObjectId(current_user.id)}
         ).sort('timestamp', -1).limit(50))
+        for message in messages:
+            if 'mood' in message:
+                message['mood'] = decode_mood(message['mood'])
         
         return jsonify({
             'status': 'success',
@@ -90,7 +99,7 @@ def get_current_mood():
         print(f"Error getting mood: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@bp.route('/chat/message', methods=['POST'])
+@bp.route('/message', methods=['POST'])
 @login_required
 def send_message():
     data = request.get_json()
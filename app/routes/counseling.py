@@ -1,15 +1,16 @@
+from datetime import datetime
+from bson import ObjectId
 from flask import Blueprint, request, jsonify, render_template
 from flask_login import login_required, current_user
-from bson import ObjectId
-from datetime import datetime
-
-from app.models.session import CounselingSession
-from app.services.ai import AIService
+from app import db, user_stats
+from app.models.session import CounselingSession, RECENT_MESSAGES
+from app.services.llm import chat_completion, llm_reply, LLMRateLimited
+from app.services.prompts import get_prompt, counseling_prompt
 
-bp = Blueprint('counseling', __name__, url_prefix='/counseling')
-ai_service = AIService()
+bp = Blueprint('counseling', __name__)
 
-@bp.route('/', methods=['GET', 'POST'])
+# AI Counseling Session Routes
+@bp.route('/counseling', methods=['GET', 'POST'])
 @login_required
 def counseling():
     if request.method == 'GET':
@@ -19,55 +20,61 @@ def counseling():
         data = request.get_json()
         message = data.get('message')
         session_id = data.get('session_id')
-        session_type = data.get('session_type', 'general')
+        session_type = data.get('session_type', 'general')  # New parameter for session type
         
         if not message:
             return jsonify({'status': 'error', 'message': 'Message is required'}), 400
 
         # Get or create counseling session
         if not session_id:
-            session_data = CounselingSession.create(current_user.id, session_type)
-            session_id = str(session_data['_id'])
-            db.counseling_sessions.insert_one(session_data)
+            session_id = str(ObjectId())
+            counseling_session = {
+                '_id': ObjectId(session_id),
+                'user_id': ObjectId(current_user.id),
+                'messages': [],
+                'message_count': 0,
+                'session_type': session_type,
+                'goals': [],
+                'exercises': [],
+                'created_at': datetime.now(),
+                'status': 'active'
+            }
+            db.counseling_sessions.insert_one(counseling_session)
         
-        # Get session data
-        session = db.counseling_sessions.find_one({'_id': ObjectId(session_id)})
+        # Get session data without pulling the inline transcript
+        session = db.counseling_sessions.find_one({'_id': ObjectId(session_id)}, {'messages': 0})
         
-        # Generate AI response
-        ai_response = ai_service.get_counseling_response(
-            message, 
-            session_type,
-            session.get('goals', [])
-        )
+        # Generate AI response with the session type's static prompt; goals vary per session
+        goals = f"Session Goals: {', '.join(session['goals'])}" if session and session.get('goals') else None
+        ai_response, source = llm_reply(message, session_type=session_type,
+                                        **counseling_prompt(session_type).render(context=goals, message=message))
 
         # Save the conversation
-        db.counseling_sessions.update_one(
-            {'_id': ObjectId(session_id)},
-            {'$push': {'messages': {
-                'user_message': message,
-                'ai_response': ai_response,
-                'timestamp': datetime.now()
-            }}}
-        )
+        CounselingSession.append_message(db, session_id, message, ai_response)
+        user_stats.increment(current_user.id, counseling_turns=1)
 
         return jsonify({
             'status': 'success',
             'session_id': session_id,
             'response': ai_response,
+            'source': source,
             'session_type': session_type
         })
 
+    except LLMRateLimited as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 429, {'Retry-After': str(int(e.retry_after) + 1)}
+
     except Exception as e:
         print(f"Error in counseling session: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@bp.route('/sessions')
+@bp.route('/counseling-sessions')
 @login_required
 def get_counseling_sessions():
     try:
         sessions = list(db.counseling_sessions.find(
             {'user_id': ObjectId(current_user.id)},
-            {'messages': {'$slice': -1}}
+            {'messages': {'$slice': -1}}  # Get only the last message
         ).sort('created_at', -1))
         
         return jsonify({
@@ -78,21 +85,26 @@ def get_counseling_sessions():
         print(f"Error getting counseling sessions: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@bp.route('/summary/<session_id>')
+@bp.route('/counseling-summary/<session_id>')
 @login_required
 def get_counseling_summary(session_id):
     try:
-        session = db.counseling_sessions.find_one({
-            '_id': ObjectId(session_id),
-            'user_id': ObjectId(current_user.id)
-        })
+        session = db.counseling_sessions.find_one(
+            {'_id': ObjectId(session_id), 'user_id': ObjectId(current_user.id)},
+            {'messages': 0}
+        )
         
         if not session:
             return jsonify({'status': 'error', 'message': 'Session not found'}), 404
         
-        # Generate summary
-        messages = [msg['user_message'] for msg in session.get('messages', [])]
-        summary = ai_service.generate_session_summary(messages)
+        # Only the most recent page of the transcript is sent to the browser
+        page = CounselingSession.get_messages_page(db, session)
+        
+        # Generate summary using OpenAI
+        messages = [msg['user_message'] for msg in page['messages']]
+        response = chat_completion(**get_prompt('counseling_summary').render(messages=messages))
+        
+        summary = response.choices[0].message.content
         
         return jsonify({
             'status': 'success',
@@ -100,8 +112,71 @@ def get_counseling_summary(session_id):
             'session_type': session.get('session_type', 'general'),
             'goals': session.get('goals', []),
             'exercises': session.get('exercises', []),
-            'messages': session.get('messages', [])
+            'messages': page['messages'],
+            'total_messages': page['total'],
+            'next_before': page['next_before']
         })
+    except LLMRateLimited as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 429, {'Retry-After': str(int(e.retry_after) + 1)}
     except Exception as e:
         print(f"Error generating summary: {str(e)}")
-        return jsonify({'status': 'error', 'message': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/counseling-messages/<session_id>')
+@login_required
+def get_counseling_messages(session_id):
+    try:
+        session = db.counseling_sessions.find_one(
+            {'_id': ObjectId(session_id), 'user_id': ObjectId(current_user.id)},
+            {'messages': 0}
+        )
+        
+        if not session:
+            return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+        
+        before = request.args.get('before', type=int)
+        limit = request.args.get('limit', RECENT_MESSAGES, type=int)
+        page = CounselingSession.get_messages_page(db, session, before=before, limit=limit)
+        
+        return jsonify({
+            'status': 'success',
+            'messages': page['messages'],
+            'total_messages': page['total'],
+            'next_before': page['next_before']
+        })
+    except Exception as e:
+        print(f"Error getting counseling messages: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/delete-session/<session_id>', methods=['DELETE'])
+@login_required
+def delete_counseling_session(session_id):
+    try:
+        # Delete the session from the database
+        deleted = db.counseling_sessions.find_one_and_delete(
+            {'_id': ObjectId(session_id), 'user_id': ObjectId(current_user.id)},
+            {'message_count': 1}
+        )
+        
+        if deleted:
+            CounselingSession.delete_messages(db, session_id)
+            if 'message_count' in deleted:
+                user_stats.increment(current_user.id, counseling_turns=-deleted['message_count'])
+            else:
+                user_stats.reconcile(current_user.id)
+            return jsonify({
+                'status': 'success',
+                'message': 'Session deleted successfully'
+            })
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'Session not found'
+            }), 404
+            
+    except Exception as e:
+        print(f"Error deleting counseling session: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
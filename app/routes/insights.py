@@ -1,20 +1,132 @@
-from flask import Blueprint, render_template
+from datetime import datetime, timedelta
+import numpy as np
+from bson import ObjectId
+from flask import Blueprint, request, jsonify, render_template, current_app
 from flask_login import login_required, current_user
-from app.models.journal import JournalEntry
-from app.services.insights import InsightsService
+from app import db, profiler, mood_series, wellness_scores
+from app.models.mood import Mood, mood_codes
+from app.services.mood_series import to_ms
+from app.services.mood_stats import MoodStats, STREAM_CHUNK_SIZE, chunked, merge_newest_first
 
 bp = Blueprint('insights', __name__)
-insights_service = InsightsService()
+
+def stream_journal_moods(user_id, start):
+    """The user's journal moods from `start` on, newest first, through a cursor"""
+    return db.users.aggregate([
+        {'$match': {'_id': ObjectId(user_id)}},
+        {'$project': {'_id': 0, 'entries': {'$map': {
+            'input': {'$ifNull': ['$journal_entries', []]},
+            'as': 'e',
+            'in': {'mood': {'$ifNull': ['$$e.mood', int(Mood.NEUTRAL)]}, 'timestamp': '$$e.timestamp'}
+        }}}},
+        {'$unwind': '$entries'},
+        {'$replaceRoot': {'newRoot': '$entries'}},
+        {'$match': {'timestamp': {'$gte': start}}},
+        {'$sort': {'timestamp': -1}}
+    ], allowDiskUse=True, batchSize=STREAM_CHUNK_SIZE)
 
 @bp.route('/insights')
 @login_required
 def insights():
-    entries = JournalEntry.get_user_entries(current_user.id)
-    mood_trends = insights_service.analyze_mood_trends(entries)
-    common_emotions = insights_service.get_common_emotions(entries)
-    recommendations = insights_service.get_recommendations(entries)
-    
-    return render_template('insights.html',
-                         mood_trends=mood_trends,
-                         common_emotions=common_emotions,
-                         recommendations=recommendations) 
\ No newline at end of file
+    return render_template('insights.html')
+
+@bp.route('/insights-data')
+@login_required
+def insights_data():
+    try:
+        period = request.args.get('period', 'week')
+        
+        # Calculate time range based on period
+        now = datetime.utcnow()
+        if period == 'week':
+            start_date = now - timedelta(days=7)
+        elif period == 'month':
+            start_date = now - timedelta(days=30)
+        else:  # year
+            start_date = now - timedelta(days=365)
+        
+        # Long histories are streamed; shorter ones load the journal moods with the user
+        history_size = {'$add': [
+            {'$size': {'$ifNull': ['$mood_history', []]}},
+            {'$size': {'$ifNull': ['$journal_entries', []]}}
+        ]}
+        user = next(db.users.aggregate([
+            {'$match': {'_id': ObjectId(current_user.id)}},
+            {'$project': {
+                'streak': 1,
+                'journal_moods': {'$cond': [
+                    {'$gt': [history_size, current_app.config['INSIGHTS_STREAMING_THRESHOLD']]},
+                    None,
+                    {'$filter': {
+                        'input': {'$map': {
+                            'input': {'$ifNull': ['$journal_entries', []]},
+                            'as': 'e',
+                            'in': {'mood': {'$ifNull': ['$$e.mood', int(Mood.NEUTRAL)]}, 'timestamp': '$$e.timestamp'}
+                        }},
+                        'as': 'e',
+                        'cond': {'$gte': ['$$e.timestamp', start_date]}
+                    }}
+                ]},
+                'history_size': history_size
+            }}
+        ]))
+        profiler.note_history_size(user['history_size'])
+        
+        # Mood check-ins and journal moods in range, folded in newest chunk first
+        stats = MoodStats(period, now)
+        if user['journal_moods'] is None:
+            for timestamps, codes in merge_newest_first(
+                mood_series.iter_chunks(current_user.id, start=start_date),
+                chunked(stream_journal_moods(current_user.id, start_date))
+            ):
+                stats.add(timestamps, codes)
+        else:
+            checkins = mood_series.read(current_user.id, start=start_date)
+            journal_moods = user['journal_moods']
+            timestamps = np.concatenate([
+                checkins.timestamps,
+                np.array([to_ms(entry['timestamp']) for entry in journal_moods], dtype=np.int64)
+            ])
+            codes = np.concatenate([checkins.moods, mood_codes([entry['mood'] for entry in journal_moods])])
+            order = np.argsort(timestamps, kind='stable')
+            stats.add(timestamps[order], codes[order])
+        
+        mood_data, mood_labels = stats.mood_series()
+        time_data, best_time = stats.time_of_day()
+        mood_triggers = stats.triggers()
+        weekly_pattern = stats.weekly_pattern()
+        mood_insights = stats.insights()
+        
+        # Wellness scores, and trends against the closing scores at the start of the period
+        wellness = wellness_scores.get(current_user.id, period)
+        scores, trends = wellness['scores'], wellness['trends']
+        
+        # Get stored streak from MongoDB
+        streak = user.get('streak', 0)
+        
+        # Calculate total entries and average mood
+        total_entries = stats.total
+        avg_mood = wellness['average_mood']
+        
+        return jsonify({
+            'moodData': mood_data,
+            'moodLabels': mood_labels,
+            'timeData': time_data,
+            'bestTime': best_time,
+            'moodTriggers': mood_triggers,
+            'weeklyPattern': weekly_pattern,
+            'moodInsights': mood_insights,
+            'physicalScore': scores['physical'],
+            'mentalScore': scores['mental'],
+            'emotionalScore': scores['emotional'],
+            'physicalTrend': trends['physical'],
+            'mentalTrend': trends['mental'],
+            'emotionalTrend': trends['emotional'],
+            'streak': streak,
+            'totalEntries': total_entries,
+            'averageMood': avg_mood
+        })
+        
+    except Exception as e:
+        print(f"Error in insights_data: {str(e)}")
+        return jsonify({'error': str(e)}), 500
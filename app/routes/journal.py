@@ -1,65 +1,588 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
-from flask_login import login_required, current_user
-from app import db
-from app.models.journal import JournalEntry
-from app.services.emotion import EmotionService
+import base64
+import json
 from datetime import datetime
+from collections import Counter
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, request, jsonify, render_template, Response, stream_with_context
+from flask_login import login_required, current_user
+from app import db, export_service, journal_index, wellness_scores
+from app.services.emotion import detect_mood, text_sentiment
+from app.models.mood import encode_mood, decode_mood, mood_query_values
+from app.services.llm import chat_completion, LLMRateLimited
+from app.services.prompts import get_prompt
 
 bp = Blueprint('journal', __name__)
-emotion_service = EmotionService()
 
-@bp.route('/journal')
+@bp.route('/journal', methods=['GET', 'POST'])
 @login_required
 def journal():
-    entries = JournalEntry.get_user_entries(current_user.id)
-    return render_template('journal.html', entries=entries)
+    if request.method == 'GET':
+        return render_template('journal.html')
+    
+    # POST method handling
+    try:
+        data = request.get_json()
+        content = data.get('content')
+        mood = data.get('mood')
+        
+        if not content or not mood:
+            return jsonify({'status': 'error', 'message': 'Content and mood are required'}), 400
+
+        # Create a new journal entry
+        new_entry = {
+            '_id': ObjectId(),
+            'content': content,
+            'mood': encode_mood(mood),
+            'timestamp': datetime.now()
+        }
+
+        # Update the user's document to add the new journal entry
+        result = db.users.update_one(
+            {'_id': ObjectId(current_user.id)},
+            {'$push': {'journal_entries': new_entry}}
+        )
+
+        if result.modified_count > 0:
+            journal_index.index_entry(current_user.id, new_entry)
+            wellness_scores.add_journal_entries(current_user.id, [new_entry])
+            return jsonify({
+                'status': 'success',
+                'message': 'Journal entry saved successfully',
+                'entry': {
+                    '_id': str(new_entry['_id']),
+                    'content': new_entry['content'],
+                    'mood': decode_mood(new_entry['mood']),
+                    'timestamp': new_entry['timestamp'].isoformat()
+                }
+            })
+        else:
+            return jsonify({'status': 'error', 'message': 'Failed to save journal entry'}), 500
+
+    except Exception as e:
+        print(f"Error saving journal entry: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+JOURNAL_PAGE_SIZE = 10
+
+MAX_JOURNAL_PAGE_SIZE = 50
+
+def encode_journal_cursor(entry):
+    raw = f"{entry['timestamp'].isoformat()}|{entry['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_journal_cursor(cursor):
+    timestamp, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(timestamp), ObjectId(entry_id)
 
-@bp.route('/journal/new', methods=['GET', 'POST'])
+def query_journal_page(user_id, limit, cursor=None, start=None, end=None, mood=None, entry_ids=None):
+    """Fetch one page of embedded journal entries, newest first, keyed on (timestamp, _id)"""
+    conditions = []
+    if cursor:
+        cursor_ts, cursor_id = decode_journal_cursor(cursor)
+        conditions.append({'$or': [
+            {'$lt': ['$$e.timestamp', cursor_ts]},
+            {'$and': [
+                {'$eq': ['$$e.timestamp', cursor_ts]},
+                {'$lt': ['$$e._id', cursor_id]}
+            ]}
+        ]})
+    if start:
+        conditions.append({'$gte': ['$$e.timestamp', start]})
+    if end:
+        conditions.append({'$lt': ['$$e.timestamp', end]})
+    if mood:
+        # Codes, and the labels of entries written before moods were encoded
+        conditions.append({'$in': ['$$e.mood', mood_query_values(mood)]})
+    if entry_ids is not None:
+        conditions.append({'$in': ['$$e._id', entry_ids]})
+
+    pipeline = [
+        {'$match': {'_id': ObjectId(user_id)}},
+        {'$project': {'entries': {'$filter': {
+            'input': {'$ifNull': ['$journal_entries', []]},
+            'as': 'e',
+            'cond': {'$and': conditions} if conditions else True
+        }}}},
+        {'$unwind': '$entries'},
+        {'$replaceRoot': {'newRoot': '$entries'}},
+        {'$sort': {'timestamp': -1, '_id': -1}},
+        {'$limit': limit + 1}
+    ]
+    entries = list(db.users.aggregate(pipeline))
+
+    next_cursor = encode_journal_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return entries[:limit], next_cursor
+
+@bp.route('/journal-entries')
 @login_required
-def new_entry():
-    if request.method == 'POST':
-        content = request.form.get('content')
-        if content:
-            # Analyze emotion
-            emotion = emotion_service.analyze_emotion(content)
-            
-            # Create entry
-            entry = JournalEntry(
-                user_id=current_user.id,
-                content=content,
-                emotion=emotion,
-                timestamp=datetime.utcnow()
-            )
-            entry.save()
-            
-            flash('Journal entry saved successfully!', 'success')
-            return redirect(url_for('journal.journal'))
+def get_journal_entries():
+    try:
+        # Newest 10 entries without loading the whole user document
+        entries, _ = query_journal_page(current_user.id, JOURNAL_PAGE_SIZE)
+        for entry in entries:
+            entry['_id'] = str(entry['_id'])
+            entry['mood'] = decode_mood(entry.get('mood'))
+            if isinstance(entry['timestamp'], datetime):
+                entry['timestamp'] = entry['timestamp'].isoformat()
+
+        return jsonify(entries)
+    except Exception as e:
+        print(f"Error retrieving journal entries: {str(e)}")
+        return jsonify([])
+
+@bp.route('/v2/journal-entries')
+@login_required
+def get_journal_entries_v2():
+    try:
+        limit = max(1, min(request.args.get('limit', JOURNAL_PAGE_SIZE, type=int), MAX_JOURNAL_PAGE_SIZE))
+        start = request.args.get('start')
+        end = request.args.get('end')
+        query = request.args.get('q', '').strip()
+
+        entry_ids = journal_index.search(current_user.id, query) if query else None
+        if entry_ids == []:
+            return jsonify({'status': 'success', 'entries': [], 'next_cursor': None})
+
+        entries, next_cursor = query_journal_page(
+            current_user.id,
+            limit,
+            cursor=request.args.get('cursor'),
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+            mood=request.args.get('mood'),
+            entry_ids=entry_ids
+        )
+        for entry in entries:
+            entry['_id'] = str(entry['_id'])
+            entry['mood'] = decode_mood(entry.get('mood'))
+            if isinstance(entry['timestamp'], datetime):
+                entry['timestamp'] = entry['timestamp'].isoformat()
+
+        return jsonify({'status': 'success', 'entries': entries, 'next_cursor': next_cursor})
+    except (ValueError, InvalidId) as e:
+        return jsonify({'status': 'error', 'message': f'Invalid parameter: {str(e)}'}), 400
+    except Exception as e:
+        print(f"Error retrieving journal entries: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/analyze-journal')
+@login_required
+def analyze_journal():
+    user_data = db.users.find_one({'_id': ObjectId(current_user.id)})
+    journal_entries = user_data.get('journal_entries', [])
+    
+    if len(journal_entries) < 3:
+        return jsonify({'error': 'Need at least 3 entries to analyze'}), 400
+    
+    # Get the last 5 entries for analysis
+    recent_entries = journal_entries[-5:]
+    entries_text = ' '.join([entry['content'] for entry in recent_entries])
+    key_themes = journal_index.key_themes(current_user.id, [entry['_id'] for entry in recent_entries])
+    common_words = [word for word, count in Counter(entries_text.split()).most_common(5) if len(word) > 3]
+    recommendations = [word for word in common_words if word.endswith('!') or word.endswith('?')]
+    
+    # Use OpenAI to analyze the entries
+    try:
+        response = chat_completion(**get_prompt('journal_analysis').render(entries=entries_text))
+        
+        # Get the AI analysis
+        ai_analysis = response.choices[0].message.content.strip()
+        
+        # Format the emotional analysis section
+        emotional_analysis = f"""
+1. Emotional Statistics
+   • Total Entries Analyzed: {len(recent_entries)}
+   • Dominant Mood: {detect_mood(entries_text)}
+   • Mood Distribution:
+     {chr(10).join(f"  - {mood}: {count} entries" for mood, count in Counter(decode_mood(entry['mood']) for entry in recent_entries).items())}
+
+2. Emotional Overview
+   {ai_analysis}
+
+3. Key Themes
+   {', '.join(key_themes)}
+
+4. Insights & Patterns
+   {', '.join(word for word in common_words if word.isupper())}
+
+5. Recommendations
+   {', '.join(recommendations)}
+"""
+
+        return jsonify({
+            'status': 'success',
+            'emotional_analysis': emotional_analysis,
+            'key_themes': key_themes,
+            'recommendations': recommendations
+        })
+        
+    except LLMRateLimited as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(int(e.retry_after) + 1)}
+        
+    except Exception as e:
+        print(f"Error analyzing journal: {str(e)}")
+        return jsonify({'error': 'Error analyzing journal entries'}), 500
+
+@bp.route('/analyze-journal/<entry_id>')
+@login_required
+def analyze_journal_entry(entry_id):
+    user_data = db.users.find_one({'_id': ObjectId(current_user.id)})
+    entries = user_data.get('journal_entries', [])
+    
+    # Find the specific entry
+    entry = next((e for e in entries if str(e['_id']) == entry_id), None)
+    if not entry:
+        return jsonify({'error': 'Entry not found'}), 404
+    
+    # Analyze the entry using TextBlob
+    sentiment = text_sentiment(entry['content'])
+    
+    # Determine emotional tone
+    polarity = sentiment.polarity
+    if polarity > 0.5:
+        emotional_tone = "Very Positive"
+    elif polarity > 0:
+        emotional_tone = "Positive"
+    elif polarity < -0.5:
+        emotional_tone = "Very Negative"
+    elif polarity < 0:
+        emotional_tone = "Negative"
+    else:
+        emotional_tone = "Neutral"
     
-    return render_template('new_entry.html')
+    # Key themes come from the user's TF-IDF journal index
+    key_themes = journal_index.key_themes(current_user.id, [entry['_id']])
+    
+    # Generate suggestions based on emotional tone
+    suggestions = []
+    if polarity < 0:
+        suggestions.append("Consider practicing gratitude by listing three things you're thankful for.")
+        suggestions.append("Try a short mindfulness exercise to center yourself.")
+    elif polarity > 0:
+        suggestions.append("Build on this positive momentum by setting a small, achievable goal.")
+        suggestions.append("Share your positive experience with someone you care about.")
+    else:
+        suggestions.append("Reflect on what might help you feel more engaged or fulfilled.")
+        suggestions.append("Consider trying a new activity or hobby to spark joy.")
+    
+    return jsonify({
+        'emotionalTone': emotional_tone,
+        'keyThemes': key_themes,
+        'suggestions': suggestions
+    })
+
+@bp.route('/edit-entry/<entry_id>', methods=['POST'])
+@login_required
+def edit_entry(entry_id):
+    try:
+        data = request.get_json()
+        content = data.get('content')
+        mood = data.get('mood')
+        
+        if not content or not mood:
+            return jsonify({'status': 'error', 'message': 'Content and mood are required'}), 400
+
+        updated_at = datetime.now()
 
-@bp.route('/journal/<entry_id>')
+        # Update the specific journal entry
+        result = db.users.update_one(
+            {
+                '_id': ObjectId(current_user.id),
+                'journal_entries._id': ObjectId(entry_id)
+            },
+            {
+                '$set': {
+                    'journal_entries.$.content': content,
+                    'journal_entries.$.mood': encode_mood(mood),
+                    'journal_entries.$.timestamp': updated_at
+                },
+                # The emotion classifier's label was for the old text
+                '$unset': {'journal_entries.$.classifier': ''}
+            }
+        )
+
+        if result.modified_count > 0:
+            journal_index.index_entry(current_user.id, {
+                '_id': ObjectId(entry_id),
+                'content': content,
+                'timestamp': updated_at
+            })
+            wellness_scores.refresh_journal(current_user.id)
+            return jsonify({'status': 'success', 'message': 'Entry updated successfully'})
+        else:
+            return jsonify({'status': 'error', 'message': 'Failed to update entry'}), 500
+
+    except Exception as e:
+        print(f"Error updating entry: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/delete-entry/<entry_id>', methods=['POST'])
 @login_required
-def view_entry(entry_id):
-    entry = JournalEntry.get_by_id(entry_id)
-    if entry and entry.user_id == current_user.id:
-        return render_template('view_entry.html', entry=entry)
-    flash('Entry not found', 'error')
-    return redirect(url_for('journal.journal'))
-
-@bp.route('/entries', methods=['GET'])
+def delete_entry(entry_id):
+    try:
+        result = db.users.update_one(
+            {'_id': ObjectId(current_user.id)},
+            {'$pull': {'journal_entries': {'_id': ObjectId(entry_id)}}}
+        )
+
+        if result.modified_count > 0:
+            journal_index.remove_entries(current_user.id, [ObjectId(entry_id)])
+            wellness_scores.refresh_journal(current_user.id)
+            return jsonify({'status': 'success', 'message': 'Entry deleted successfully'})
+        else:
+            return jsonify({'status': 'error', 'message': 'Failed to delete entry'}), 500
+
+    except Exception as e:
+        print(f"Error deleting entry: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/delete-entries', methods=['POST'])
 @login_required
-def get_entries():
-    entries = list(db.journal_entries.find({'user_id': current_user.id}))
-    return jsonify(entries)
+def delete_entries():
+    try:
+        data = request.get_json()
+        results = bulk_delete_journal_entries(current_user.id, data.get('entry_ids', []))
 
-@bp.route('/entries', methods=['POST'])
+        if 'deleted' in results.values():
+            return jsonify({'status': 'success', 'message': 'Entries deleted successfully', 'results': results})
+        else:
+            return jsonify({'status': 'error', 'message': 'Failed to delete entries', 'results': results}), 500
+
+    except Exception as e:
+        print(f"Error deleting entries: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/delete-all-entries', methods=['POST'])
 @login_required
-def create_entry():
-    data = request.get_json()
-    entry = {
-        'user_id': current_user.id,
-        'content': data.get('content'),
-        'timestamp': datetime.utcnow()
-    }
-    db.journal_entries.insert_one(entry)
-    return jsonify({'message': 'Entry created successfully'}) 
\ No newline at end of file
+def delete_all_entries():
+    try:
+        result = db.users.update_one(
+            {'_id': ObjectId(current_user.id)},
+            {'$set': {'journal_entries': []}}
+        )
+
+        if result.modified_count > 0:
+            journal_index.clear(current_user.id)
+            wellness_scores.refresh_journal(current_user.id)
+            return jsonify({'status': 'success', 'message': 'All entries deleted successfully'})
+        else:
+            return jsonify({'status': 'error', 'message': 'Failed to delete entries'}), 500
+
+    except Exception as e:
+        print(f"Error deleting all entries: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+IMPORT_CHUNK_SIZE = 500
+
+def parse_entry_ids(raw_ids):
+    """Split client-supplied ids into ObjectIds and per-id 'invalid_id' outcomes"""
+    entry_ids, results = [], {}
+    for raw_id in raw_ids:
+        try:
+            entry_ids.append(ObjectId(raw_id))
+        except (InvalidId, TypeError):
+            results[str(raw_id)] = 'invalid_id'
+    return entry_ids, results
+
+def find_journal_entries(user_id, entry_ids, fields=None):
+    """Return the user's entries whose _id is in entry_ids, in journal order"""
+    if not entry_ids:
+        return []
+    pipeline = [
+        {'$match': {'_id': ObjectId(user_id)}},
+        {'$project': {'entries': {'$filter': {
+            'input': {'$ifNull': ['$journal_entries', []]},
+            'as': 'e',
+            'cond': {'$in': ['$$e._id', list(set(entry_ids))]}
+        }}}},
+        {'$unwind': '$entries'},
+        {'$replaceRoot': {'newRoot': '$entries'}}
+    ]
+    if fields:
+        pipeline.append({'$project': {field: 1 for field in fields}})
+    return list(db.users.aggregate(pipeline))
+
+def existing_entry_ids(user_id, entry_ids):
+    return {entry['_id'] for entry in find_journal_entries(user_id, entry_ids, fields=['_id'])}
+
+def bulk_delete_journal_entries(user_id, raw_ids):
+    entry_ids, results = parse_entry_ids(raw_ids)
+    existing = existing_entry_ids(user_id, entry_ids)
+    if existing:
+        db.users.update_one(
+            {'_id': ObjectId(user_id)},
+            {'$pull': {'journal_entries': {'_id': {'$in': list(existing)}}}}
+        )
+        journal_index.remove_entries(user_id, existing)
+        wellness_scores.refresh_journal(user_id)
+    for entry_id in entry_ids:
+        results[str(entry_id)] = 'deleted' if entry_id in existing else 'not_found'
+    return results
+
+def parse_import_entry(raw):
+    """Validate one imported entry, returning (entry, error)"""
+    if not isinstance(raw, dict):
+        return None, 'Entry must be an object'
+    content = raw.get('content')
+    mood = raw.get('mood')
+    if not isinstance(content, str) or not content.strip() or not isinstance(mood, str) or not mood:
+        return None, 'Content and mood are required'
+    try:
+        timestamp = datetime.fromisoformat(raw['timestamp']) if raw.get('timestamp') else datetime.now()
+    except (TypeError, ValueError):
+        return None, 'Invalid timestamp'
+    entry = {'_id': ObjectId(), 'content': content, 'mood': encode_mood(mood), 'timestamp': timestamp}
+    if isinstance(raw.get('tags'), list):
+        entry['tags'] = [str(tag) for tag in raw['tags']]
+    return entry, None
+
+def iter_import_payload():
+    """Yield raw entries from either an NDJSON body or a JSON {'entries': [...]} body"""
+    if request.mimetype == 'application/x-ndjson':
+        for line in request.stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    else:
+        yield from (request.get_json() or {}).get('entries', [])
+
+@bp.route('/journal/bulk/import', methods=['POST'])
+@login_required
+def bulk_import_entries():
+    try:
+        results = []
+        chunk = []
+
+        def flush(chunk):
+            db.users.update_one(
+                {'_id': ObjectId(current_user.id)},
+                {'$push': {'journal_entries': {'$each': chunk}}}
+            )
+            journal_index.index_new_entries(current_user.id, chunk)
+            wellness_scores.add_journal_entries(current_user.id, chunk)
+
+        for index, raw in enumerate(iter_import_payload()):
+            entry, error = parse_import_entry(raw)
+            if error:
+                results.append({'index': index, 'status': 'invalid', 'message': error})
+                continue
+            chunk.append(entry)
+            results.append({'index': index, 'status': 'imported', '_id': str(entry['_id'])})
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        imported = sum(1 for result in results if result['status'] == 'imported')
+        return jsonify({'status': 'success', 'imported': imported, 'results': results})
+    except Exception as e:
+        print(f"Error importing entries: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/journal/bulk/export')
+@login_required
+def bulk_export_entries():
+    # Same records as /export?sections=journal_entries; each line can be fed back to /journal/bulk/import
+    return Response(
+        stream_with_context(export_service.ndjson(current_user.id, ['journal_entries'])),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=journal.ndjson'}
+    )
+
+@bp.route('/journal/bulk/delete', methods=['POST'])
+@login_required
+def bulk_delete_entries():
+    try:
+        data = request.get_json()
+        results = bulk_delete_journal_entries(current_user.id, data.get('entry_ids', []))
+        return jsonify({'status': 'success', 'results': results})
+    except Exception as e:
+        print(f"Error deleting entries: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/journal/bulk/tag', methods=['POST'])
+@login_required
+def bulk_tag_entries():
+    try:
+        data = request.get_json()
+        tags = [str(tag) for tag in data.get('tags', []) if tag]
+        action = data.get('action', 'add')
+        if not tags or action not in ('add', 'remove'):
+            return jsonify({'status': 'error', 'message': 'Tags and an add/remove action are required'}), 400
+
+        entry_ids, results = parse_entry_ids(data.get('entry_ids', []))
+        existing = existing_entry_ids(current_user.id, entry_ids)
+        if existing:
+            if action == 'add':
+                update = {'$addToSet': {'journal_entries.$[e].tags': {'$each': tags}}}
+            else:
+                update = {'$pullAll': {'journal_entries.$[e].tags': tags}}
+            db.users.update_one(
+                {'_id': ObjectId(current_user.id)},
+                update,
+                array_filters=[{'e._id': {'$in': list(existing)}}]
+            )
+        for entry_id in entry_ids:
+            results[str(entry_id)] = 'tagged' if entry_id in existing else 'not_found'
+
+        return jsonify({'status': 'success', 'results': results})
+    except Exception as e:
+        print(f"Error tagging entries: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/generate-report', methods=['POST'])
+@login_required
+def generate_report():
+    try:
+        data = request.get_json()
+        entry_ids, _ = parse_entry_ids(data.get('entry_ids', []))
+        
+        # Let Mongo pick out the selected entries instead of loading the whole journal
+        selected_entries = find_journal_entries(current_user.id, entry_ids)
+        if not selected_entries:
+            return jsonify({'status': 'error', 'message': 'No selected entries found'}), 404
+
+        # Prepare entries text for AI analysis
+        entries_text = '\n\n'.join([
+            f"Entry from {entry['timestamp'].strftime('%Y-%m-%d')} (Mood: {decode_mood(entry['mood'])}):\n{entry['content']}"
+            for entry in selected_entries
+        ])
+
+        # Calculate mood statistics
+        mood_stats = Counter(decode_mood(entry['mood']) for entry in selected_entries)
+        dominant_mood = max(mood_stats.items(), key=lambda x: x[1])[0]
+        mood_distribution = '\n'.join(f"  • {mood.capitalize()}: {count} entries" for mood, count in mood_stats.items())
+
+        # Use OpenAI to analyze the entries with a more focused prompt
+        response = chat_completion(**get_prompt('journal_report').render(entries=entries_text))
+        
+        # Get the AI analysis
+        ai_analysis = response.choices[0].message.content.strip()
+        
+        # Format the emotional analysis section
+        emotional_analysis = f"""
+1. Emotional Statistics
+   • Total Entries Analyzed: {len(selected_entries)}
+   • Dominant Mood: {dominant_mood.capitalize()}
+   • Mood Distribution:
+{mood_distribution}
+
+{ai_analysis}
+"""
+
+        return jsonify({
+            'status': 'success',
+            'emotional_analysis': emotional_analysis
+        })
+
+    except LLMRateLimited as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 429, {'Retry-After': str(int(e.retry_after) + 1)}
+
+    except Exception as e:
+        print(f"Error generating report: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -1,7 +1,175 @@
-from flask import Blueprint, render_template
+from datetime import datetime, timedelta
+from collections import Counter
+from bson import ObjectId
+from flask import Blueprint, request, jsonify, render_template, session, Response, stream_with_context
+from flask_login import login_required, current_user
+from app import db, export_service, persistence, user_stats
+from app.services.emotion import detect_mood, get_emotion_classifier
+from app.models.mood import mood_scores, mood_emoji, decode_mood
+from app.services.export import SECTIONS as EXPORT_SECTIONS
+from app.services.llm import llm_reply, LLMRateLimited
+from app.services.local_replies import local_replies
+from app.services.prompts import get_prompt, COMPANION_MOOD_NOTES, COMPLETE_REPLY_NOTE
 
 bp = Blueprint('main', __name__)
 
 @bp.route('/')
 def index():
-    return render_template('index.html') 
\ No newline at end of file
+    return render_template('index.html')
+
+@bp.route('/analyze_emotion', methods=['POST'])
+def analyze_emotion():
+    data = request.get_json()
+    message = data.get('message', '')
+
+    if not message:
+        return jsonify({'emotion': 'neutral'})
+
+    # Run the classifier
+    result = get_emotion_classifier()(message)[0]
+    emotion = result['label'].lower()
+
+    return jsonify({'emotion': emotion})
+
+@bp.route("/get-response", methods=["POST"])
+@login_required
+def get_response():
+    data = request.get_json()
+    user_input = data.get("user_input", "")
+    user_mood = detect_mood(user_input)  # Detect mood based on input
+    
+    try:
+        # Static companion prompt first so providers can cache it; the mood note varies per request
+        prompt = get_prompt('companion')
+        mood_note = COMPANION_MOOD_NOTES.get(user_mood, COMPANION_MOOD_NOTES['neutral'])
+        reply, source = llm_reply(user_input, user_mood, **prompt.render(context=mood_note, message=user_input))
+
+        # If response is incomplete, try to get a complete response
+        if source == 'llm' and not reply.endswith(('.', '!', '?')):
+            reply, source = llm_reply(user_input, user_mood, **prompt.render(
+                context=f"{mood_note} {COMPLETE_REPLY_NOTE}",
+                message=user_input
+            ))
+
+        # Store conversation in database
+        persistence.put('conversations', {
+            'user_id': ObjectId(current_user.id),
+            'user_message': user_input,
+            'ai_response': reply,
+            'source': source,
+            'timestamp': datetime.utcnow()
+        }, counter='conversations')
+
+        return jsonify({"reply": reply})
+
+    except LLMRateLimited as e:
+        return jsonify({"reply": "You're sending messages faster than I can keep up. Take a breath and try again in a moment."}), 429, {'Retry-After': str(int(e.retry_after) + 1)}
+    except Exception as e:
+        print(f"Error in get-response: {str(e)}")
+        return jsonify({"reply": local_replies.reply(user_input, user_mood)})
+
+@bp.route('/quick-support', methods=['POST'])
+@login_required
+def quick_support():
+    data = request.get_json()
+    support_type = data.get('type')
+    
+    # Define support responses based on type
+    support_responses = {
+        'Breathing Exercise': "Let's do a quick breathing exercise. Breathe in for 4 seconds, hold for 4 seconds, and exhale for 4 seconds. Repeat this 5 times. Focus on your breath and let go of any tension.",
+        'Positive Affirmations': "You are stronger than you think. Every day is a new opportunity to grow and learn. You are capable of handling whatever comes your way.",
+        'Sleep Tips': "Try to maintain a regular sleep schedule. Avoid screens an hour before bed. Create a calming bedtime routine. Your mind and body need rest to function at their best.",
+        'Mindfulness': "Take a moment to focus on the present. Notice your surroundings, your breath, and how you feel. There's no need to judge or change anything right now."
+    }
+    
+    return jsonify({'response': support_responses.get(support_type, "I'm here to support you.")})
+
+@bp.route('/user-data')
+@login_required
+def get_user_data():
+    user_data = db.users.find_one({'_id': ObjectId(current_user.id)})
+    
+    # Calculate statistics from the pre-aggregated counters
+    total_conversations = user_stats.get(current_user.id)['conversations']
+    
+    # Calculate average mood from last 7 days
+    mood_history = user_data.get('mood_history', [])
+    recent_moods = [m['mood'] for m in mood_history if m['timestamp'] > datetime.utcnow() - timedelta(days=7)]
+    avg_mood_score = mood_scores(recent_moods).mean() if recent_moods else 3
+    avg_mood_emoji = mood_emoji(avg_mood_score)
+    
+    # Calculate streak
+    streak = 0
+    if mood_history:
+        last_date = mood_history[-1]['timestamp'].date()
+        current_date = datetime.utcnow().date()
+        if last_date == current_date:
+            streak = 1
+            for i in range(len(mood_history)-2, -1, -1):
+                if mood_history[i]['timestamp'].date() == last_date - timedelta(days=1):
+                    streak += 1
+                    last_date = mood_history[i]['timestamp'].date()
+                else:
+                    break
+    
+    # Get common emotions
+    emotion_counter = Counter([decode_mood(m['mood']) for m in mood_history])
+    total_emotions = sum(emotion_counter.values())
+    common_emotions = [
+        {'name': mood, 'percentage': round(count/total_emotions*100) if total_emotions > 0 else 0}
+        for mood, count in emotion_counter.most_common(5)
+    ]
+    
+    # Get emotional triggers (simplified version)
+    triggers = [
+        {'emoji': '😰', 'description': 'Work-related stress'},
+        {'emoji': '😊', 'description': 'Positive social interactions'},
+        {'emoji': '😢', 'description': 'Loneliness'}
+    ]
+    
+    # Get recent journal entries
+    journal_entries = [
+        {
+            'date': entry['timestamp'].strftime('%Y-%m-%d'),
+            'content': entry['content']
+        }
+        for entry in user_data.get('journal_entries', [])[-5:]  # Last 5 entries
+    ]
+    
+    return jsonify({
+        'totalConversations': total_conversations,
+        'averageMood': avg_mood_emoji,
+        'streak': streak,
+        'commonEmotions': common_emotions,
+        'triggers': triggers,
+        'journalEntries': journal_entries
+    })
+
+@bp.route('/export')
+@login_required
+def export_data():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'status': 'error', 'message': 'Format must be ndjson or csv'}), 400
+
+    sections = [s for s in request.args.get('sections', ','.join(EXPORT_SECTIONS)).split(',') if s]
+    unknown = [s for s in sections if s not in EXPORT_SECTIONS]
+    if unknown:
+        return jsonify({'status': 'error', 'message': f"Unknown sections: {', '.join(unknown)}"}), 400
+
+    if export_format == 'csv':
+        body, mimetype = export_service.csv(current_user.id, sections), 'text/csv'
+    else:
+        body, mimetype = export_service.ndjson(current_user.id, sections), 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=emotio-export.{export_format}'}
+    )
+
+@bp.route('/clear-welcome-flag', methods=['POST'])
+@login_required
+def clear_welcome_flag():
+    session.pop('show_welcome', None)
+    return jsonify({'status': 'success'})
@@ -1,19 +1,51 @@
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, jsonify, render_template
 from flask_login import login_required
-from app.models.professional import Professional
 
 bp = Blueprint('professionals', __name__)
 
-@bp.route('/professionals')
+# Mental Health Professionals Integration
+@bp.route('/professionals', methods=['GET'])
 @login_required
-def list_professionals():
-    professionals = Professional.get_all()
-    return render_template('professionals.html', professionals=professionals)
+def professionals():
+    return render_template('professionals.html')
 
-@bp.route('/professionals/<professional_id>')
+@bp.route('/get-professionals', methods=['GET'])
 @login_required
-def view_professional(professional_id):
-    professional = Professional.get_by_id(professional_id)
-    if professional:
-        return render_template('professional_detail.html', professional=professional)
-    return redirect(url_for('professionals.list_professionals')) 
\ No newline at end of file
+def get_professionals():
+    try:
+        # In a real application, this would query a database of professionals
+        # For now, we'll return sample data
+        professionals = [
+            {
+                'id': '1',
+                'name': 'Dr. Sarah Johnson',
+                'specialty': 'Anxiety & Depression',
+                'credentials': 'PhD, LCSW',
+                'availability': 'Mon-Fri, 9am-5pm',
+                'contact': 'sarah.johnson@example.com'
+            },
+            {
+                'id': '2',
+                'name': 'Dr. Michael Chen',
+                'specialty': 'Trauma & PTSD',
+                'credentials': 'MD, Psychiatrist',
+                'availability': 'Tue-Sat, 10am-6pm',
+                'contact': 'michael.chen@example.com'
+            },
+            {
+                'id': '3',
+                'name': 'Dr. Emily Rodriguez',
+                'specialty': 'Family Therapy',
+                'credentials': 'LMFT, PhD',
+                'availability': 'Wed-Sun, 11am-7pm',
+                'contact': 'emily.rodriguez@example.com'
+            }
+        ]
+        
+        return jsonify({
+            'status': 'success',
+            'professionals': professionals
+        })
+    except Exception as e:
+        print(f"Error getting professionals: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
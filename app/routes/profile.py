@@ -0,0 +1,182 @@
+from datetime import datetime
+from bson import ObjectId
+from flask import Blueprint, request, jsonify, render_template
+from flask_login import login_required, current_user
+from app import db, profiler, mood_series, wellness_scores
+from app.models.mood import encode_mood
+from app.services.mood_series import from_ms
+from app.services.wellness import streak_from_dates
+
+bp = Blueprint('profile', __name__)
+
+# Latest check-ins read for the streak, widened while the streak spans all of them
+STREAK_WINDOW = 32
+
+def current_streak(user_id):
+    """calculate_streak from the tail of the user's mood series instead of the whole mood_history"""
+    count = STREAK_WINDOW
+    while True:
+        timestamps = mood_series.recent(user_id, count).timestamps.tolist()
+        streak = streak_from_dates([from_ms(ms).date() for ms in timestamps])
+        if streak < len(timestamps) or len(timestamps) < count:
+            return streak
+        count *= 4
+
+@bp.route('/profile/update-name', methods=['POST'])
+@login_required
+def update_name():
+    try:
+        data = request.get_json()
+        new_name = data.get('name')
+        
+        if not new_name:
+            return jsonify({'status': 'error', 'message': 'Name is required'}), 400
+            
+        # Update the user's name in MongoDB
+        db.users.update_one(
+            {'_id': ObjectId(current_user.id)},
+            {'$set': {'name': new_name}}
+        )
+        
+        return jsonify({'status': 'success', 'message': 'Name updated successfully'})
+        
+    except Exception as e:
+        print(f"Error updating name: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
+    if request.method == 'POST':
+        try:
+            data = request.get_json()
+            updates = {}
+            
+            # Update basic profile info
+            if 'name' in data:
+                updates['name'] = data['name']
+            if 'bio' in data:
+                updates['bio'] = data['bio']
+            if 'goals' in data:
+                updates['goals'] = data['goals']
+            
+            # Update notification preferences
+            if 'notifications' in data:
+                updates['notifications'] = {
+                    'email': data['notifications'].get('email', False),
+                    'reminders': data['notifications'].get('reminders', False),
+                    'streak_alerts': data['notifications'].get('streak_alerts', False)
+                }
+            
+            # Update privacy settings
+            if 'privacy' in data:
+                updates['privacy'] = {
+                    'share_mood': data['privacy'].get('share_mood', False),
+                    'share_goals': data['privacy'].get('share_goals', False),
+                    'share_progress': data['privacy'].get('share_progress', False)
+                }
+            
+            # Update the user's profile
+            db.users.update_one(
+                {'_id': ObjectId(current_user.id)},
+                {'$set': updates}
+            )
+            
+            return jsonify({'status': 'success', 'message': 'Profile updated successfully'})
+            
+        except Exception as e:
+            print(f"Error updating profile: {str(e)}")
+            return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+    # GET method - return profile data
+    try:
+        # Profile fields and counts only; scores come from the wellness state
+        user = next(db.users.aggregate([
+            {'$match': {'_id': ObjectId(current_user.id)}},
+            {'$project': {
+                'name': 1, 'email': 1, 'bio': 1, 'goals': 1, 'notifications': 1,
+                'privacy': 1, 'created_at': 1, 'streak': 1,
+                'total_entries': {'$size': {'$ifNull': ['$journal_entries', []]}},
+                'total_moods': {'$size': {'$ifNull': ['$mood_history', []]}}
+            }}
+        ]), None)
+        if not user:
+            return jsonify({'status': 'error', 'message': 'User not found'}), 404
+        profiler.note_history_size(user['total_moods'] + user['total_entries'])
+        
+        # Get stored streak from MongoDB
+        stored_streak = user.get('streak', 0)
+        
+        # Scores, average mood and last mood check time
+        wellness = wellness_scores.get(current_user.id)
+        
+        # Get user stats
+        stats = {
+            'total_entries': user['total_entries'],
+            'total_moods': user['total_moods'],
+            'streak': stored_streak,
+            'average_mood': wellness['average_mood'],
+            'wellness_scores': wellness['scores'],
+            'last_mood_check': wellness['last_mood_check']
+        }
+        
+        # Format profile data
+        profile_data = {
+            'name': user.get('name', ''),
+            'email': user.get('email', ''),
+            'bio': user.get('bio', ''),
+            'goals': user.get('goals', []),
+            'notifications': user.get('notifications', {
+                'email': False,
+                'reminders': False,
+                'streak_alerts': False
+            }),
+            'privacy': user.get('privacy', {
+                'share_mood': False,
+                'share_goals': False,
+                'share_progress': False
+            }),
+            'stats': stats,
+            'created_at': user.get('created_at', datetime.utcnow())
+        }
+        
+        return render_template('profile.html', user_data=profile_data)
+        
+    except Exception as e:
+        print(f"Error getting profile: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/track-mood', methods=['POST'])
+@login_required
+def track_mood():
+    try:
+        data = request.get_json()
+        mood = data.get('mood')
+        context = data.get('context', '')
+        
+        if not mood:
+            return jsonify({'status': 'error', 'message': 'Mood is required'}), 400
+        
+        # Create mood entry
+        mood_entry = {
+            'mood': encode_mood(mood),
+            'context': context,
+            'timestamp': datetime.utcnow()
+        }
+        
+        # Update user's mood history and its series
+        mood_series.record(current_user.id, mood_entry)
+        wellness_scores.add_mood(current_user.id, mood_entry['mood'], mood_entry['timestamp'])
+        
+        # Update streak
+        streak = current_streak(current_user.id)
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Mood tracked successfully',
+            'streak': streak
+        })
+        
+    except Exception as e:
+        print(f"Error tracking mood: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -0,0 +1,270 @@
+"""Population-level mood analytics, computed offline over every user.
+
+Users are split into shards by `_id` range and the shards are spread
+over a process pool, one Mongo client per worker. A shard streams its
+users' check-ins and journal moods through a cursor, counts its users'
+chat moods with an aggregation per batch, and folds everything into
+fixed-size totals: mood by weekday, a streak histogram and the mix of
+moods per source. Totals are checkpointed every batch, so an interrupted
+run picks up where each shard stopped. Once every shard is done, the
+totals are merged into one `cohort_summaries` document per run.
+
+    python -m app.services.cohorts --workers 8      # today's run, resumed if interrupted
+    python -m app.services.cohorts --restart        # discard today's checkpoints first
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+from app.models.mood import CODE_LABELS, SCORES, mood_codes
+from app.services.mood_series import MS_PER_DAY, to_ms
+from app.services.wellness import calculate_streak
+
+BATCH_SIZE = 200
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Lower bounds of the streak histogram's bins
+STREAK_BINS = [0, 1, 2, 4, 8, 15, 31]
+
+MOOD_SOURCES = ('checkins', 'journal', 'chat')
+
+USER_FIELDS = {
+    'mood_history.mood': 1, 'mood_history.timestamp': 1,
+    'journal_entries.mood': 1, 'journal_entries.timestamp': 1
+}
+
+
+def _streak_label(index):
+    low = STREAK_BINS[index]
+    if index == len(STREAK_BINS) - 1:
+        return f'{low}+'
+    high = STREAK_BINS[index + 1] - 1
+    return str(low) if low == high else f'{low}-{high}'
+
+
+class CohortTotals:
+    """Mergeable counts for a set of users; stored as plain lists in checkpoints"""
+
+    def __init__(self, doc=None):
+        doc = doc or {}
+        self.users = doc.get('users', 0)
+        self.weekday_sums = np.array(doc.get('weekday_sums', [0.0] * 7), dtype=np.float64)
+        self.weekday_counts = np.array(doc.get('weekday_counts', [0] * 7), dtype=np.int64)
+        self.streaks = np.array(doc.get('streaks', [0] * len(STREAK_BINS)), dtype=np.int64)
+        self.moods = {
+            source: np.array(doc.get('moods', {}).get(source, [0] * len(CODE_LABELS)), dtype=np.int64)
+            for source in MOOD_SOURCES
+        }
+
+    def add_user(self, user):
+        checkins = user.get('mood_history', [])
+        journal = user.get('journal_entries', [])
+        self.users += 1
+        self.streaks[np.searchsorted(STREAK_BINS, calculate_streak(user), side='right') - 1] += 1
+
+        codes = {
+            'checkins': mood_codes([m.get('mood') for m in checkins]),
+            'journal': mood_codes([e.get('mood') for e in journal])
+        }
+        for source, source_codes in codes.items():
+            self.moods[source] += np.bincount(source_codes, minlength=len(CODE_LABELS))
+
+        timestamps = np.array([to_ms(item['timestamp']) for item in checkins + journal], dtype=np.int64)
+        weekdays = (timestamps // MS_PER_DAY + 3) % 7  # 1970-01-01 was a Thursday
+        values = SCORES[np.concatenate([codes['checkins'], codes['journal']])]
+        self.weekday_sums += np.bincount(weekdays, values, minlength=7)
+        self.weekday_counts += np.bincount(weekdays, minlength=7)
+
+    def add_chat(self, counts):
+        """Fold in {stored mood: message count}"""
+        for mood, count in counts.items():
+            self.moods['chat'][mood_codes([mood])[0]] += count
+
+    def merge(self, other):
+        self.users += other.users
+        self.weekday_sums += other.weekday_sums
+        self.weekday_counts += other.weekday_counts
+        self.streaks += other.streaks
+        for source in MOOD_SOURCES:
+            self.moods[source] += other.moods[source]
+        return self
+
+    def to_doc(self):
+        return {
+            'users': self.users,
+            'weekday_sums': self.weekday_sums.tolist(),
+            'weekday_counts': self.weekday_counts.tolist(),
+            'streaks': self.streaks.tolist(),
+            'moods': {source: counts.tolist() for source, counts in self.moods.items()}
+        }
+
+    def summary(self):
+        def mix(counts):
+            total = counts.sum()
+            return {
+                CODE_LABELS[code]: round(float(counts[code] / total), 4)
+                for code in np.flatnonzero(counts)
+            }
+
+        return {
+            'users': self.users,
+            'weekday_mood': {
+                day: round(float(self.weekday_sums[i] / self.weekday_counts[i]), 3) if self.weekday_counts[i] else None
+                for i, day in enumerate(WEEKDAYS)
+            },
+            'weekday_entries': dict(zip(WEEKDAYS, self.weekday_counts.tolist())),
+            'streaks': {_streak_label(i): int(count) for i, count in enumerate(self.streaks)},
+            'mood_mix': {source: mix(counts) for source, counts in self.moods.items()},
+            'mood_totals': {source: int(counts.sum()) for source, counts in self.moods.items()}
+        }
+
+
+def _id_range(lo, hi, after=None):
+    bounds = {}
+    if after is not None:
+        bounds['$gt'] = after
+    elif lo is not None:
+        bounds['$gte'] = lo
+    if hi is not None:
+        bounds['$lt'] = hi
+    return bounds
+
+
+def run_shard(database, run_id, index, lo, hi):
+    """Fold the users with lo <= _id < hi into the shard's checkpoint, resuming
+    after its last checkpointed user; returns (users processed now, seconds)"""
+    started = time.perf_counter()
+    checkpoint_id = f'{run_id}:{index}'
+    checkpoint = database.cohort_checkpoints.find_one({'_id': checkpoint_id}) or {}
+    if checkpoint.get('done'):
+        return 0, 0.0
+    totals = CohortTotals(checkpoint.get('totals'))
+    after = checkpoint.get('last_id')
+    processed = 0
+
+    def save(last_id, chat_range, done=False):
+        # Chat moods for every user id in the batch's range, including ids with no user left
+        totals.add_chat({
+            group['_id']: group['count']
+            for group in database.chat_messages.aggregate([
+                {'$match': {'user_id': chat_range} if chat_range else {}},
+                {'$group': {'_id': '$mood', 'count': {'$sum': 1}}}
+            ])
+        })
+        database.cohort_checkpoints.replace_one({'_id': checkpoint_id}, {
+            '_id': checkpoint_id, 'run_id': run_id, 'shard': index,
+            'totals': totals.to_doc(), 'last_id': last_id, 'done': done,
+            'updated_at': datetime.utcnow()
+        }, upsert=True)
+
+    last_id = after
+    id_range = _id_range(lo, hi, after)
+    cursor = database.users.find(
+        {'_id': id_range} if id_range else {},
+        USER_FIELDS
+    ).sort('_id', 1).batch_size(BATCH_SIZE)
+    batch_start = after
+    for user in cursor:
+        totals.add_user(user)
+        processed += 1
+        last_id = user['_id']
+        if processed % BATCH_SIZE == 0:
+            save(last_id, dict(_id_range(lo, None, batch_start), **{'$lte': last_id}))
+            batch_start = last_id
+    save(last_id, _id_range(lo, hi, batch_start), done=True)
+    return processed, time.perf_counter() - started
+
+
+def _run_shard_task(task):
+    """Pool entry point: each worker process opens its own client"""
+    from app.database import connect_from_config
+    database = connect_from_config()
+    try:
+        return run_shard(database, *task)
+    finally:
+        database.close()
+
+
+class CohortAnalytics:
+    def __init__(self, db):
+        self.db = db
+
+    def shard_bounds(self, shards):
+        """_id boundaries splitting the users into `shards` ranges of about equal size"""
+        total = self.db.users.count_documents({})
+        bounds = []
+        for index in range(1, shards):
+            user = next(self.db.users.find({}, {'_id': 1}).sort('_id', 1).skip(total * index // shards).limit(1), None)
+            if user and (not bounds or user['_id'] > bounds[-1]):
+                bounds.append(user['_id'])
+        return [None] + bounds + [None]
+
+    def start(self, run_id, shards, restart=False):
+        """The run's shard boundaries, fixed when it first starts so a resumed run covers the same ranges"""
+        if restart:
+            self.db.cohort_checkpoints.delete_many({'run_id': run_id})
+            self.db.cohort_summaries.delete_one({'_id': run_id})
+        run = self.db.cohort_summaries.find_one({'_id': run_id})
+        if run is None:
+            run = {'_id': run_id, 'status': 'running', 'started_at': datetime.utcnow(), 'bounds': self.shard_bounds(shards)}
+            self.db.cohort_summaries.insert_one(run)
+        return run['bounds']
+
+    def run(self, run_id, workers=1, shards=None, restart=False):
+        """Process every shard, then merge the checkpoints into the run's summary"""
+        started = time.perf_counter()
+        bounds = self.start(run_id, shards or workers * 4, restart)
+        tasks = [(run_id, index, lo, hi) for index, (lo, hi) in enumerate(zip(bounds, bounds[1:]))]
+
+        if workers > 1:
+            # spawn, so no worker inherits the parent's client
+            with multiprocessing.get_context('spawn').Pool(workers) as pool:
+                results = list(pool.imap_unordered(_run_shard_task, tasks))
+        else:
+            results = [run_shard(self.db, *task) for task in tasks]
+
+        totals = CohortTotals()
+        for checkpoint in self.db.cohort_checkpoints.find({'run_id': run_id, 'done': True}):
+            totals.merge(CohortTotals(checkpoint['totals']))
+        elapsed = time.perf_counter() - started
+        processed = sum(users for users, _ in results)
+        busy = sum(seconds for _, seconds in results)
+        summary = dict(
+            totals.summary(),
+            status='done',
+            completed_at=datetime.utcnow(),
+            workers=workers,
+            shards=len(tasks),
+            elapsed_seconds=round(elapsed, 2),
+            users_per_second=round(processed / elapsed, 1) if elapsed else None,
+            users_per_second_per_worker=round(processed / busy, 1) if busy else None
+        )
+        self.db.cohort_summaries.update_one({'_id': run_id}, {'$set': summary})
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute population-level mood analytics into cohort_summaries')
+    parser.add_argument('--run-id', default=datetime.utcnow().strftime('%Y-%m-%d'), help='resume this run if it was interrupted (default: today)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shards', type=int, help='user ranges to split into (default: 4 per worker)')
+    parser.add_argument('--restart', action='store_true', help="discard the run's checkpoints and start over")
+    args = parser.parse_args(argv)
+
+    from app.database import connect_from_config
+    database = connect_from_config()
+    try:
+        summary = CohortAnalytics(database).run(args.run_id, args.workers, args.shards, args.restart)
+        print(f"Cohort run {args.run_id}: {summary['users']} users in {summary['elapsed_seconds']}s "
+              f"({summary['users_per_second_per_worker']} users/s per worker)")
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
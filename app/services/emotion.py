@@ -1,7 +1,96 @@
-from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
 import numpy as np
-from collections import Counter
+from collections import Counter, namedtuple
+from functools import lru_cache
 from datetime import datetime, timedelta
+from app.services.journal_index import term_frequencies, rank_themes
+from app.services.metrics import metrics
+from app.services.sentiment import lexicon_sentiment
+import threading
+
+# Emotion classifier model; stored labels record it so they can be redone when it changes
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
+_classifiers = {}
+_classifier_lock = threading.Lock()
+
+def get_emotion_classifier(model=EMOTION_MODEL):
+    """Load a transformer classifier on first use rather than at import time; one per model"""
+    classifier = _classifiers.get(model)
+    if classifier is None:
+        with _classifier_lock:
+            classifier = _classifiers.get(model)
+            if classifier is None:
+                from transformers import pipeline
+                classifier = _classifiers[model] = metrics.instrument(
+                    pipeline("text-classification", model=model, return_all_scores=False),
+                    'emotion_classifier'
+                )
+    return classifier
+
+Sentiment = namedtuple('Sentiment', ['polarity', 'subjectivity'])
+Scores = namedtuple('Scores', ['polarity', 'subjectivity', 'moods'])
+
+# Recent chat messages are re-scored on every dashboard refresh
+SENTIMENT_CACHE_SIZE = 8192
+
+# Sentiment engine -> dependency span it is timed under
+ENGINES = {'textblob': 'textblob', 'lexicon': 'lexicon_sentiment'}
+settings = {'engine': 'textblob'}
+
+def init_app(app):
+    """Select the sentiment engine (SENTIMENT_ENGINE: textblob or lexicon)"""
+    engine = app.config['SENTIMENT_ENGINE']
+    if engine not in ENGINES:
+        raise ValueError(f"SENTIMENT_ENGINE must be one of: {', '.join(ENGINES)}")
+    if engine != settings['engine']:
+        settings['engine'] = engine
+        _sentiment.cache_clear()
+
+
+@lru_cache(maxsize=SENTIMENT_CACHE_SIZE)
+def _sentiment(text):
+    """(polarity, subjectivity) from the configured engine. The textblob
+    engine calls TextBlob's pattern analyzer directly: the same scores as
+    TextBlob(text).sentiment without building a blob and a result type per call"""
+    if settings['engine'] == 'lexicon':
+        return lexicon_sentiment(text)
+    polarity, subjectivity = pattern_sentiment(text)
+    return polarity, subjectivity
+
+def text_sentiment(text):
+    """Sentiment of one text, timed as a dependency span"""
+    with metrics.span(ENGINES[settings['engine']]):
+        return Sentiment(*_sentiment(text or ''))
+
+def score_many(texts):
+    """Score a batch of texts in one pass.
+
+    Returns NumPy arrays of polarity, subjectivity and EmotionService mood
+    labels. Repeated texts are scored once, and mood labels are assigned
+    with vectorised thresholds rather than per message.
+    """
+    with metrics.span(ENGINES[settings['engine']]):
+        pairs = [_sentiment(text or '') for text in texts]
+    scores = np.array(pairs, dtype=float).reshape(-1, 2)
+    polarity, subjectivity = scores[:, 0], scores[:, 1]
+    # Same thresholds as EmotionService.analyze_emotion, first match wins
+    moods = np.select(
+        [polarity > 0.3, polarity < -0.3, subjectivity > 0.5],
+        ['happy', 'sad', 'anxious'],
+        'neutral'
+    )
+    return Scores(polarity, subjectivity, moods)
+
+# Emotion Detection using TextBlob
+def detect_mood(text):
+    polarity = text_sentiment(text).polarity
+    if polarity > 0.5:
+        return "happy"
+    elif polarity < -0.3:
+        return "sad"
+    else:
+        return "neutral"
 
 class EmotionService:
     def __init__(self):
@@ -9,11 +98,11 @@ class EmotionService:
 
     def analyze_emotion(self, text):
         # Use TextBlob for basic sentiment analysis
-        analysis = TextBlob(text)
+        sentiment = text_sentiment(text)
         
         # Get polarity (-1 to 1) and subjectivity (0 to 1)
-        polarity = analysis.sentiment.polarity
-        subjectivity = analysis.sentiment.subjectivity
+        polarity = sentiment.polarity
+        subjectivity = sentiment.subjectivity
         
         # Determine emotion based on polarity and subjectivity
         if polarity > 0.3:
@@ -28,45 +117,27 @@ class EmotionService:
     def detect_mood(self, text):
         return self.analyze_emotion(text)
 
+    def score_many(self, texts):
+        return score_many(texts)
+
     def calculate_emotional_score(self, messages):
         if not messages:
             return 0
         
-        total_score = 0
-        for message in messages:
-            emotion = self.analyze_emotion(message.get('message', ''))
-            if emotion == 'happy':
-                total_score += 1
-            elif emotion == 'sad':
-                total_score -= 1
-            elif emotion == 'anxious':
-                total_score -= 0.5
-        
-        return total_score / len(messages)
+        moods = score_many([message.get('message', '') for message in messages]).moods
+        weights = np.select([moods == 'happy', moods == 'sad', moods == 'anxious'], [1, -1, -0.5], 0)
+        return float(weights.mean())
 
     def get_avg_mood_emoji(self, messages):
         if not messages:
             return '😐'
         
-        happy_count = 0
-        sad_count = 0
-        anxious_count = 0
-        
-        for message in messages:
-            emotion = self.analyze_emotion(message.get('message', ''))
-            if emotion == 'happy':
-                happy_count += 1
-            elif emotion == 'sad':
-                sad_count += 1
-            elif emotion == 'anxious':
-                anxious_count += 1
-        
-        total = len(messages)
-        if happy_count / total > 0.5:
+        moods = score_many([message.get('message', '') for message in messages]).moods
+        if np.mean(moods == 'happy') > 0.5:
             return '😊'
-        elif sad_count / total > 0.5:
+        elif np.mean(moods == 'sad') > 0.5:
             return '😢'
-        elif anxious_count / total > 0.5:
+        elif np.mean(moods == 'anxious') > 0.5:
             return '😰'
         else:
             return '😐'
@@ -76,21 +147,12 @@ class EmotionService:
             return {'sentiment': 0, 'key_themes': [], 'emotional_tone': 'neutral'}
         
         # Calculate overall sentiment
-        sentiment_scores = []
-        for entry in journal_entries:
-            blob = TextBlob(entry['content'])
-            sentiment_scores.append(blob.sentiment.polarity)
-        
-        avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0
-        
-        # Extract key themes
-        all_words = []
-        for entry in journal_entries:
-            words = TextBlob(entry['content']).words
-            all_words.extend([word.lower() for word in words if len(word) > 3])
+        avg_sentiment = float(score_many([entry['content'] for entry in journal_entries]).polarity.mean())
         
-        word_counter = Counter(all_words)
-        key_themes = [word for word, count in word_counter.most_common(5)]
+        # Extract key themes, weighting terms by TF-IDF across the given entries
+        tf_maps = [term_frequencies(entry['content']) for entry in journal_entries]
+        df = Counter(term for tf in tf_maps for term in tf)
+        key_themes = rank_themes(tf_maps, df, len(tf_maps))
         
         # Determine emotional tone
         if avg_sentiment > 0.5:
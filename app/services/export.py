@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from bson import ObjectId
+from datetime import datetime
+from app.models.mood import decode_mood
+
+SECTIONS = ('mood_history', 'journal_entries', 'bmi_history', 'conversations', 'counseling_sessions')
+CSV_COLUMNS = (
+    'section', 'id', 'timestamp', 'mood', 'context', 'content', 'tags', 'bmi',
+    'user_message', 'ai_response', 'session_id', 'session_type'
+)
+BATCH_SIZE = 500
+
+
+def _serialize(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return [_serialize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _serialize(item) for key, item in value.items()}
+    return value
+
+
+class ExportService:
+    """Streams a user's full history straight from Mongo cursors.
+
+    Records are produced one at a time from aggregation and find cursors with
+    a bounded batch size, so memory stays flat however long the history is.
+    """
+
+    def __init__(self, db, batch_size=BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    def _unwind(self, user_id, field):
+        return self.db.users.aggregate([
+            {'$match': {'_id': ObjectId(user_id)}},
+            {'$project': {field: 1}},
+            {'$unwind': f'${field}'},
+            {'$replaceRoot': {'newRoot': f'${field}'}}
+        ], batchSize=self.batch_size)
+
+    def _counseling_messages(self, user_id):
+        sessions = self.db.counseling_sessions.find(
+            {'user_id': ObjectId(user_id)},
+            {'session_type': 1, 'created_at': 1, 'message_count': 1}
+        ).sort('created_at', 1).batch_size(self.batch_size)
+
+        for session in sessions:
+            base = {'session_id': session['_id'], 'session_type': session.get('session_type', 'general')}
+            if 'message_count' in session:
+                buckets = self.db.counseling_message_buckets.find(
+                    {'session_id': session['_id']},
+                    {'messages': 1}
+                ).sort('bucket', 1).batch_size(self.batch_size)
+                messages = (message for bucket in buckets for message in bucket.get('messages', []))
+            else:
+                # Legacy sessions keep their transcript inline
+                messages = self.db.counseling_sessions.aggregate([
+                    {'$match': {'_id': session['_id']}},
+                    {'$project': {'messages': 1}},
+                    {'$unwind': '$messages'},
+                    {'$replaceRoot': {'newRoot': '$messages'}}
+                ], batchSize=self.batch_size)
+            for message in messages:
+                yield dict(base, **message)
+
+    def iter_records(self, user_id, sections=SECTIONS):
+        """Yield (section, record) pairs for every requested section"""
+        for section in sections:
+            if section in ('mood_history', 'journal_entries', 'bmi_history'):
+                records = self._unwind(user_id, section)
+            elif section == 'conversations':
+                records = self.db.conversations.find(
+                    {'user_id': ObjectId(user_id)},
+                    {'user_id': 0}
+                ).sort('timestamp', 1).batch_size(self.batch_size)
+            elif section == 'counseling_sessions':
+                records = self._counseling_messages(user_id)
+            else:
+                continue
+            for record in records:
+                if 'mood' in record:
+                    record['mood'] = decode_mood(record['mood'])
+                yield section, record
+
+    def ndjson(self, user_id, sections=SECTIONS):
+        for section, record in self.iter_records(user_id, sections):
+            record = _serialize(record)
+            record['section'] = section
+            yield json.dumps(record) + '\n'
+
+    def csv(self, user_id, sections=SECTIONS):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        for section, record in self.iter_records(user_id, sections):
+            row = _serialize(record)
+            row['section'] = section
+            row['id'] = row.pop('_id', '')
+            if isinstance(row.get('tags'), list):
+                row['tags'] = ';'.join(row['tags'])
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
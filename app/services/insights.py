@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from collections import Counter
+from app.models.mood import mood_valences
 
 class InsightsService:
     def analyze_mood_trends(self, entries):
@@ -17,8 +18,7 @@ class InsightsService:
         for date, moods in sorted(mood_data.items()):
             dates.append(date)
             # Simple scoring: positive = 1, neutral = 0, negative = -1
-            score = sum(1 if m in ['happy', 'excited'] else -1 if m in ['sad', 'anxious'] else 0 for m in moods) / len(moods)
-            scores.append(score)
+            scores.append(float(mood_valences(moods).mean()))
 
         return {
             'labels': dates,
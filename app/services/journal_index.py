@@ -0,0 +1,234 @@
+import math
+import re
+from collections import Counter
+from bson import ObjectId
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Bumped whenever the stored index layout changes so users get re-indexed
+INDEX_VERSION = 2
+
+# Times a rebuild starts over after writers changed the stats under it
+REBUILD_ATTEMPTS = 3
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been
+before being below between both but by can can't cannot could couldn't did didn't do does
+doesn't doing don't down during each even ever every few for from further get gets getting
+got had hadn't has hasn't have haven't having he he'd he'll he's her here here's hers herself
+him himself his how how's however i i'd i'll i'm i've if in into is isn't it it's its itself
+just let's like me more most much mustn't my myself no nor not now of off on once only or
+other ought our ours ourselves out over own really same shan't she she'd she'll she's should
+shouldn't so some still such than that that's the their theirs them themselves then there
+there's these they they'd they'll they're they've this those though through to today too
+under until up us very was wasn't we we'd we'll we're we've were weren't what what's when
+when's where where's which while who who's whom why why's will with won't would wouldn't yet
+you you'd you'll you're you've your yours yourself yourselves
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with surrounding apostrophes and stopwords removed"""
+    tokens = []
+    for token in TOKEN_RE.findall((text or '').lower()):
+        token = token.strip("'")
+        if len(token) > 1 and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def term_frequencies(text):
+    return dict(Counter(tokenize(text)))
+
+
+def rank_themes(tf_maps, df, total_entries, limit=5):
+    """Rank terms across a set of entries by summed TF-IDF weight"""
+    scores = Counter()
+    for tf in tf_maps:
+        for term, count in tf.items():
+            idf = math.log((1 + total_entries) / (1 + df.get(term, 0))) + 1
+            scores[term] += count * idf
+    return [term for term, score in scores.most_common(limit)]
+
+
+class JournalIndex:
+    """Per-user inverted index over journal entry content.
+
+    Each indexed entry gets a `journal_entry_terms` document holding its
+    distinct terms and term counts, so a multikey index on (user_id, tokens)
+    answers keyword searches without touching the embedded journal array.
+    Document frequencies live on one `journal_term_stats` document per user
+    and are adjusted with $inc as entries change, which makes TF-IDF theme
+    extraction a lookup instead of a re-tokenization of the journal. Every
+    stats update also bumps its `writes` counter, which is how a rebuild
+    notices writers it raced with.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def terms(self):
+        return self.db.journal_entry_terms
+
+    @property
+    def stats(self):
+        return self.db.journal_term_stats
+
+    def _term_doc(self, user_id, entry):
+        tf = term_frequencies(entry.get('content', ''))
+        return {
+            '_id': entry['_id'],
+            'user_id': ObjectId(user_id),
+            'tokens': sorted(tf),
+            'tf': tf,
+            'timestamp': entry.get('timestamp')
+        }
+
+    def _adjust_stats(self, user_id, old_tf, new_tf):
+        inc = {}
+        for term in set(old_tf or {}) - set(new_tf or {}):
+            inc[f'df.{term}'] = -1
+        for term in set(new_tf or {}) - set(old_tf or {}):
+            inc[f'df.{term}'] = 1
+        entry_delta = (1 if new_tf is not None and old_tf is None else 0) - (1 if old_tf is not None and new_tf is None else 0)
+        if entry_delta:
+            inc['entries'] = entry_delta
+        if inc:
+            inc['writes'] = 1
+            self.stats.update_one({'_id': ObjectId(user_id)}, {'$inc': inc}, upsert=True)
+
+    def index_entry(self, user_id, entry):
+        doc = self._term_doc(user_id, entry)
+        previous = self.terms.find_one_and_replace({'_id': entry['_id']}, doc, upsert=True)
+        self._adjust_stats(user_id, previous.get('tf', {}) if previous else None, doc['tf'])
+
+    def index_new_entries(self, user_id, entries):
+        """Index freshly created entries with one bulk write and one stats update"""
+        docs = [self._term_doc(user_id, entry) for entry in entries]
+        if not docs:
+            return
+        # A rebuild running alongside may have indexed some of them already; only count the rest
+        result = self.terms.bulk_write([
+            UpdateOne({'_id': doc['_id']}, {'$setOnInsert': doc}, upsert=True) for doc in docs
+        ], ordered=False)
+        docs = [docs[i] for i in result.upserted_ids]
+        if not docs:
+            return
+        df = Counter(term for doc in docs for term in doc['tokens'])
+        inc = {f'df.{term}': count for term, count in df.items()}
+        inc['entries'] = len(docs)
+        inc['writes'] = 1
+        self.stats.update_one({'_id': ObjectId(user_id)}, {'$inc': inc}, upsert=True)
+
+    def remove_entries(self, user_id, entry_ids):
+        """Unindex entries with one stats update for all of them, then drop terms no entry uses"""
+        query = {'user_id': ObjectId(user_id), '_id': {'$in': list(entry_ids)}}
+        docs = list(self.terms.find(query, {'tokens': 1}))
+        if not docs:
+            return
+        self.terms.delete_many(query)
+        df = Counter(term for doc in docs for term in doc.get('tokens', []))
+        inc = {f'df.{term}': -count for term, count in df.items()}
+        inc['entries'] = -len(docs)
+        inc['writes'] = 1
+        stats = self.stats.find_one_and_update(
+            {'_id': ObjectId(user_id)},
+            {'$inc': inc},
+            projection={f'df.{term}': 1 for term in df},
+            return_document=ReturnDocument.AFTER
+        )
+        zeroed = [term for term, count in ((stats or {}).get('df') or {}).items() if count <= 0]
+        if zeroed:
+            # Skipped if any of them was counted again meanwhile; a zero df reads the same as none
+            self.stats.update_one(
+                dict({'_id': ObjectId(user_id)}, **{f'df.{term}': {'$lte': 0} for term in zeroed}),
+                {'$unset': {f'df.{term}': '' for term in zeroed}}
+            )
+
+    def clear(self, user_id):
+        self.terms.delete_many({'user_id': ObjectId(user_id)})
+        self.stats.update_one(
+            {'_id': ObjectId(user_id)},
+            {'$set': {'entries': 0, 'df': {}}, '$inc': {'writes': 1}},
+            upsert=True
+        )
+
+    def _drop_unjournaled(self, user_id, indexed_ids):
+        """Delete term documents whose entry is no longer in the user's journal"""
+        stale = [doc['_id'] for doc in self.terms.find(
+            {'user_id': user_id, '_id': {'$nin': list(indexed_ids)}}, {'_id': 1}
+        )]
+        if not stale:
+            return
+        # Re-read the journal so entries created since the rebuild read it are kept
+        user = self.db.users.find_one({'_id': user_id}, {'journal_entries._id': 1}) or {}
+        journaled = {entry['_id'] for entry in user.get('journal_entries', [])}
+        stale = [entry_id for entry_id in stale if entry_id not in journaled]
+        if stale:
+            self.terms.delete_many({'user_id': user_id, '_id': {'$in': stale}})
+
+    def rebuild(self, user_id):
+        """Re-index every embedded entry of a user and mark the index as built.
+
+        Term documents are upserted per entry, so rebuilds and writers running
+        alongside never collide. The stats document is only replaced if its
+        `writes` counter is unchanged since the journal was read; otherwise
+        the rebuild starts over, and after REBUILD_ATTEMPTS it leaves the
+        index unmarked for the next request to retry.
+        """
+        uid = ObjectId(user_id)
+        for _ in range(REBUILD_ATTEMPTS):
+            before = self.stats.find_one({'_id': uid}, {'writes': 1})
+            user = self.db.users.find_one({'_id': uid}, {'journal_entries': 1})
+            if user is None:
+                return
+            docs = [self._term_doc(uid, entry) for entry in user.get('journal_entries', [])]
+            if docs:
+                self.terms.bulk_write([ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in docs], ordered=False)
+            self._drop_unjournaled(uid, [doc['_id'] for doc in docs])
+
+            df = Counter(term for doc in docs for term in doc['tokens'])
+            writes = (before or {}).get('writes')
+            stats = {'_id': uid, 'entries': len(docs), 'df': dict(df), 'writes': (writes or 0) + 1}
+            if before is None:
+                try:
+                    self.stats.insert_one(stats)
+                except DuplicateKeyError:
+                    continue
+            elif not self.stats.replace_one({'_id': uid, 'writes': writes}, stats).matched_count:
+                continue
+            self.db.users.update_one({'_id': uid}, {'$set': {'journal_index_version': INDEX_VERSION}})
+            return
+
+    def ensure_built(self, user_id):
+        """Backfill the index for users whose entries predate it"""
+        if not self.db.users.find_one({'_id': ObjectId(user_id), 'journal_index_version': INDEX_VERSION}, {'_id': 1}):
+            self.rebuild(user_id)
+
+    def search(self, user_id, query):
+        """Return the ids of entries containing every term of the query"""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return None
+        self.ensure_built(user_id)
+        cursor = self.terms.find(
+            {'user_id': ObjectId(user_id), 'tokens': {'$all': terms}},
+            {'_id': 1}
+        )
+        return [doc['_id'] for doc in cursor]
+
+    def key_themes(self, user_id, entry_ids, limit=5):
+        """Top TF-IDF terms for a set of entries, weighted against the user's whole journal"""
+        self.ensure_built(user_id)
+        stats = self.stats.find_one({'_id': ObjectId(user_id)}) or {}
+        tf_maps = [
+            doc.get('tf', {})
+            for doc in self.terms.find(
+                {'user_id': ObjectId(user_id), '_id': {'$in': list(entry_ids)}},
+                {'tf': 1}
+            )
+        ]
+        return rank_themes(tf_maps, stats.get('df', {}), stats.get('entries', 0), limit)
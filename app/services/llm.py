@@ -0,0 +1,146 @@
+import os
+from flask import has_request_context, request, jsonify
+from flask_login import current_user
+from app.services.metrics import metrics, metrics_token_required
+from app.services.llm_router import AllBackendsFailed, Backend, LLMRouter, LLMTimeout
+from app.services.local_replies import local_replies
+from app.services.llm_usage import LLMRateLimited, estimate_tokens
+
+# Define OpenRouter headers
+OPENROUTER_HEADERS = {
+    "HTTP-Referer": "http://localhost:5000",  # Your app URL
+    "X-Title": "Emotio App"
+}
+
+settings = {
+    'default_max_tokens': 400,
+    'max_tokens_cap': 1000,
+    'prompt_cache_hints': False,
+    'local_fallback': True,
+    'reply_budget': 8.0,
+}
+usage = None
+router = None
+
+
+def build_backends(config):
+    """Backends from LLM_BACKENDS (JSON list), or just OpenRouter when unset"""
+    specs = config['LLM_BACKENDS'] or [{
+        'name': 'openrouter',
+        'base_url': config['OPENROUTER_API_BASE'],
+        'api_key_env': 'OPENROUTER_API_KEY',
+        'headers': OPENROUTER_HEADERS
+    }]
+    return [
+        Backend(
+            spec['name'],
+            spec['base_url'],
+            spec.get('api_key') or os.getenv(spec.get('api_key_env', ''), ''),
+            headers=spec.get('headers'),
+            models=spec.get('models'),
+            timeout=spec.get('timeout', config['LLM_TIMEOUT_SECONDS']),
+            breaker_threshold=config['LLM_BREAKER_THRESHOLD'],
+            breaker_reset=config['LLM_BREAKER_RESET_SECONDS']
+        )
+        for spec in specs
+    ]
+
+
+def init_app(app, usage_tracker=None):
+    """Build the backend router and attach usage accounting"""
+    global usage, router
+    settings.update(
+        default_max_tokens=app.config['LLM_DEFAULT_MAX_TOKENS'],
+        max_tokens_cap=app.config['LLM_MAX_TOKENS_CAP'],
+        prompt_cache_hints=app.config['LLM_PROMPT_CACHE_HINTS'],
+        local_fallback=app.config['LLM_LOCAL_FALLBACK'],
+        reply_budget=app.config['LLM_REPLY_BUDGET_MS'] / 1000,
+    )
+    usage = usage_tracker
+    router = LLMRouter(
+        build_backends(app.config),
+        hedge_delay=app.config['LLM_HEDGE_DELAY_MS'] / 1000,
+        hedge_min_delay=app.config['LLM_HEDGE_MIN_DELAY_MS'] / 1000,
+        max_inflight=app.config['LLM_MAX_INFLIGHT']
+    )
+
+    @app.route('/llm/backends')
+    @metrics_token_required
+    def llm_backends():
+        return jsonify({'status': 'success', 'backends': router.health()})
+
+
+def _caller():
+    if not has_request_context():
+        return 'background', None
+    route = request.url_rule.rule if request.url_rule else request.path
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+    return route, user_id
+
+
+def _with_cache_hint(messages):
+    """Mark the static system prefix as cacheable for providers that take explicit hints"""
+    first = messages[0]
+    if first.get('role') != 'system' or not isinstance(first.get('content'), str):
+        return messages
+    hinted = dict(first, content=[{'type': 'text', 'text': first['content'], 'cache_control': {'type': 'ephemeral'}}])
+    return [hinted] + list(messages[1:])
+
+
+def chat_completion(route=None, template=None, hedge=False, budget=None, **kwargs):
+    """Every completion call is rate limited, routed across backends and accounted by route, template and user"""
+    if template and settings['prompt_cache_hints'] and kwargs.get('messages'):
+        kwargs['messages'] = _with_cache_hint(kwargs['messages'])
+    extra_headers = kwargs.pop('headers', None)
+    if extra_headers:
+        kwargs['extra_headers'] = extra_headers
+    kwargs['max_tokens'] = min(kwargs.get('max_tokens') or settings['default_max_tokens'], settings['max_tokens_cap'])
+
+    caller_route, user_id = _caller()
+    route = route or caller_route
+    reserved = estimate_tokens(kwargs.get('messages'), kwargs['max_tokens'])
+    if usage is not None:
+        usage.reserve(user_id, reserved)
+
+    def account(backend, response, latency_ms):
+        tokens = getattr(response, 'usage', None)
+        prompt_tokens = getattr(tokens, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(tokens, 'completion_tokens', 0) or 0
+        cached_tokens = getattr(getattr(tokens, 'prompt_tokens_details', None), 'cached_tokens', 0) or 0
+        if usage is not None:
+            usage.record(route, kwargs.get('model'), user_id, prompt_tokens, completion_tokens, latency_ms,
+                         error=response is None, template=template, cached_tokens=cached_tokens, backend=backend.name)
+
+    response = None
+    try:
+        with metrics.span('openai'):
+            response = router.complete(kwargs, hedge=hedge, on_attempt=account, budget=budget)
+        return response
+    finally:
+        if usage is not None:
+            used = getattr(getattr(response, 'usage', None), 'total_tokens', 0) or 0
+            usage.settle(user_id, reserved, used)
+
+
+def llm_reply(message, mood=None, session_type=None, **kwargs):
+    """Reply text for a chat message, and whether it came from the 'llm' or the 'local' engine.
+
+    The LLM gets `reply_budget` seconds; when it misses that or every
+    backend fails, the local reply engine answers instead so the user
+    still gets a contextual reply. Rate limiting is not a failure and is
+    raised as before.
+    """
+    if not settings['local_fallback']:
+        response = chat_completion(**kwargs)
+        return response.choices[0].message.content.strip(), 'llm'
+    try:
+        response = chat_completion(budget=settings['reply_budget'], **kwargs)
+        reply = response.choices[0].message.content.strip()
+        if reply:
+            return reply, 'llm'
+    except LLMRateLimited:
+        raise
+    except Exception as e:
+        print(f"Error getting LLM reply, answering locally: {str(e)}")
+    with metrics.span('local_replies'):
+        return local_replies.reply(message, mood, session_type), 'local'
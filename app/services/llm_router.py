@@ -0,0 +1,290 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import openai
+from app.services.metrics import metrics
+
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class AllBackendsFailed(Exception):
+    pass
+
+
+class LLMOverloaded(AllBackendsFailed):
+    """Every router thread is busy; callers fall back instead of queueing behind them"""
+
+    def __init__(self, max_inflight):
+        self.max_inflight = max_inflight
+        super().__init__(f"{max_inflight} LLM attempts already in flight")
+
+
+class LLMTimeout(AllBackendsFailed):
+    """No backend answered within the caller's latency budget"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        super().__init__(f"No LLM backend answered within {budget:.1f}s")
+
+
+class CircuitBreaker:
+    """Closed until `threshold` consecutive failures, then open for `reset_after`
+    seconds, then half-open: one probe request decides whether it closes again."""
+
+    def __init__(self, threshold=5, reset_after=30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = 'half_open'
+                self._probing = False
+            # A probe claimed but never run (backend not used) expires after reset_after
+            stale = time.monotonic() - self.probe_started >= self.reset_after
+            if self.state == 'half_open' and (not self._probing or stale):
+                self._probing = True
+                self.probe_started = time.monotonic()
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class Backend:
+    """One OpenAI-compatible endpoint with its own client, breaker and latency window"""
+
+    def __init__(self, name, base_url, api_key, headers=None, models=None, timeout=30.0,
+                 breaker_threshold=5, breaker_reset=30.0):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.headers = headers or {}
+        self.models = models or {}
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.errors = 0
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+        # Attempts run on router threads; counters and latencies change under this lock
+        self._stats_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """One client, and so one HTTP connection pool, per worker process"""
+        if self._client is None or self._client_pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    self._client = openai.OpenAI(
+                        base_url=self.base_url,
+                        api_key=self.api_key or 'unused',
+                        default_headers=self.headers,
+                        timeout=self.timeout,
+                        max_retries=0
+                    )
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def p95(self):
+        with self._stats_lock:
+            if len(self.latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def complete(self, kwargs):
+        request = dict(kwargs, model=self.models.get(kwargs.get('model'), kwargs.get('model')))
+        started = time.perf_counter()
+        with self._stats_lock:
+            self.calls += 1
+        try:
+            with metrics.span(f'llm:{self.name}'):
+                response = self.client.chat.completions.create(**request)
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            if retryable(e):
+                self.breaker.failure()
+            raise
+        with self._stats_lock:
+            self.latencies.append(time.perf_counter() - started)
+        self.breaker.success()
+        return response
+
+    def health(self):
+        p95 = self.p95()
+        with self._stats_lock:
+            calls, errors = self.calls, self.errors
+        return {
+            'name': self.name,
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'calls': calls,
+            'errors': errors,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+
+def retryable(error):
+    """Timeouts, connection errors, 429s and 5xx justify trying another backend"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        return True
+    return status == 429 or status >= 500
+
+
+class LLMRouter:
+    """Routes completions across configured backends.
+
+    Backends are tried in configured order, skipping any whose circuit is
+    open. A hedged request starts on the first backend; if it has not
+    answered by that backend's p95 latency (or `hedge_delay` until enough
+    samples exist), the same request is also sent to the next healthy
+    backend and whichever succeeds first wins. Non-hedged requests fail
+    over sequentially. With a `budget` (seconds) the caller gets
+    LLMTimeout once it runs out instead of waiting on slow backends. `on_attempt` is called for every attempt, including
+    a hedge that lost, so its tokens are still accounted.
+
+    At most `max_inflight` attempts run at once per process; past that,
+    LLMOverloaded is raised straight away rather than queueing work that
+    would start after its caller stopped waiting.
+    """
+
+    def __init__(self, backends, hedge_delay=2.0, hedge_min_delay=0.3, max_inflight=32):
+        self.backends = backends
+        self.hedge_delay = hedge_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.max_inflight = max_inflight
+        self._executor = None
+        self._executor_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_inflight, thread_name_prefix='llm')
+                    self._slots = threading.BoundedSemaphore(self.max_inflight)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _available(self):
+        available = [backend for backend in self.backends if backend.breaker.allow()]
+        # With every circuit open, still try the first backend rather than fail outright
+        return available or self.backends[:1]
+
+    def _attempt(self, backend, kwargs, on_attempt):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = backend.complete(kwargs)
+            return response
+        finally:
+            if on_attempt is not None:
+                on_attempt(backend, response, (time.perf_counter() - started) * 1000)
+
+    def _run(self, backend, kwargs, on_attempt, give_up):
+        if give_up is not None and time.monotonic() >= give_up:
+            # Started after the caller stopped waiting; skip the call nobody would read
+            raise LLMTimeout(0)
+        return self._attempt(backend, kwargs, on_attempt)
+
+    def _submit(self, backend, kwargs, on_attempt, give_up):
+        """Start an attempt on the executor, or return None when max_inflight attempts are running"""
+        executor, slots = self.executor, self._slots
+        if not slots.acquire(blocking=False):
+            return None
+        future = executor.submit(self._run, backend, kwargs, on_attempt, give_up)
+        # Also runs for attempts cancelled before they started
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _deadline(self, backend):
+        p95 = backend.p95()
+        return self.hedge_delay if p95 is None else max(self.hedge_min_delay, p95)
+
+    def complete(self, kwargs, hedge=False, on_attempt=None, budget=None):
+        candidates = self._available()
+        last_error = None
+
+        if budget is None and (not hedge or len(candidates) < 2):
+            for backend in candidates:
+                try:
+                    return self._attempt(backend, kwargs, on_attempt)
+                except Exception as e:
+                    last_error = e
+                    if not retryable(e):
+                        raise
+            raise AllBackendsFailed(f"All LLM backends failed: {last_error}") from last_error
+
+        # Attempts run on the executor so the caller can stop waiting at the
+        # hedge deadline or the budget. When it does, attempts that have not
+        # started are cancelled; one already running finishes in the
+        # background and is accounted through on_attempt
+        remaining = list(candidates)
+        started = time.monotonic()
+        hedge_at = started + self._deadline(candidates[0]) if hedge else None
+        give_up = started + budget if budget is not None else None
+        first = self._submit(remaining.pop(0), kwargs, on_attempt, give_up)
+        if first is None:
+            raise LLMOverloaded(self.max_inflight)
+        pending = {first}
+        try:
+            while True:
+                now = time.monotonic()
+                timeouts = [max(0, moment - now) for moment in (hedge_at, give_up) if moment is not None]
+                done, pending = wait(pending, timeout=min(timeouts) if timeouts else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        last_error = e
+                        if not retryable(e):
+                            raise
+                if give_up is not None and time.monotonic() >= give_up:
+                    raise LLMTimeout(budget)
+                # Bring in the next backend when an attempt failed, or once (hedge) when the primary is slow
+                if done or (hedge_at is not None and time.monotonic() >= hedge_at):
+                    hedge_at = None
+                    future = self._submit(remaining[0], kwargs, on_attempt, give_up) if remaining else None
+                    if future is not None:
+                        pending.add(future)
+                        remaining.pop(0)
+                    elif remaining and not pending:
+                        raise LLMOverloaded(self.max_inflight) from last_error
+                if not pending:
+                    raise AllBackendsFailed(f"All LLM backends failed: {last_error}") from last_error
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def health(self):
+        return [backend.health() for backend in self.backends]
@@ -0,0 +1,254 @@
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import request, jsonify
+from pymongo import UpdateOne
+from app.services.metrics import metrics_token_required
+
+# Rough prompt size used to reserve tokens before the provider reports usage
+CHARS_PER_TOKEN = 4
+MAX_TRACKED_USERS = 10000
+
+
+class LLMRateLimited(Exception):
+    """Raised before a call that would exceed a user or global token budget"""
+
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"AI {scope} token budget exhausted, try again in {retry_after:.0f}s")
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute"""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount):
+        """Take `amount` tokens, or return the seconds until they would be available"""
+        self._refill(time.monotonic())
+        # A single request larger than the bucket is allowed once the bucket is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0
+        return (amount - self.tokens) / self.rate
+
+    def give(self, amount):
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def full(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+def estimate_tokens(messages, max_tokens):
+    prompt_chars = sum(len(str(message.get('content', ''))) for message in messages or [])
+    return prompt_chars // CHARS_PER_TOKEN + (max_tokens or 0)
+
+
+class LLMUsage:
+    """Token and cost accounting plus local rate limiting for LLM calls.
+
+    Every call reserves an estimate of its tokens from a per-user and a
+    global token bucket, then settles against the usage the provider
+    reports. Totals are aggregated in memory per (hour, route, backend,
+    model, template) and per (day, user) and flushed to `llm_usage` /
+    `llm_user_usage` with $inc bulk writes every `flush_interval` seconds,
+    so accounting adds no Mongo round trip to the call itself. Buckets are per worker process.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.user_tokens_per_minute = 0
+        self.global_tokens_per_minute = 0
+        self.prices = {}
+        self.flush_interval = 10
+        self._lock = threading.Lock()
+        self._user_buckets = {}
+        self._global_bucket = None
+        self._routes = defaultdict(lambda: defaultdict(int))
+        self._users = defaultdict(lambda: defaultdict(int))
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.user_tokens_per_minute = app.config['LLM_USER_TOKENS_PER_MINUTE']
+        self.global_tokens_per_minute = app.config['LLM_GLOBAL_TOKENS_PER_MINUTE']
+        self.prices = app.config['LLM_PRICES']
+        self.flush_interval = app.config['LLM_USAGE_FLUSH_SECONDS']
+        if self.global_tokens_per_minute:
+            self._global_bucket = TokenBucket(self.global_tokens_per_minute)
+        atexit.register(self.flush)
+        from app.services.prompts import describe as describe_prompts
+
+        @app.route('/llm/usage')
+        @metrics_token_required
+        def llm_usage_dashboard():
+            group = request.args.get('group', 'route')
+            if group not in ('route', 'backend', 'model', 'template'):
+                return jsonify({'status': 'error', 'message': 'group must be route, backend, model or template'}), 400
+            hours = min(int(request.args.get('hours', 24)), 24 * 90)
+            self.flush()
+            return jsonify({
+                'status': 'success',
+                'hours': hours,
+                'usage': self.summary(hours, group),
+                'top_users': self.top_users(max(1, hours // 24)),
+                'templates': describe_prompts()
+            })
+
+    def _user_bucket(self, user_id):
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            if len(self._user_buckets) >= MAX_TRACKED_USERS:
+                # Full buckets carry no state worth keeping
+                self._user_buckets = {key: b for key, b in self._user_buckets.items() if not b.full()}
+            bucket = self._user_buckets[user_id] = TokenBucket(self.user_tokens_per_minute)
+        return bucket
+
+    def reserve(self, user_id, tokens):
+        """Take tokens from the user's and the global bucket or raise LLMRateLimited"""
+        with self._lock:
+            user_bucket = self._user_bucket(user_id) if user_id and self.user_tokens_per_minute else None
+            if user_bucket is not None:
+                wait = user_bucket.take(tokens)
+                if wait:
+                    raise LLMRateLimited('per-user', wait)
+            if self._global_bucket is not None:
+                wait = self._global_bucket.take(tokens)
+                if wait:
+                    if user_bucket is not None:
+                        user_bucket.give(tokens)
+                    raise LLMRateLimited('global', wait)
+
+    def settle(self, user_id, reserved, used):
+        """Return the unused part of a reservation once actual usage is known"""
+        unused = reserved - used
+        if unused <= 0:
+            return
+        with self._lock:
+            if user_id and self.user_tokens_per_minute:
+                self._user_bucket(user_id).give(unused)
+            if self._global_bucket is not None:
+                self._global_bucket.give(unused)
+
+    def cost(self, model, prompt_tokens, completion_tokens):
+        """USD for a call, from LLM_PRICES per 1000 tokens keyed by model name"""
+        prompt_price, completion_price = self.prices.get(model, (0, 0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+    def record(self, route, model, user_id, prompt_tokens, completion_tokens, latency_ms,
+               error=False, template=None, cached_tokens=0, backend=None):
+        now = datetime.utcnow()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+
+        with self._lock:
+            self._ensure_flusher()
+            totals = self._routes[(hour, route, backend, model, template or 'untemplated')]
+            totals['calls'] += 1
+            totals['errors'] += 1 if error else 0
+            totals['prompt_tokens'] += prompt_tokens
+            totals['cached_tokens'] += cached_tokens
+            totals['completion_tokens'] += completion_tokens
+            totals['latency_ms'] += latency_ms
+            totals['latency_ms_max'] = max(totals['latency_ms_max'], latency_ms)
+            totals['cost_usd'] += cost
+            if user_id:
+                user_totals = self._users[(day, user_id)]
+                user_totals['calls'] += 1
+                user_totals['tokens'] += prompt_tokens + completion_tokens
+                user_totals['cost_usd'] += cost
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='llm-usage', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            routes, self._routes = self._routes, defaultdict(lambda: defaultdict(int))
+            users, self._users = self._users, defaultdict(lambda: defaultdict(int))
+
+        try:
+            if routes:
+                self.db.llm_usage.bulk_write([
+                    UpdateOne(
+                        {'hour': hour, 'route': route, 'backend': backend, 'model': model, 'template': template},
+                        {
+                            '$inc': {key: value for key, value in totals.items() if key != 'latency_ms_max'},
+                            '$max': {'latency_ms_max': totals['latency_ms_max']}
+                        },
+                        upsert=True
+                    )
+                    for (hour, route, backend, model, template), totals in routes.items()
+                ], ordered=False)
+            if users:
+                self.db.llm_user_usage.bulk_write([
+                    UpdateOne({'day': day, 'user_id': ObjectId(user_id)}, {'$inc': dict(totals)}, upsert=True)
+                    for (day, user_id), totals in users.items()
+                ], ordered=False)
+        except Exception as e:
+            print(f"Error flushing LLM usage: {str(e)}")
+
+    def summary(self, hours=24, group='route'):
+        """Aggregate usage over the last `hours`, most expensive first"""
+        since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+        rows = self.db.llm_usage.aggregate([
+            {'$match': {'hour': {'$gte': since}}},
+            {'$group': {
+                '_id': f'${group}',
+                'calls': {'$sum': '$calls'},
+                'errors': {'$sum': '$errors'},
+                'prompt_tokens': {'$sum': '$prompt_tokens'},
+                'cached_tokens': {'$sum': '$cached_tokens'},
+                'completion_tokens': {'$sum': '$completion_tokens'},
+                'latency_ms': {'$sum': '$latency_ms'},
+                'latency_ms_max': {'$max': '$latency_ms_max'},
+                'cost_usd': {'$sum': '$cost_usd'}
+            }},
+            {'$sort': {'cost_usd': -1, 'latency_ms': -1}}
+        ])
+        summary = []
+        for row in rows:
+            row[group] = row.pop('_id')
+            row['avg_latency_ms'] = round(row['latency_ms'] / row['calls'], 1) if row['calls'] else 0
+            row['cost_usd'] = round(row['cost_usd'], 6)
+            summary.append(row)
+        return summary
+
+    def top_users(self, days=1, limit=20):
+        since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+        return list(self.db.llm_user_usage.aggregate([
+            {'$match': {'day': {'$gte': since}}},
+            {'$group': {
+                '_id': '$user_id',
+                'calls': {'$sum': '$calls'},
+                'tokens': {'$sum': '$tokens'},
+                'cost_usd': {'$sum': '$cost_usd'}
+            }},
+            {'$sort': {'tokens': -1}},
+            {'$limit': limit}
+        ]))
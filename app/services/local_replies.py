@@ -0,0 +1,242 @@
+import math
+import re
+import zlib
+from collections import defaultdict
+from app.services.journal_index import tokenize
+
+# Phrases that always get the crisis reply, whatever else the message says
+CRISIS_PHRASES = (
+    'kill myself', 'killing myself', 'end my life', 'ending my life', 'suicide', 'suicidal',
+    'want to die', 'hurt myself', 'hurting myself', 'self harm', 'self-harm', 'no reason to live'
+)
+CRISIS_REPLY = ("I'm really glad you told me, and I'm concerned about your safety. Please reach out to someone "
+                "right now: call your local emergency number, or a crisis line such as 988 in the US or 116 123 "
+                "(Samaritans) in the UK. You don't have to go through this alone, and a trained person can help "
+                "you through this moment.")
+
+# Topic words mapped to how a reply refers to them
+TOPICS = {
+    'work': ('work', 'job', 'boss', 'office', 'coworker', 'colleague', 'career', 'shift', 'meeting', 'deadline', 'project'),
+    'school': ('school', 'exam', 'exams', 'class', 'homework', 'study', 'studying', 'grade', 'grades', 'teacher', 'college', 'university'),
+    'your family': ('family', 'mom', 'mum', 'dad', 'parent', 'parents', 'brother', 'sister', 'kids', 'children', 'son', 'daughter'),
+    'your relationship': ('partner', 'boyfriend', 'girlfriend', 'husband', 'wife', 'relationship', 'breakup', 'divorce', 'dating'),
+    'your friendships': ('friend', 'friends', 'friendship'),
+    'sleep': ('sleep', 'sleeping', 'insomnia', 'tired', 'exhausted', 'nightmare', 'nightmares'),
+    'your health': ('health', 'sick', 'illness', 'pain', 'doctor', 'hospital', 'diagnosis'),
+    'money': ('money', 'bills', 'debt', 'rent', 'finances', 'afford', 'salary'),
+}
+
+# Curated reply corpus: each intent has cue words, the moods it suits, and
+# replies with and without a {topic} slot
+CORPUS = [
+    {
+        'intent': 'greeting',
+        'cues': 'hello hi hey morning evening afternoon',
+        'moods': (),
+        'replies': [
+            "Hello! I'm glad you're here. How are you feeling today?",
+            "Hi there! I'm here to listen and support you. What's on your mind?",
+        ],
+        'topic_replies': [],
+    },
+    {
+        'intent': 'gratitude',
+        'cues': 'thanks thank appreciate helpful helped',
+        'moods': ('happy',),
+        'replies': [
+            "You're very welcome. I'm glad this helped. Is there anything else you'd like to talk through?",
+            "Thank you for saying that. I'm here whenever you want to check in again.",
+        ],
+        'topic_replies': [],
+    },
+    {
+        'intent': 'sad',
+        'cues': 'sad unhappy depressed down cry crying hopeless empty miserable grief grieving lost hurt heartbroken',
+        'moods': ('sad',),
+        'replies': [
+            "I'm sorry you're feeling this way. It's okay to feel sad, and you don't have to carry it alone. Would you like to tell me more about what's been happening?",
+            "That sounds really heavy. Be gentle with yourself right now; even a short walk, a glass of water or talking to someone you trust can help a little. What's weighing on you most?",
+        ],
+        'topic_replies': [
+            "I'm sorry {topic} has been bringing you down. It makes sense to feel sad about something that matters to you. What part of it feels hardest right now?",
+            "It sounds like {topic} has been really painful lately. Would it help to talk through what happened, one piece at a time?",
+        ],
+    },
+    {
+        'intent': 'anxious',
+        'cues': 'anxious anxiety worried worry worrying nervous panic panicking scared afraid fear uneasy restless',
+        'moods': ('anxious',),
+        'replies': [
+            "Anxiety can feel overwhelming, but it does pass. Let's try a slow breath together: in for 4 seconds, hold for 4, out for 6. What's been making you feel this way?",
+            "It's natural to feel anxious sometimes. Try naming five things you can see around you to ground yourself, then tell me what's on your mind.",
+        ],
+        'topic_replies': [
+            "It sounds like {topic} has been making you anxious. Let's slow it down: what is the one thing about it you're most worried will happen?",
+            "Worrying about {topic} is really common, and it's a sign it matters to you. Try writing down what is in your control and what isn't. Which part would you like to start with?",
+        ],
+    },
+    {
+        'intent': 'stressed',
+        'cues': 'stress stressed overwhelmed pressure busy burnout burned swamped exhausted',
+        'moods': ('anxious', 'sad'),
+        'replies': [
+            "That sounds like a lot to hold at once. Breaking things into small steps can make them feel more manageable. What's the most pressing thing on your plate?",
+            "Feeling overwhelmed is a signal to pause, not a failure. Could you take five minutes for yourself right now, then pick just one small task to start with?",
+        ],
+        'topic_replies': [
+            "It sounds like {topic} is putting a lot of pressure on you. What would make the next day or two feel even a little lighter?",
+            "Stress from {topic} can build up quickly. Let's break it down: what's one small step you could take today?",
+        ],
+    },
+    {
+        'intent': 'angry',
+        'cues': 'angry anger mad furious annoyed irritated frustrated frustrating unfair rage hate',
+        'moods': ('sad', 'anxious'),
+        'replies': [
+            "It's understandable to feel angry, and it's okay to have that feeling. Taking a few slow breaths or stepping away for a moment can help. What happened?",
+            "Frustration often shows us something important to us was crossed. Would you like to talk through what set it off?",
+        ],
+        'topic_replies': [
+            "It sounds like {topic} has left you really frustrated. That's a valid reaction. What do you wish had gone differently?",
+        ],
+    },
+    {
+        'intent': 'lonely',
+        'cues': 'lonely alone isolated nobody ignored excluded miss missing',
+        'moods': ('sad',),
+        'replies': [
+            "Feeling lonely is really hard, and I'm glad you reached out. Is there someone, even one person, you could send a message to today?",
+            "You're not alone in feeling this way, even if it seems like it right now. What kind of connection are you missing most?",
+        ],
+        'topic_replies': [
+            "It sounds like things with {topic} have left you feeling alone. That hurts. Would you like to talk about what's changed?",
+        ],
+    },
+    {
+        'intent': 'sleep',
+        'cues': 'sleep sleeping insomnia awake tired exhausted nightmare nightmares rest bed',
+        'moods': (),
+        'replies': [
+            "Poor sleep makes everything feel harder. A steady bedtime, no screens for the last hour and a short wind-down routine can help. How have your nights been lately?",
+            "Being tired affects how we feel about everything else. What usually keeps you up: racing thoughts, or something else?",
+        ],
+        'topic_replies': [],
+    },
+    {
+        'intent': 'happy',
+        'cues': 'happy joy joyful excited great good amazing wonderful proud grateful glad relieved better',
+        'moods': ('happy',),
+        'replies': [
+            "That's wonderful to hear! What's been bringing you this good feeling?",
+            "I'm really glad you're feeling good. It's worth noticing what helped, so you can come back to it. What went well?",
+        ],
+        'topic_replies': [
+            "That's great news about {topic}! You deserve to enjoy it. What are you most proud of?",
+            "I love hearing that {topic} is going well. How could you build on this momentum?",
+        ],
+    },
+    {
+        'intent': 'goals',
+        'cues': 'goal goals plan plans improve habit habits motivation motivated change start achieve want',
+        'moods': (),
+        'replies': [
+            "Let's make that goal concrete: what would success look like in two weeks, and what's one small step you could take tomorrow?",
+            "Good goals are specific and achievable. Could you describe what you'd like to change, and how you'll know you're making progress?",
+        ],
+        'topic_replies': [
+            "Let's set a goal around {topic}. What's one specific, measurable step you could take this week?",
+        ],
+    },
+]
+
+DEFAULT_REPLIES = [
+    "I'm here to listen and support you. Would you like to tell me more about how you're feeling?",
+    "Thank you for sharing that with me. How has this been affecting you?",
+    "I hear you. What feels most important to talk about right now?",
+]
+DEFAULT_TOPIC_REPLIES = [
+    "It sounds like {topic} has been on your mind. How has it been making you feel?",
+    "Thank you for telling me about {topic}. What would feel most helpful to talk through?",
+]
+
+# Follow-up suggestions matching the counseling session types
+SESSION_TIPS = {
+    'cbt': "If you'd like, try writing down the thought that's bothering you and one piece of evidence for and against it.",
+    'mindfulness': "When you're ready, take a minute to notice your breath and where you feel tension in your body.",
+    'stress': "One small thing that often helps: list what's on your plate and pick the single item that would relieve the most pressure.",
+}
+
+SUFFIX_RE = re.compile(r"(?:ing|ed|ly|ies|es|s)$")
+
+
+def _stem(token):
+    stemmed = SUFFIX_RE.sub('', token)
+    return stemmed if len(stemmed) >= 3 else token
+
+
+class LocalReplyEngine:
+    """Retrieval-based replies from a curated corpus, used when the LLM is unavailable.
+
+    The message is matched to an intent by IDF-weighted overlap with each
+    intent's cue words, plus a bonus when the detected mood fits, and a
+    topic (work, family, sleep...) is picked up from a small lexicon so the
+    reply can refer to it. Choices are deterministic per message, so the
+    same input always gets the same reply and no network or model is needed.
+    """
+
+    def __init__(self, corpus=None, mood_bonus=0.5):
+        self.corpus = corpus or CORPUS
+        self.mood_bonus = mood_bonus
+        self._cues = defaultdict(set)
+        for index, entry in enumerate(self.corpus):
+            for token in tokenize(entry['cues']):
+                self._cues[_stem(token)].add(index)
+        self._idf = {
+            stem: math.log((1 + len(self.corpus)) / (1 + len(indexes))) + 1
+            for stem, indexes in self._cues.items()
+        }
+        self._topics = {word: topic for topic, words in TOPICS.items() for word in words}
+
+    def classify(self, message, mood=None):
+        """Best matching (intent, topic); intent is None when nothing matches"""
+        text = (message or '').lower()
+        tokens = tokenize(text)
+        topic = next((self._topics[token] for token in tokens if token in self._topics), None)
+        if any(phrase in text for phrase in CRISIS_PHRASES):
+            return 'crisis', topic
+
+        scores = defaultdict(float)
+        for stem in {_stem(token) for token in tokens}:
+            for index in self._cues.get(stem, ()):
+                scores[index] += self._idf[stem]
+        for index in list(scores):
+            if mood in self.corpus[index]['moods']:
+                scores[index] += self.mood_bonus
+        if not scores:
+            return None, topic
+        best = max(scores, key=lambda index: (scores[index], -index))
+        return self.corpus[best]['intent'], topic
+
+    def reply(self, message, mood=None, session_type=None):
+        intent, topic = self.classify(message, mood)
+        if intent == 'crisis':
+            return CRISIS_REPLY
+
+        entry = next((e for e in self.corpus if e['intent'] == intent), None)
+        replies, topic_replies = (entry['replies'], entry['topic_replies']) if entry else (DEFAULT_REPLIES, DEFAULT_TOPIC_REPLIES)
+        if topic and topic_replies:
+            replies = topic_replies
+        choice = replies[zlib.crc32((message or '').encode()) % len(replies)].format(topic=topic)
+
+        tip = SESSION_TIPS.get((session_type or '').lower())
+        return f"{choice} {tip}" if tip else choice
+
+
+local_replies = LocalReplyEngine()
+
+
+if __name__ == '__main__':
+    import sys
+    message = ' '.join(sys.argv[1:]) or sys.stdin.read()
+    print(local_replies.classify(message))
+    print(local_replies.reply(message))
@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_request_context, request, Response, abort
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def metrics_token_required(fn):
+    """Guard an operator endpoint with METRICS_TOKEN, given as ?token= or a bearer token.
+
+    Without a token the endpoint is only served in debug or testing mode,
+    since it exposes per-user usage; elsewhere it answers 404.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = os.getenv('METRICS_TOKEN')
+        if not token:
+            if not (current_app.debug or current_app.testing):
+                abort(404)
+        elif request.args.get('token') != token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(403)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Metrics:
+    """In-process request and dependency timing registry.
+
+    Each gunicorn worker keeps its own registry, so /metrics reports the
+    worker that served the scrape; the `pid` label keeps series distinct.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.route_errors = {}
+        self.dependency_seconds = {}
+        self.dependency_calls = {}
+        self.dependency_errors = {}
+        self.dependency_latency = {}
+        self.pools = {}
+
+    def observe_request(self, route, method, status, seconds):
+        key = (route, method)
+        with self.lock:
+            self.routes.setdefault(key, Histogram()).observe(seconds)
+            if status >= 500:
+                self.route_errors[key] = self.route_errors.get(key, 0) + 1
+
+    def observe_dependency(self, dependency, seconds, error=False):
+        with self.lock:
+            self.dependency_seconds[dependency] = self.dependency_seconds.get(dependency, 0.0) + seconds
+            self.dependency_calls[dependency] = self.dependency_calls.get(dependency, 0) + 1
+            self.dependency_latency.setdefault(dependency, Histogram()).observe(seconds)
+            if error:
+                self.dependency_errors[dependency] = self.dependency_errors.get(dependency, 0) + 1
+
+        if has_request_context():
+            timings = g.setdefault('dependency_timings', {})
+            timings[dependency] = timings.get(dependency, 0.0) + seconds
+
+    def observe_pool(self, address, **changes):
+        """Adjust per-pool connection gauges; `max_size` is set, everything else is added"""
+        with self.lock:
+            pool = self.pools.setdefault(address, {
+                'max_size': 0, 'open': 0, 'checked_out': 0, 'checkout_failures': 0
+            })
+            for field, value in changes.items():
+                if field == 'max_size':
+                    pool[field] = value
+                else:
+                    pool[field] = max(0, pool[field] + value)
+
+    @contextmanager
+    def span(self, dependency):
+        """Time a block of work against a named dependency"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.observe_dependency(dependency, time.perf_counter() - start, error)
+
+    def instrument(self, fn, dependency):
+        """Wrap a callable so every call is recorded as a span"""
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.span(dependency):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def render(self):
+        pid = os.getpid()
+        lines = [
+            '# HELP emotio_request_duration_seconds Request latency by route.',
+            '# TYPE emotio_request_duration_seconds histogram'
+        ]
+        with self.lock:
+            for (route, method), histogram in sorted(self.routes.items()):
+                labels = f'route="{_escape(route)}",method="{method}",pid="{pid}"'
+                lines.extend(histogram.render('emotio_request_duration_seconds', labels))
+
+            lines.append('# HELP emotio_request_errors_total Requests that returned a 5xx status.')
+            lines.append('# TYPE emotio_request_errors_total counter')
+            for (route, method), count in sorted(self.route_errors.items()):
+                lines.append(f'emotio_request_errors_total{{route="{_escape(route)}",method="{method}",pid="{pid}"}} {count}')
+
+            lines.append('# HELP emotio_dependency_duration_seconds Time spent in each dependency.')
+            lines.append('# TYPE emotio_dependency_duration_seconds histogram')
+            for dependency, histogram in sorted(self.dependency_latency.items()):
+                labels = f'dependency="{_escape(dependency)}",pid="{pid}"'
+                lines.extend(histogram.render('emotio_dependency_duration_seconds', labels))
+
+            lines.append('# HELP emotio_dependency_errors_total Dependency calls that raised or failed.')
+            lines.append('# TYPE emotio_dependency_errors_total counter')
+            for dependency in sorted(self.dependency_calls):
+                count = self.dependency_errors.get(dependency, 0)
+                lines.append(f'emotio_dependency_errors_total{{dependency="{_escape(dependency)}",pid="{pid}"}} {count}')
+
+            lines.append('# HELP emotio_mongo_pool_connections Connections in each Mongo pool by state.')
+            lines.append('# TYPE emotio_mongo_pool_connections gauge')
+            for address, pool in sorted(self.pools.items()):
+                for state in ('open', 'checked_out', 'max_size'):
+                    lines.append(f'emotio_mongo_pool_connections{{address="{_escape(address)}",state="{state}",pid="{pid}"}} {pool[state]}')
+
+            lines.append('# HELP emotio_mongo_pool_utilization Checked-out connections as a fraction of maxPoolSize.')
+            lines.append('# TYPE emotio_mongo_pool_utilization gauge')
+            for address, pool in sorted(self.pools.items()):
+                utilization = pool['checked_out'] / pool['max_size'] if pool['max_size'] else 0
+                lines.append(f'emotio_mongo_pool_utilization{{address="{_escape(address)}",pid="{pid}"}} {utilization:.4f}')
+
+            lines.append('# HELP emotio_mongo_pool_checkout_failures_total Checkouts that timed out waiting for a connection or failed.')
+            lines.append('# TYPE emotio_mongo_pool_checkout_failures_total counter')
+            for address, pool in sorted(self.pools.items()):
+                lines.append(f'emotio_mongo_pool_checkout_failures_total{{address="{_escape(address)}",pid="{pid}"}} {pool["checkout_failures"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app):
+        """Install request timing hooks, the Server-Timing header and /metrics"""
+        server_timing = os.getenv('METRICS_SERVER_TIMING', 'header')
+
+        @app.before_request
+        def start_request_timer():
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            started = g.pop('request_started', None)
+            if started is None:
+                return response
+            elapsed = time.perf_counter() - started
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            self.observe_request(route, request.method, response.status_code, elapsed)
+
+            if server_timing == 'always' or (server_timing == 'header' and request.headers.get('X-Server-Timing')):
+                parts = [
+                    f'{name};dur={seconds * 1000:.1f}'
+                    for name, seconds in g.get('dependency_timings', {}).items()
+                ]
+                parts.append(f'total;dur={elapsed * 1000:.1f}')
+                response.headers['Server-Timing'] = ', '.join(parts)
+            return response
+
+        @app.route('/metrics')
+        @metrics_token_required
+        def metrics_endpoint():
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Feeds every Mongo command's duration into the metrics registry"""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.registry.observe_dependency('mongo', event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.registry.observe_dependency('mongo', event.duration_micros / 1e6, error=True)
+
+
+class MongoPoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections for the pool utilization gauges"""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    @staticmethod
+    def _address(event):
+        host, port = event.address
+        return f'{host}:{port}'
+
+    def pool_created(self, event):
+        self.registry.observe_pool(self._address(event), max_size=event.options.get('maxPoolSize', 100))
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.registry.observe_pool(self._address(event), open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.registry.observe_pool(self._address(event), open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.registry.observe_pool(self._address(event), checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self.registry.observe_pool(self._address(event), checked_out=1)
+
+    def connection_checked_in(self, event):
+        self.registry.observe_pool(self._address(event), checked_out=-1)
+
+
+metrics = Metrics()
@@ -0,0 +1,254 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.models.mood import mood_codes
+
+# Bumped whenever the stored bucket layout changes so users get rebuilt
+# (2: buckets belong to a generation)
+SERIES_VERSION = 2
+
+BUCKET_SIZE = 1000
+# Check-ins a rebuild reads per pass when catching up with ones tracked during it
+CATCH_UP_LIMIT = 10000
+EPOCH = datetime(1970, 1, 1)
+MS_PER_HOUR = 3600 * 1000
+MS_PER_DAY = 24 * MS_PER_HOUR
+
+# Millisecond timestamps (int64, ascending) and mood codes (int8)
+Series = namedtuple('Series', ['timestamps', 'moods'])
+
+
+def to_ms(timestamp):
+    return (timestamp - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_ms(ms):
+    return EPOCH + timedelta(milliseconds=int(ms))
+
+
+def _empty():
+    return Series(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8))
+
+
+class MoodSeries:
+    """Columnar per-user copy of the mood check-ins in `users.mood_history`.
+
+    Events are appended to an open `mood_series` bucket as parallel
+    arrays of millisecond timestamps and mood codes. Once a bucket holds
+    `bucket_size` events it is sealed: both arrays are packed into binary
+    columns (8 bytes and 1 byte per event) that the reader hands to NumPy
+    without decoding a BSON value per event. Buckets carry their time
+    range, so a long-range query reads only the buckets it overlaps.
+    `mood_history` stays the record of truth; users are backfilled from it
+    on first read and `python -m app.services.mood_series` rebuilds everyone.
+
+    Buckets belong to a generation, and only the user's live generation
+    (`users.mood_series_gen`) is read. A rebuild writes a new generation
+    beside the live one and swaps it in, so check-ins tracked meanwhile
+    are neither lost nor counted twice; see `record` and `rebuild`.
+    """
+
+    def __init__(self, db, bucket_size=BUCKET_SIZE):
+        self.db = db
+        self.bucket_size = bucket_size
+
+    @property
+    def buckets(self):
+        return self.db.mood_series
+
+    def _bucket_doc(self, user_id, timestamps, moods, sealed, gen=None):
+        return {
+            'user_id': ObjectId(user_id),
+            'gen': gen,
+            'sealed': sealed,
+            'count': len(timestamps),
+            'start': from_ms(timestamps.min()),
+            'end': from_ms(timestamps.max()),
+            'ts': timestamps.astype('<i8').tobytes() if sealed else timestamps.tolist(),
+            'moods': moods.astype(np.int8).tobytes() if sealed else moods.tolist()
+        }
+
+    def record(self, user_id, entry):
+        """Push a check-in onto mood_history and append it to the live series.
+        The push also reads the series state, so a check-in tracked while a
+        rebuild runs is left to that rebuild, which catches up from mood_history."""
+        user = self.db.users.find_one_and_update(
+            {'_id': ObjectId(user_id)},
+            {'$push': {'mood_history': entry}},
+            projection={'mood_series_gen': 1, 'mood_series_rebuild': 1}
+        )
+        if user and user.get('mood_series_gen') and not user.get('mood_series_rebuild'):
+            self.append(user_id, entry['mood'], entry['timestamp'], user['mood_series_gen'])
+
+    def append(self, user_id, mood, timestamp, gen):
+        """Add one check-in to the generation's open bucket, sealing it when full"""
+        timestamp = from_ms(to_ms(timestamp))
+        bucket = self.buckets.find_one_and_update(
+            {'user_id': ObjectId(user_id), 'gen': gen, 'sealed': False, 'count': {'$lt': self.bucket_size}},
+            {
+                '$push': {'ts': to_ms(timestamp), 'moods': int(mood_codes([mood])[0])},
+                '$inc': {'count': 1},
+                '$min': {'start': timestamp},
+                '$max': {'end': timestamp}
+            },
+            projection={'count': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket['count'] >= self.bucket_size:
+            self._seal(bucket['_id'])
+
+    def _seal(self, bucket_id):
+        bucket = self.buckets.find_one({'_id': bucket_id, 'sealed': False})
+        if bucket is None:
+            return
+        timestamps, moods = self._columns(bucket)
+        order = np.argsort(timestamps, kind='stable')
+        doc = self._bucket_doc(bucket['user_id'], timestamps[order], moods[order], sealed=True, gen=bucket.get('gen'))
+        self.buckets.update_one({'_id': bucket_id, 'sealed': False}, {'$set': doc})
+
+    @staticmethod
+    def _columns(bucket):
+        if bucket['sealed']:
+            return np.frombuffer(bucket['ts'], dtype='<i8'), np.frombuffer(bucket['moods'], dtype=np.int8)
+        return np.array(bucket['ts'], dtype=np.int64), np.array(bucket['moods'], dtype=np.int8)
+
+    @staticmethod
+    def _combine(columns):
+        if not columns:
+            return _empty()
+        timestamps = np.concatenate([ts for ts, _ in columns])
+        moods = np.concatenate([codes for _, codes in columns])
+        order = np.argsort(timestamps, kind='stable')
+        return Series(timestamps[order], moods[order])
+
+    def read(self, user_id, start=None, end=None):
+        """Check-ins with start <= timestamp < end, oldest first"""
+        query = {'user_id': ObjectId(user_id), 'gen': self.ensure_built(user_id)}
+        if start is not None:
+            query['end'] = {'$gte': start}
+        if end is not None:
+            query['start'] = {'$lt': end}
+        series = self._combine([
+            self._columns(bucket)
+            for bucket in self.buckets.find(query, {'sealed': 1, 'ts': 1, 'moods': 1})
+        ])
+        keep = np.ones(len(series.timestamps), dtype=bool)
+        if start is not None:
+            keep &= series.timestamps >= to_ms(start)
+        if end is not None:
+            keep &= series.timestamps < to_ms(end)
+        return series if keep.all() else Series(series.timestamps[keep], series.moods[keep])
+
+    def iter_chunks(self, user_id, start=None):
+        """Check-ins from `start` on, one bucket at a time, newest bucket first.
+        Buckets cover disjoint time ranges, as appends arrive in time order."""
+        query = {'user_id': ObjectId(user_id), 'gen': self.ensure_built(user_id)}
+        if start is not None:
+            query['end'] = {'$gte': start}
+        for bucket in self.buckets.find(query, {'sealed': 1, 'ts': 1, 'moods': 1}).sort('end', -1).batch_size(4):
+            series = self._combine([self._columns(bucket)])
+            if start is not None:
+                keep = series.timestamps >= to_ms(start)
+                series = Series(series.timestamps[keep], series.moods[keep])
+            yield series
+
+    def recent(self, user_id, count):
+        """The latest `count` check-ins, oldest first"""
+        columns, total = [], 0
+        for bucket in self.buckets.find(
+            {'user_id': ObjectId(user_id), 'gen': self.ensure_built(user_id)},
+            {'sealed': 1, 'ts': 1, 'moods': 1}
+        ).sort('end', -1):
+            columns.append(self._columns(bucket))
+            total += len(columns[-1][0])
+            if total >= count:
+                break
+        series = self._combine(columns)
+        return Series(series.timestamps[-count:], series.moods[-count:])
+
+    def rebuild(self, user_id):
+        """Re-derive a user's buckets from mood_history as a new generation and make it live.
+
+        The user is marked as rebuilding in the same update that snapshots
+        mood_history, so `record` stops appending from then on. Check-ins
+        pushed after the snapshot are caught up, and the new generation goes
+        live only in an update that finds none newer. Appends that were
+        already in flight land in the old generation, which is then deleted.
+        If another rebuild of the user starts meanwhile, it takes over."""
+        uid = ObjectId(user_id)
+        token, gen = ObjectId(), ObjectId()
+        user = self.db.users.find_one_and_update(
+            {'_id': uid},
+            {'$set': {'mood_series_rebuild': token}, '$unset': {'mood_series_version': ''}},
+            projection={'mood_history.mood': 1, 'mood_history.timestamp': 1}
+        )
+        if user is None:
+            return 0
+        history = user.get('mood_history', [])
+        series = self._combine([(
+            np.array([to_ms(m['timestamp']) for m in history], dtype=np.int64),
+            mood_codes([m.get('mood') for m in history])
+        )]) if history else _empty()
+
+        docs = [
+            self._bucket_doc(
+                uid,
+                series.timestamps[start:start + self.bucket_size],
+                series.moods[start:start + self.bucket_size],
+                sealed=start + self.bucket_size <= len(series.timestamps),
+                gen=gen
+            )
+            for start in range(0, len(series.timestamps), self.bucket_size)
+        ]
+        if docs:
+            self.buckets.insert_many(docs, ordered=False)
+
+        seen = len(history)
+        while True:
+            newer = (self.db.users.find_one(
+                {'_id': uid, 'mood_series_rebuild': token},
+                {'mood_history': {'$slice': [seen, CATCH_UP_LIMIT]}}
+            ) or {}).get('mood_history')
+            if newer is None:
+                # Another rebuild took over; its generation replaces this one
+                self.buckets.delete_many({'user_id': uid, 'gen': gen})
+                return seen
+            for entry in newer:
+                self.append(uid, entry.get('mood'), entry['timestamp'], gen)
+            seen += len(newer)
+            live = self.db.users.update_one(
+                {'_id': uid, 'mood_series_rebuild': token, f'mood_history.{seen}': {'$exists': False}},
+                {
+                    '$set': {'mood_series_version': SERIES_VERSION, 'mood_series_gen': gen},
+                    '$unset': {'mood_series_rebuild': ''}
+                }
+            )
+            if live.modified_count:
+                break
+        self.buckets.delete_many({'user_id': uid, 'gen': {'$ne': gen}})
+        return seen
+
+    def ensure_built(self, user_id):
+        """The user's live generation, backfilling the series for users whose check-ins predate it"""
+        fields = {'mood_series_version': 1, 'mood_series_gen': 1}
+        user = self.db.users.find_one({'_id': ObjectId(user_id)}, fields) or {}
+        if user.get('mood_series_version') != SERIES_VERSION:
+            self.rebuild(user_id)
+            user = self.db.users.find_one({'_id': ObjectId(user_id)}, fields) or {}
+        return user.get('mood_series_gen')
+
+    def rebuild_all(self):
+        """Rebuild every user's series; returns how many events were written"""
+        return sum(self.rebuild(user['_id']) for user in self.db.users.find({}, {'_id': 1}))
+
+
+if __name__ == '__main__':
+    from app.database import connect_from_config
+    database = connect_from_config()
+    try:
+        print(f"Rebuilt mood series, {MoodSeries(database).rebuild_all()} events")
+    finally:
+        database.close()
@@ -0,0 +1,244 @@
+"""Single-pass mood statistics for /insights-data.
+
+`MoodStats` takes a user's moods as chunks of (millisecond timestamps,
+mood codes), each chunk ascending and every chunk older than the ones
+before it, and keeps only fixed-size accumulators: Welford mean and
+variance, per-day, per-hour and per-weekday sums, transition and mood
+counts, and the open weekly window. A year of check-ins can then be
+streamed from cursors a bucket at a time instead of loaded whole; for
+short histories the route passes everything as one chunk.
+"""
+import numpy as np
+from app.models.mood import CODE_LABELS, SCORES, mood_codes
+from app.services.mood_series import MS_PER_DAY, MS_PER_HOUR, to_ms, from_ms
+
+STREAM_CHUNK_SIZE = 1000
+
+TIME_SLOTS = {
+    'Morning': (6, 12),
+    'Afternoon': (12, 18),
+    'Evening': (18, 22),
+    'Night': (22, 6)
+}
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+_CODES = len(CODE_LABELS)
+
+
+class MoodStats:
+    def __init__(self, period, now):
+        self.period = period
+        self.now = now
+        self.today = to_ms(now) // MS_PER_DAY
+        self.total = 0
+        # Welford running mean and sum of squared deviations
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.day_sums, self.day_counts = np.zeros(7), np.zeros(7, dtype=np.int64)
+        self.hour_sums, self.hour_counts = np.zeros(24), np.zeros(24, dtype=np.int64)
+        self.weekday_sums, self.weekday_counts = np.zeros(7), np.zeros(7, dtype=np.int64)
+        # Counts and the oldest position seen (counted from the newest mood) per mood and per transition
+        self.mood_counts, self.mood_seen = np.zeros(_CODES, dtype=np.int64), np.full(_CODES, -1)
+        self.pair_counts, self.pair_seen = np.zeros(_CODES * _CODES, dtype=np.int64), np.full(_CODES * _CODES, -1)
+        self.newer_code = None
+        # Weekly windows walking back from the latest mood, newest first
+        self.windows, self.window_labels = [], []
+        self.anchor, self.window_sum, self.window_count = None, 0.0, 0
+
+    def add(self, timestamps, codes):
+        """Fold in one chunk, ascending, older than every chunk added so far"""
+        count = len(timestamps)
+        if not count:
+            return
+        values = SCORES[codes]
+        offset = self.total
+
+        chunk_mean = values.mean()
+        delta = chunk_mean - self.mean
+        self.total += count
+        self.mean += delta * count / self.total
+        self.m2 += ((values - chunk_mean) ** 2).sum() + delta * delta * offset * count / self.total
+
+        epoch_days = timestamps // MS_PER_DAY
+        days_ago = self.today - epoch_days
+        recent = (days_ago >= 0) & (days_ago < 7)
+        self.day_sums += np.bincount(days_ago[recent], values[recent], minlength=7)
+        self.day_counts += np.bincount(days_ago[recent], minlength=7)
+        hours = timestamps // MS_PER_HOUR % 24
+        self.hour_sums += np.bincount(hours, values, minlength=24)
+        self.hour_counts += np.bincount(hours, minlength=24)
+        weekdays = (epoch_days + 3) % 7  # 1970-01-01 was a Thursday
+        self.weekday_sums += np.bincount(weekdays, values, minlength=7)
+        self.weekday_counts += np.bincount(weekdays, minlength=7)
+
+        # Position of each mood counted from the newest, so the oldest occurrence has the largest
+        positions = offset + count - 1 - np.arange(count)
+        self.mood_counts += np.bincount(codes, minlength=_CODES)
+        present, first = np.unique(codes, return_index=True)
+        self.mood_seen[present] = positions[first]
+
+        # Transitions inside the chunk and into the oldest mood of the previous chunk
+        sequence = codes.astype(np.int64)
+        if self.newer_code is not None:
+            sequence = np.append(sequence, self.newer_code)
+        changed = sequence[1:] != sequence[:-1]
+        pairs = (sequence[:-1] * _CODES + sequence[1:])[changed]
+        self.pair_counts += np.bincount(pairs, minlength=_CODES * _CODES)
+        present, first = np.unique(pairs, return_index=True)
+        self.pair_seen[present] = positions[:len(changed)][changed][first]
+        self.newer_code = int(codes[0])
+
+        if self.period != 'week':
+            self._add_windows(timestamps, values)
+
+    def _add_windows(self, timestamps, values):
+        end = len(timestamps)
+        while end:
+            if self.anchor is None:
+                self.anchor = timestamps[end - 1]
+            start = np.searchsorted(timestamps[:end], self.anchor - 7 * MS_PER_DAY, side='right')
+            self.window_sum += values[start:end].sum()
+            self.window_count += end - start
+            if not start:
+                break  # the window may continue into the next chunk
+            self._close_window()
+            end = start
+
+    def _close_window(self):
+        self.windows.append(self.window_sum / self.window_count)
+        self.window_labels.append(from_ms(self.anchor).strftime('%b %d'))
+        self.anchor, self.window_sum, self.window_count = None, 0.0, 0
+
+    @staticmethod
+    def _means(sums, counts, default=3):
+        return [sums[i] / counts[i] if counts[i] else default for i in range(len(counts))]
+
+    def mood_series(self):
+        """Chart data and labels: daily for a week, else weekly walking back from the latest mood"""
+        if self.period == 'week':
+            labels = [from_ms(to_ms(self.now) - i * MS_PER_DAY).strftime('%a') for i in range(7)]
+            return self._means(self.day_sums, self.day_counts)[::-1], labels[::-1]
+        if self.window_count:
+            self._close_window()
+        return self.windows, self.window_labels
+
+    def time_of_day(self):
+        """Average mood per time slot and the best slot"""
+        time_data = []
+        for start, end in TIME_SLOTS.values():
+            if start > end:  # Night slot
+                slot = np.r_[start:24, 0:end]
+            else:
+                slot = np.r_[start:end]
+            count = self.hour_counts[slot].sum()
+            time_data.append(self.hour_sums[slot].sum() / count if count else 3)
+        return time_data, list(TIME_SLOTS)[int(np.argmax(time_data))]
+
+    def triggers(self):
+        if self.total < 2:
+            return "Not enough data"
+        present = np.flatnonzero(self.pair_counts)
+        if not len(present):
+            return "Not enough data"
+        # Most frequent first, ties in order of first appearance
+        order = np.lexsort((-self.pair_seen[present], -self.pair_counts[present]))
+        triggers = []
+        for pair in present[order][:2]:
+            if self.pair_counts[pair] > 1:
+                prev_mood, curr_mood = divmod(int(pair), _CODES)
+                triggers.append(f"{CODE_LABELS[prev_mood]} → {CODE_LABELS[curr_mood]} ({self.pair_counts[pair]} times)")
+        return ", ".join(triggers) if triggers else "No clear patterns"
+
+    def weekly_pattern(self):
+        if self.total < 2:
+            return "Not enough data"
+        day_avg_moods = {
+            day: self.weekday_sums[day] / self.weekday_counts[day]
+            for day in range(7) if self.weekday_counts[day]
+        }
+        # Sort days by average mood score
+        sorted_days = sorted(day_avg_moods.items(), key=lambda x: x[1])
+        worst_day = sorted_days[0]
+        best_day = sorted_days[-1]
+        if worst_day[0] == best_day[0]:
+            return "Mood remains consistent"
+        return f"Best on {WEEKDAYS[best_day[0]]}, Challenging on {WEEKDAYS[worst_day[0]]}"
+
+    def insights(self):
+        if self.total < 2:
+            return "Not enough data"
+        stability = "stable" if np.sqrt(self.m2 / self.total) < 1 else "variable"
+
+        # Mood distribution, in order of first appearance
+        present = np.flatnonzero(self.mood_counts)
+        present = present[np.argsort(-self.mood_seen[present], kind='stable')]
+        counts = self.mood_counts[present]
+        most_common_mood = CODE_LABELS[present[np.argmax(counts)]]
+        mood_distribution = ', '.join(
+            f"{CODE_LABELS[code]}: {count / self.total * 100:.1f}%" for code, count in zip(present, counts)
+        )
+
+        if self.period == 'week':
+            return f"Your mood has been {stability} this week, with {most_common_mood} being the most common mood. Mood distribution: {mood_distribution}"
+        elif self.period == 'month':
+            return f"Over the past month, your mood has been {stability}, with {most_common_mood} being the most common mood. Mood distribution: {mood_distribution}"
+        return f"Looking at the past year, your mood has been {stability}, with {most_common_mood} being the most common mood. Mood distribution: {mood_distribution}"
+
+
+def chunked(records, size=STREAM_CHUNK_SIZE):
+    """Group {'timestamp', 'mood'} records, newest first, into ascending (timestamps, codes) chunks"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield _chunk(batch)
+            batch = []
+    if batch:
+        yield _chunk(batch)
+
+
+def _chunk(batch):
+    batch.reverse()
+    return (
+        np.array([to_ms(record['timestamp']) for record in batch], dtype=np.int64),
+        mood_codes([record['mood'] for record in batch])
+    )
+
+
+def merge_newest_first(*sources):
+    """Merge sources of ascending (timestamps, codes) chunks, each source newest chunk first,
+    into chunks of the same shape. Holds about two chunks per source; on equal timestamps
+    earlier sources sort first."""
+    iterators = [iter(source) for source in sources]
+    buffers = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)) for _ in iterators]
+    live = [True] * len(iterators)
+
+    def refill(i):
+        # Older chunks go in front; empty chunks are skipped so every live buffer has a bound
+        for timestamps, codes in iterators[i]:
+            if len(timestamps):
+                buffers[i] = (np.concatenate([timestamps, buffers[i][0]]), np.concatenate([codes, buffers[i][1]]))
+                return
+        live[i] = False
+
+    for i in range(len(iterators)):
+        refill(i)
+    while True:
+        # Nothing still to come from a source is newer than its oldest buffered mood
+        bounds = [buffers[i][0][0] if live[i] else None for i in range(len(buffers))]
+        threshold = max((bound for bound in bounds if bound is not None), default=None)
+        timestamps, codes = [], []
+        for i, (buffered_timestamps, buffered_codes) in enumerate(buffers):
+            split = 0 if threshold is None else np.searchsorted(buffered_timestamps, threshold, side='right')
+            timestamps.append(buffered_timestamps[split:])
+            codes.append(buffered_codes[split:])
+            buffers[i] = (buffered_timestamps[:split], buffered_codes[:split])
+        timestamps, codes = np.concatenate(timestamps), np.concatenate(codes)
+        if len(timestamps):
+            order = np.argsort(timestamps, kind='stable')
+            yield timestamps[order], codes[order]
+        if threshold is None:
+            return
+        for i, bound in enumerate(bounds):
+            if bound == threshold:
+                refill(i)
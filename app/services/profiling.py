@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import g, request, jsonify, Response, abort
+
+MAX_STACK_LINES = 5000
+PROFILE_STORE_BYTES = 64 * 1024 * 1024
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format, one 'frame;frame;frame count' per line"""
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common(MAX_STACK_LINES))
+
+
+class RequestProfiler:
+    """Opt-in per-request stack sampling.
+
+    A request is profiled when it wins the PROFILE_SAMPLE_RATE lottery or
+    carries a valid X-Profile-Token, an HMAC of its expiry time signed with
+    PROFILE_SECRET. Profiles land in the `request_profiles` collection.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.secret = os.getenv('PROFILE_SECRET')
+        self.interval = float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000
+
+    @staticmethod
+    def sign(secret, expires):
+        return hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+
+    def make_token(self, ttl=600):
+        """Build a debug header value; run from a shell with PROFILE_SECRET set"""
+        expires = int(time.time()) + ttl
+        return f'{expires}:{self.sign(self.secret, expires)}'
+
+    def _token_valid(self, token):
+        if not self.secret or not token or ':' not in token:
+            return False
+        expires, signature = token.split(':', 1)
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, self.sign(self.secret, expires))
+
+    def _authorized(self):
+        return self._token_valid(request.headers.get('X-Profile-Token'))
+
+    def _should_profile(self):
+        if request.path.startswith('/debug/profiles') or request.path == '/metrics':
+            return False
+        if self._authorized():
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @staticmethod
+    def note_history_size(size):
+        """Routes call this with the number of history records they loaded"""
+        g.profile_history_size = size
+
+    def init_app(self, app):
+        @app.before_request
+        def start_profile():
+            if not self._should_profile():
+                return
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            g.profile_sampler = sampler
+            g.profile_started = time.perf_counter()
+            sampler.start()
+
+        @app.after_request
+        def finish_profile(response):
+            sampler = g.pop('profile_sampler', None)
+            if sampler is None:
+                return response
+            sampler.stop()
+            duration = time.perf_counter() - g.pop('profile_started')
+            try:
+                self.db.request_profiles.insert_one({
+                    'route': request.url_rule.rule if request.url_rule else request.path,
+                    'method': request.method,
+                    'status': response.status_code,
+                    'duration_ms': round(duration * 1000, 2),
+                    'history_size': g.get('profile_history_size'),
+                    'samples': sampler.samples,
+                    'interval_ms': self.interval * 1000,
+                    'collapsed': sampler.collapsed(),
+                    'created_at': datetime.utcnow()
+                })
+            except Exception as e:
+                print(f"Error storing request profile: {str(e)}")
+            return response
+
+        @app.route('/debug/profiles')
+        def list_profiles():
+            if not self._authorized():
+                abort(403)
+            query = {'route': request.args['route']} if request.args.get('route') else {}
+            profiles = list(self.db.request_profiles.find(query, {'collapsed': 0}).sort('$natural', -1).limit(50))
+            return jsonify({'status': 'success', 'profiles': profiles})
+
+        @app.route('/debug/profiles/<profile_id>')
+        def get_profile(profile_id):
+            if not self._authorized():
+                abort(403)
+            try:
+                profile = self.db.request_profiles.find_one({'_id': ObjectId(profile_id)})
+            except InvalidId:
+                profile = None
+            if not profile:
+                abort(404)
+            return Response(profile['collapsed'] + '\n', mimetype='text/plain')
+
+
+if __name__ == '__main__':
+    print(RequestProfiler().make_token(int(sys.argv[1]) if len(sys.argv) > 1 else 600))
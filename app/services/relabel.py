@@ -0,0 +1,211 @@
+"""Label stored journal entries and chat messages with the emotion classifier.
+
+Records are streamed from Mongo in chunks and classified by a pool of
+worker processes, each loading the model once. Within a chunk, texts
+are sorted by length before they are split into padded batches, so
+batches pad to similar lengths. Each record gets a
+`classifier: {emotion, confidence, model}` subdocument, written back
+with one bulk write per chunk. The emotion is a mood code, as elsewhere.
+
+A run labels only records with no label from this model, so re-running
+it is safe; journal edits drop an entry's label so it is redone. The
+`_id` reached in each source is checkpointed after every chunk, so an
+interrupted run resumes where it stopped. Labelling with another model
+(`--model`) loads that model and starts over.
+
+    python -m app.services.relabel --workers 8
+    python -m app.services.relabel --sources chat --batch-size 128
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+from pymongo import UpdateOne
+from app.models.mood import encode_mood
+from app.services.emotion import EMOTION_MODEL, get_emotion_classifier
+
+CHUNK_SIZE = 512
+BATCH_SIZE = 64
+
+# source -> (collection, array field or None, text field)
+SOURCES = {
+    'journal': ('users', 'journal_entries', 'content'),
+    'journal_entries': ('journal_entries', None, 'content'),
+    'chat': ('chat_messages', None, 'message'),
+}
+
+
+def _init_worker(threads, model):
+    """Load the model once per worker, with its own share of the cores"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    get_emotion_classifier(model)
+
+
+def classify(texts, batch_size=BATCH_SIZE, model=EMOTION_MODEL):
+    """[(mood code, confidence)] for texts, in order; returns (labels, seconds)"""
+    started = time.perf_counter()
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    results = get_emotion_classifier(model)([texts[i] for i in order], batch_size=batch_size, truncation=True)
+    labels = [None] * len(texts)
+    for i, result in zip(order, results):
+        labels[i] = (encode_mood(result['label'].lower()), round(float(result['score']), 4))
+    return labels, time.perf_counter() - started
+
+
+class Relabeler:
+    def __init__(self, db, model=EMOTION_MODEL, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+        self.db = db
+        self.model = model
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+
+    def _checkpoint_id(self, source):
+        return f'{self.model}:{source}'
+
+    def pending(self, source):
+        """Records still to label, in _id order from the checkpoint: (key, text) chunks.
+        Keys are the record _id, or (user _id, entry _id) for embedded entries."""
+        collection, array, field = SOURCES[source]
+        checkpoint = self.db.relabel_checkpoints.find_one({'_id': self._checkpoint_id(source)}) or {}
+        # $gte: a user's entries may span two chunks; labelled ones are filtered out below
+        query = {'_id': {'$gte': checkpoint['last_id']}} if checkpoint.get('last_id') else {}
+        unlabelled = {'classifier.model': {'$ne': self.model}}
+        if array:
+            query[array] = {'$elemMatch': unlabelled}
+            fields = {f'{array}._id': 1, f'{array}.{field}': 1, f'{array}.classifier.model': 1}
+        else:
+            query.update(unlabelled)
+            fields = {field: 1}
+
+        chunk = []
+        for doc in self.db[collection].find(query, fields).sort('_id', 1).batch_size(self.chunk_size):
+            if array:
+                records = [
+                    ((doc['_id'], item['_id']), item.get(field))
+                    for item in doc.get(array, [])
+                    if item.get('classifier', {}).get('model') != self.model
+                ]
+            else:
+                records = [(doc['_id'], doc.get(field))]
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _updates(self, source, chunk, labels):
+        _, array, _ = SOURCES[source]
+        now = datetime.utcnow()
+        updates = []
+        for (key, _), label in zip(chunk, labels):
+            emotion, confidence = label or (None, None)
+            classifier = {'emotion': emotion, 'confidence': confidence, 'model': self.model, 'labelled_at': now}
+            if array:
+                user_id, entry_id = key
+                updates.append(UpdateOne(
+                    {'_id': user_id, f'{array}._id': entry_id},
+                    {'$set': {f'{array}.$.classifier': classifier}}
+                ))
+            else:
+                updates.append(UpdateOne({'_id': key}, {'$set': {'classifier': classifier}}))
+        return updates
+
+    def _submit(self, pool, chunk):
+        # Empty or missing text gets no label, but is marked so it is not retried
+        texts = [(i, text) for i, (_, text) in enumerate(chunk) if isinstance(text, str) and text.strip()]
+        if pool is None:
+            future = Future()
+            future.set_result(classify([text for _, text in texts], self.batch_size, self.model))
+        else:
+            future = pool.submit(classify, [text for _, text in texts], self.batch_size, self.model)
+        return [i for i, _ in texts], future
+
+    def _write(self, source, chunk, indexes, future):
+        labels, seconds = future.result()
+        chunk_labels = [None] * len(chunk)
+        for i, label in zip(indexes, labels):
+            chunk_labels[i] = label
+        self.db[SOURCES[source][0]].bulk_write(self._updates(source, chunk, chunk_labels), ordered=False)
+        last_key = chunk[-1][0]
+        self.db.relabel_checkpoints.update_one(
+            {'_id': self._checkpoint_id(source)},
+            {'$set': {'last_id': last_key[0] if isinstance(last_key, tuple) else last_key, 'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+        return len(chunk), seconds
+
+    def run(self, sources=tuple(SOURCES), workers=1):
+        """Label every pending record; returns per-source throughput"""
+        report = {}
+        pool = None
+        if workers > 1:
+            threads = max(1, (os.cpu_count() or workers) // workers)
+            # spawn, so no worker inherits the parent's client
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(threads, self.model))
+        try:
+            for source in sources:
+                started = time.perf_counter()
+                records, busy = 0, 0.0
+                # Chunks are written in order, so the checkpoint never passes an unwritten chunk
+                in_flight = deque()
+                for chunk in self.pending(source):
+                    in_flight.append((chunk,) + self._submit(pool, chunk))
+                    if len(in_flight) > 2 * max(workers, 1):
+                        done, seconds = self._write(source, *in_flight.popleft())
+                        records, busy = records + done, busy + seconds
+                while in_flight:
+                    done, seconds = self._write(source, *in_flight.popleft())
+                    records, busy = records + done, busy + seconds
+                # Finished: the next run scans from the start for records edited since
+                self.db.relabel_checkpoints.delete_one({'_id': self._checkpoint_id(source)})
+                elapsed = time.perf_counter() - started
+                report[source] = {
+                    'records': records,
+                    'seconds': round(elapsed, 2),
+                    'per_second': round(records / elapsed, 1) if records else 0,
+                    'per_second_per_core': round(records / busy, 1) if busy else 0
+                }
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Label journal entries and chat messages with the emotion classifier')
+    parser.add_argument('--sources', default=','.join(SOURCES), help=f"comma-separated, from {', '.join(SOURCES)}")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='records per task and bulk write')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='texts per padded classifier batch')
+    parser.add_argument('--model', default=EMOTION_MODEL, help='Hugging Face emotion model to label with; records labelled by another model are redone')
+    args = parser.parse_args(argv)
+
+    sources = [source.strip() for source in args.sources.split(',') if source.strip()]
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(sorted(unknown))}")
+
+    from app.database import connect_from_config
+    database = connect_from_config()
+    try:
+        relabeler = Relabeler(database, args.model, args.chunk_size, args.batch_size)
+        print(json.dumps(relabeler.run(sources, args.workers), indent=2))
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import re
+import threading
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import ABBREVIATIONS, EMOTICONS, PUNCTUATION, RE_EMOTICONS
+
+NEGATIONS = frozenset(('no', 'not', "n't", 'never'))
+SARCASM = frozenset(('(!)', '( !)', '(! )', '( ! )'))
+# TextBlob only matches emoticons that are not plain words
+EMOTICON_POLARITY = {
+    emoticon.lower(): polarity
+    for (_, polarity), emoticons in EMOTICONS.items() for emoticon in emoticons
+    if not emoticon.isalpha() and len(emoticon) <= 5
+}
+# Quotes and apostrophes always stand alone; other punctuation is split off the ends of words
+QUOTES = re.escape('\'"\u2018\u2019\u201c\u201d')
+EDGE = re.escape(PUNCTUATION) + QUOTES
+
+# Abbreviations keep their period ("e.g.", "Mr."), with TextBlob's case-sensitive rules
+ABBREVIATION = r'(?:%s|(?:[A-Za-z]\.)+|[A-Z][bcdfghjklmnpqrstvwxz]+\.)(?![^\s%s])' % (
+    '|'.join(re.escape(a) for a in sorted(ABBREVIATIONS, key=len, reverse=True)), re.escape(PUNCTUATION))
+
+# TextBlob re-joins emoticons split by its tokenizer ("this: (" reads as ":("),
+# so they are matched with its own pattern, optional spaces included
+EMOTICON = r'(?:(?<![A-Za-z0-9])|(?![A-Za-z0-9]))(?:%s)(?:(?<![A-Za-z0-9])|(?=[%s]*(?:\s|$)))' % (
+    RE_EMOTICONS.pattern[1:RE_EMOTICONS.pattern.rindex(')(')], re.escape(PUNCTUATION))
+
+# One pass over the text: emoticons, sarcasm "(!)", ellipses, abbreviations,
+# words (interior punctuation kept) and any other single character
+TOKEN_RE = re.compile(
+    r'%s|\( ?! ?\)|\.\.\.|%s|[^\s%s](?:[^\s%s]*[^\s%s])?|\S' % (EMOTICON, ABBREVIATION, EDGE, QUOTES, EDGE)
+)
+
+
+class LexiconSentiment:
+    """TextBlob's pattern sentiment algorithm over a precompiled word table.
+
+    TextBlob re-tokenizes into sentence strings, looks every word up
+    through a lazily loaded dict of per-part-of-speech senses and builds a
+    dict per assessment. Here the lexicon is flattened once into
+    word -> (polarity, subjectivity, intensity, is_adverb), tokens come
+    from one regex pass, and the negation, modifier and exclamation rules
+    are applied to running sums, so a call allocates nothing but its result.
+    Scores match TextBlob to within `python -m app.services.sentiment`'s
+    reported tolerance; the tokenizer differs only on rare punctuation.
+    """
+
+    def __init__(self):
+        self._table = None
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = {
+                        word: tuple(senses[None]) + ('RB' in senses,)
+                        for word, senses in pattern_sentiment.items()
+                    }
+        return self._table
+
+    def __call__(self, text):
+        """(polarity, subjectivity) of `text`, as TextBlob(text).sentiment"""
+        table = self.table
+        count = 0
+        polarity_sum = subjectivity_sum = 0.0
+        # The latest assessment stays open: modifiers, negations and "!" adjust it
+        p = s = i = 0.0
+        negated = False
+        modifier = negation = None
+
+        if "n't" in text:
+            # TextBlob splits "don't" into "do n ' t"
+            text = text.replace("n't", " n't")
+        for token in TOKEN_RE.findall(text):
+            token = token.lower()
+            entry = table.get(token)
+            if entry is not None:
+                word_p, word_s, word_i, adverb = entry
+                if modifier is None:
+                    if count:
+                        polarity_sum += p * -0.5 if negated else p
+                        subjectivity_sum += s
+                    count += 1
+                    p, s, i, negated = word_p, word_s, word_i, False
+                else:
+                    # "really good": the modifier's intensity scales this word
+                    p = max(-1.0, min(word_p * i, 1.0))
+                    s = max(-1.0, min(word_s * i, 1.0))
+                    i = word_i
+                if negation is not None:
+                    i = 1.0 / i
+                    negated = True
+                modifier = token if adverb else None
+                negation = token if token in NEGATIONS else None
+                continue
+
+            if token in NEGATIONS:
+                negation = token
+            elif negation is not None and len(token.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and modifier.endswith('ly'):
+                # "really not good"
+                negated = True
+                negation = None
+            elif modifier is not None and len(token) > 2:
+                modifier = None
+
+            if token == '!':
+                if count:
+                    p = max(-1.0, min(p * 1.25, 1.0))
+                continue
+            added_p = 0.0 if token in SARCASM else EMOTICON_POLARITY.get(token.replace(' ', ''))
+            if added_p is not None:
+                if count:
+                    polarity_sum += p * -0.5 if negated else p
+                    subjectivity_sum += s
+                count += 1
+                p, s, i, negated = added_p, 1.0, 1.0, False
+
+        if not count:
+            return 0.0, 0.0
+        polarity_sum += p * -0.5 if negated else p
+        subjectivity_sum += s
+        return polarity_sum / count, subjectivity_sum / count
+
+
+lexicon_sentiment = LexiconSentiment()
+
+
+def compare(texts, tolerance=1e-6):
+    """Agreement with TextBlob over `texts`: max differences and the texts outside `tolerance`"""
+    max_polarity = max_subjectivity = 0.0
+    outside = []
+    for text in texts:
+        expected = pattern_sentiment(text)
+        polarity, subjectivity = lexicon_sentiment(text)
+        dp, ds = abs(polarity - expected[0]), abs(subjectivity - expected[1])
+        max_polarity, max_subjectivity = max(max_polarity, dp), max(max_subjectivity, ds)
+        if dp > tolerance or ds > tolerance:
+            outside.append({'text': text, 'textblob': tuple(expected), 'lexicon': (polarity, subjectivity)})
+    return {
+        'texts': len(texts),
+        'max_polarity_diff': max_polarity,
+        'max_subjectivity_diff': max_subjectivity,
+        'outside_tolerance': len(outside),
+        'examples': outside[:5]
+    }
+
+
+if __name__ == '__main__':
+    import json
+    import sys
+    texts = [line.strip() for line in (open(sys.argv[1]) if len(sys.argv) > 1 else sys.stdin) if line.strip()]
+    print(json.dumps(compare(texts), indent=2, default=str))
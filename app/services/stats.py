@@ -0,0 +1,94 @@
+from collections import defaultdict
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+
+COUNTERS = ('conversations', 'chat_messages', 'counseling_turns')
+
+
+class UserStats:
+    """Per-user activity counters kept on one `user_stats` document.
+
+    Writers bump the counters with $inc as they persist messages, so the
+    dashboard reads totals with a single _id lookup instead of counting the
+    source collections. Increments never create the document: a user with
+    history but no stats yet would get counters holding only the latest
+    writes. `reconcile` re-derives them from those collections; it is run
+    lazily for users with no stats document yet and periodically by
+    `python -m app.services.stats` to correct any drift.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def collection(self):
+        return self.db.user_stats
+
+    def increment(self, user_id, **counts):
+        inc = {name: count for name, count in counts.items() if count}
+        if not inc:
+            return
+        try:
+            self.collection.update_one({'_id': ObjectId(user_id)}, {'$inc': inc})
+        except Exception as e:
+            # A missed increment is repaired by the next reconcile run
+            print(f"Error updating user stats: {str(e)}")
+
+    def increment_many(self, counts):
+        """Apply {(user_id, counter): amount} with one bulk write"""
+        per_user = defaultdict(dict)
+        for (user_id, name), count in counts.items():
+            per_user[ObjectId(user_id)][name] = count
+        try:
+            self.collection.bulk_write([
+                UpdateOne({'_id': user_id}, {'$inc': inc})
+                for user_id, inc in per_user.items()
+            ], ordered=False)
+        except Exception as e:
+            print(f"Error updating user stats: {str(e)}")
+
+    def get(self, user_id):
+        stats = self.collection.find_one({'_id': ObjectId(user_id)})
+        if stats is None:
+            stats = self.reconcile(user_id)
+        return {name: stats.get(name, 0) for name in COUNTERS}
+
+    def count_sources(self, user_id):
+        """Count straight from the source collections"""
+        user_id = ObjectId(user_id)
+        turns = list(self.db.counseling_sessions.aggregate([
+            {'$match': {'user_id': user_id}},
+            {'$group': {'_id': None, 'turns': {'$sum': {
+                '$ifNull': ['$message_count', {'$size': {'$ifNull': ['$messages', []]}}]
+            }}}}
+        ]))
+        return {
+            'conversations': self.db.conversations.count_documents({'user_id': user_id}),
+            'chat_messages': self.db.chat_messages.count_documents({'user_id': user_id}),
+            'counseling_turns': turns[0]['turns'] if turns else 0
+        }
+
+    def reconcile(self, user_id):
+        stats = dict(self.count_sources(user_id), _id=ObjectId(user_id), reconciled_at=datetime.utcnow())
+        self.collection.replace_one({'_id': stats['_id']}, stats, upsert=True)
+        return stats
+
+    def reconcile_all(self):
+        """Re-derive every user's counters; returns how many were corrected"""
+        corrected = 0
+        for user in self.db.users.find({}, {'_id': 1}):
+            before = self.collection.find_one({'_id': user['_id']}) or {}
+            after = self.reconcile(user['_id'])
+            if any(before.get(name) != after[name] for name in COUNTERS):
+                corrected += 1
+        return corrected
+
+
+if __name__ == '__main__':
+    from app.database import connect_from_config
+    database = connect_from_config()
+    try:
+        print(f"Reconciled user stats, {UserStats(database).reconcile_all()} corrected")
+    finally:
+        database.close()
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+import numpy as np
+from app.services.emotion import score_many
+from app.models.mood import mood_scores, mood_emoji
+
+def calculate_streak(user_data):
+    mood_history = user_data.get('mood_history', [])
+    if not mood_history:
+        return 0
+    
+    # Sort mood history by timestamp
+    mood_history.sort(key=lambda x: x['timestamp'])
+    return streak_from_dates([entry['timestamp'].date() for entry in mood_history])
+
+def streak_from_dates(dates):
+    """Days in a row up to the last of `dates` (check-in dates, oldest first); 0 unless that is today or yesterday"""
+    if not dates:
+        return 0
+    
+    streak = 0
+    current_date = datetime.utcnow().date()
+    last_date = dates[-1]
+    
+    # If last entry was today or yesterday, start counting
+    if last_date == current_date or last_date == current_date - timedelta(days=1):
+        streak = 1
+        # Check previous days
+        for i in range(2, len(dates) + 1):
+            prev_date = dates[-i]
+            expected_date = last_date - timedelta(days=i-1)
+            if prev_date == expected_date:
+                streak += 1
+            else:
+                break
+    
+    return streak
+
+def get_bmi_category(bmi):
+    if bmi < 18.5:
+        return 'Underweight'
+    elif bmi < 25:
+        return 'Normal weight'
+    elif bmi < 30:
+        return 'Overweight'
+    else:
+        return 'Obese'
+
+def bmi_score(bmi):
+    if bmi is None:
+        return 50  # Default score
+    
+    if 18.5 <= bmi <= 24.9:
+        return 80
+    elif 25 <= bmi <= 29.9:
+        return 60
+    elif bmi < 18.5:
+        return 40
+    else:
+        return 30
+
+def calculate_physical_score(user_data):
+    bmi_history = user_data.get('bmi_history', [])
+    return bmi_score(bmi_history[-1]['bmi'] if bmi_history else None)
+
+def mental_score(polarities, recent_scores):
+    """Score from journal sentiment polarities and recent mood scores"""
+    if not len(polarities) or not len(recent_scores):
+        return 50  # Default score
+    
+    avg_sentiment = np.mean(polarities)
+    avg_mood = np.mean(recent_scores)
+    
+    return int((avg_sentiment + 1) * 25 + (avg_mood / 5) * 25)  # Scale to 0-100
+
+def recent_mental_score(journal_texts, recent_scores):
+    """Score from the last 5 journal entries' text and the last 7 mood scores"""
+    # Analyze journal sentiment
+    polarities = score_many(journal_texts).polarity if len(journal_texts) else []
+    return mental_score(polarities, recent_scores)
+
+def recent_emotional_score(recent_scores):
+    """Score from the consistency of the last 7 mood scores"""
+    if not len(recent_scores):
+        return 50  # Default score
+    
+    mood_std = recent_scores.std() if len(recent_scores) > 1 else 0
+    
+    # Lower standard deviation indicates more emotional stability
+    stability_score = max(0, 100 - (mood_std * 20))
+    
+    return int(stability_score)
+
+def recent_mood_emoji(recent_scores):
+    if not len(recent_scores):
+        return '😐'
+    return mood_emoji(recent_scores.mean())
+
+def calculate_mental_score(user_data):
+    journal_entries = user_data.get('journal_entries', [])
+    mood_history = user_data.get('mood_history', [])
+    return recent_mental_score(
+        [entry['content'] for entry in journal_entries[-5:]],
+        mood_scores([m['mood'] for m in mood_history[-7:]])
+    )
+
+def calculate_emotional_score(user_data):
+    mood_history = user_data.get('mood_history', [])
+    return recent_emotional_score(mood_scores([m['mood'] for m in mood_history[-7:]]))
+
+def get_avg_mood_emoji(user_data):
+    mood_history = user_data.get('mood_history', [])
+    return recent_mood_emoji(mood_scores([m['mood'] for m in mood_history[-7:]]))
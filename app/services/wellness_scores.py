@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+import numpy as np
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.models.mood import mood_scores
+from app.services.emotion import score_many
+from app.services.mood_series import to_ms, from_ms
+from app.services.wellness import bmi_score, mental_score, recent_emotional_score, recent_mood_emoji
+
+# Bumped whenever the state layout or a score formula changes so users get rebuilt
+STATE_VERSION = 1
+
+RECENT_MOODS = 7
+RECENT_JOURNAL = 5
+
+# Days of closing scores kept for trends; the longest trend looks back 30 days
+HISTORY_DAYS = 31
+TREND_DAYS = {'week': 7, 'month': 30, 'year': 30}
+
+SCORE_NAMES = ('physical', 'mental', 'emotional')
+
+
+def _day(timestamp):
+    return timestamp.date().isoformat()
+
+
+def compute_scores(state):
+    """Physical, mental and emotional scores from a state document's inputs"""
+    moods = np.array(state.get('moods', []), dtype=np.float64)
+    return {
+        'physical': bmi_score(state.get('bmi')),
+        'mental': mental_score([entry['polarity'] for entry in state.get('journal', [])], moods),
+        'emotional': recent_emotional_score(moods)
+    }
+
+
+class WellnessScores:
+    """Per-user wellness scores kept on one `wellness_state` document.
+
+    The document holds just the inputs the scores need: the latest BMI,
+    the sentiment polarity of the last 5 journal entries and the scores of
+    the last 7 mood check-ins. Mood, journal and BMI writes update those
+    inputs and re-score from them, so TextBlob runs once per entry when it
+    is written instead of on every page view. Each write also records the
+    day's closing scores under `history`; trends compare today's scores
+    with the closing scores at the start of the period. Users are built
+    from their user document on first use, and
+    `python -m app.services.wellness_scores` rebuilds everyone.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def collection(self):
+        return self.db.wellness_state
+
+    def add_mood(self, user_id, mood, timestamp):
+        self._update(user_id, {
+            '$push': {'moods': {'$each': [float(mood_scores([mood])[0])], '$slice': -RECENT_MOODS}},
+            '$max': {'last_mood_check': timestamp}
+        })
+
+    def add_bmi(self, user_id, bmi):
+        self._update(user_id, {'$set': {'bmi': bmi}})
+
+    def add_journal_entries(self, user_id, entries):
+        """Score new entries appended to the end of the journal"""
+        entries = entries[-RECENT_JOURNAL:]
+        polarities = score_many([entry['content'] for entry in entries]).polarity
+        self._update(user_id, {'$push': {'journal': {
+            '$each': [
+                {'_id': entry['_id'], 'polarity': float(polarity)}
+                for entry, polarity in zip(entries, polarities)
+            ],
+            '$slice': -RECENT_JOURNAL
+        }}})
+
+    def refresh_journal(self, user_id):
+        """Re-read the latest entries after edits or deletes, which change which entries count"""
+        user = next(self.db.users.aggregate([
+            {'$match': {'_id': ObjectId(user_id)}},
+            {'$project': {'journal': {'$slice': [{'$ifNull': ['$journal_entries', []]}, -RECENT_JOURNAL]}}}
+        ]), {})
+        self._update(user_id, {'$set': {'journal': self._journal(user.get('journal', []))}})
+
+    @staticmethod
+    def _journal(entries):
+        polarities = score_many([entry['content'] for entry in entries]).polarity if entries else []
+        return [
+            {'_id': entry['_id'], 'polarity': float(polarity)}
+            for entry, polarity in zip(entries, polarities)
+        ]
+
+    def _update(self, user_id, update):
+        try:
+            state = self.collection.find_one_and_update(
+                {'_id': ObjectId(user_id), 'version': STATE_VERSION},
+                update,
+                return_document=ReturnDocument.AFTER
+            )
+            if state is None:
+                # Not built yet; the user document already includes this write
+                self.rebuild(user_id)
+            else:
+                self._settle(state)
+        except Exception as e:
+            # Scores go stale until the next write or rebuild
+            print(f"Error updating wellness scores: {str(e)}")
+
+    def _settle(self, state, now=None):
+        """Store the scores for the state's current inputs as today's closing scores"""
+        now = now or datetime.utcnow()
+        scores = compute_scores(state)
+        update = {'$set': {'scores': scores, f'history.{_day(now)}': scores}}
+        expired = self._expired(state.get('history', {}), now)
+        if expired:
+            update['$unset'] = {f'history.{day}': '' for day in expired}
+        self.collection.update_one({'_id': state['_id']}, update)
+        state['scores'] = scores
+        return state
+
+    @staticmethod
+    def _expired(history, now):
+        """Days older than the longest trend, keeping the newest of them as that trend's baseline"""
+        cutoff = _day(now - timedelta(days=HISTORY_DAYS))
+        old = sorted(day for day in history if day < cutoff)
+        return old[:-1]
+
+    @staticmethod
+    def _previous(state, days, now):
+        """Closing scores on the last day with data at least `days` ago, else the current scores"""
+        reference = _day(now - timedelta(days=days))
+        history = state.get('history', {})
+        earlier = [day for day in history if day <= reference]
+        return history[max(earlier)] if earlier else state['scores']
+
+    def get(self, user_id, period='week'):
+        """Current scores, their trends over `period`, the average mood emoji and the last check-in"""
+        now = datetime.utcnow()
+        state = self.collection.find_one({'_id': ObjectId(user_id), 'version': STATE_VERSION})
+        if state is None:
+            state = self.rebuild(user_id, now)
+        scores = state['scores']
+        previous = self._previous(state, TREND_DAYS.get(period, 30), now)
+        return {
+            'scores': {name: scores[name] for name in SCORE_NAMES},
+            'trends': {name: scores[name] - previous[name] for name in SCORE_NAMES},
+            'average_mood': recent_mood_emoji(np.array(state.get('moods', []), dtype=np.float64)),
+            'last_mood_check': state.get('last_mood_check')
+        }
+
+    def rebuild(self, user_id, now=None):
+        """Re-derive a user's state from the user document, including the closing
+        scores of the last HISTORY_DAYS days so trends work straight away"""
+        now = now or datetime.utcnow()
+        user = self.db.users.find_one({'_id': ObjectId(user_id)}, {
+            'bmi_history.bmi': 1, 'bmi_history.timestamp': 1,
+            'journal_entries._id': 1, 'journal_entries.content': 1, 'journal_entries.timestamp': 1,
+            'mood_history.mood': 1, 'mood_history.timestamp': 1
+        }) or {}
+        bmi_history = user.get('bmi_history', [])
+        journal = user.get('journal_entries', [])
+        moods = user.get('mood_history', [])
+        mood_values = mood_scores([m.get('mood') for m in moods])
+        times = {
+            name: np.array([to_ms(item['timestamp']) for item in items], dtype=np.int64)
+            for name, items in (('bmi', bmi_history), ('journal', journal), ('moods', moods))
+        }
+
+        def inputs(close):
+            """The inputs as they stood at `close`, in array order; None before the user had any"""
+            limit = to_ms(close) if close else None
+            kept = {
+                name: np.flatnonzero(ts < limit) if limit is not None else np.arange(len(ts))
+                for name, ts in times.items()
+            }
+            if not any(len(indexes) for indexes in kept.values()):
+                return None if close else {}
+            mood_indexes = kept['moods'][-RECENT_MOODS:]
+            return {
+                'bmi': bmi_history[kept['bmi'][-1]]['bmi'] if len(kept['bmi']) else None,
+                'journal': self._journal([journal[i] for i in kept['journal'][-RECENT_JOURNAL:]]),
+                'moods': mood_values[mood_indexes].tolist(),
+                'last_mood_check': from_ms(times['moods'][mood_indexes].max()) if len(mood_indexes) else None
+            }
+
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        history = {}
+        for days in range(HISTORY_DAYS, 0, -1):
+            day_inputs = inputs(today - timedelta(days=days - 1))
+            if day_inputs is not None:
+                history[_day(today - timedelta(days=days))] = compute_scores(day_inputs)
+
+        state = dict(inputs(None), _id=ObjectId(user_id), version=STATE_VERSION, history=history, rebuilt_at=now)
+        state['scores'] = history[_day(now)] = compute_scores(state)
+        self.collection.replace_one({'_id': state['_id']}, state, upsert=True)
+        return state
+
+    def rebuild_all(self):
+        """Rebuild every user's state; returns how many users were rebuilt"""
+        return sum(1 for user in self.db.users.find({}, {'_id': 1}) if self.rebuild(user['_id']))
+
+
+if __name__ == '__main__':
+    from app.database import connect_from_config
+    database = connect_from_config()
+    try:
+        print(f"Rebuilt wellness scores for {WellnessScores(database).rebuild_all()} users")
+    finally:
+        database.close()
@@ -0,0 +1,224 @@
+import atexit
+import glob
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+DUPLICATE_KEY = 11000
+REPLAY_INTERVAL = 30
+# Spill files touched this recently may still be open for append by their worker
+SPILL_QUIET_SECONDS = 5
+# Spill files being replayed are renamed to replaying-<pid>-<id> plus this suffix,
+# which the *.ndjson scan does not match
+CLAIMED_SUFFIX = '.replaying'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class WriteBehindQueue:
+    """Per-worker write-behind buffer for chat persistence.
+
+    Routes hand documents to `put` and reply immediately; a background
+    thread batches them into one insert_many per collection every
+    `interval` seconds or once `batch_size` documents are waiting. Each
+    document gets its _id up front, which makes retries idempotent: batches
+    that cannot reach Mongo are appended to a spill file and replayed later,
+    and duplicates from a half-applied batch are skipped. Counter names
+    passed with a document are applied to UserStats only once it is stored.
+
+    Reads that immediately follow a write (chat history) can lag by up to one
+    flush interval.
+    """
+
+    def __init__(self, db, stats=None):
+        self.db = db
+        self.stats = stats
+        self.enabled = True
+        self.interval = 0.2
+        self.batch_size = 100
+        self.max_pending = 10000
+        self.spill_dir = os.path.join(tempfile.gettempdir(), 'emotio-writebehind')
+        self._pending = []
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closing = False
+        self._next_replay = 0
+
+    def init_app(self, app):
+        self.enabled = app.config['WRITE_BEHIND']
+        self.interval = app.config['WRITE_BEHIND_INTERVAL_MS'] / 1000
+        self.batch_size = app.config['WRITE_BEHIND_BATCH_SIZE']
+        self.max_pending = app.config['WRITE_BEHIND_MAX_PENDING']
+        self.spill_dir = app.config['WRITE_BEHIND_SPILL_DIR'] or self.spill_dir
+        atexit.register(self.close)
+
+    def put(self, collection, document, counter=None):
+        """Queue a document for insertion and return its _id"""
+        document.setdefault('_id', ObjectId())
+        item = (collection, document, counter)
+        if not self.enabled:
+            self._write([item])
+            return document['_id']
+
+        with self._cond:
+            self._ensure_worker()
+            overflow = len(self._pending) >= self.max_pending
+            if not overflow:
+                self._pending.append(item)
+                if len(self._pending) >= self.batch_size:
+                    self._cond.notify()
+        if overflow:
+            # Mongo is far behind; keep the worker's memory bounded
+            self._spill([item])
+        return document['_id']
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        # First use in this process, or a fork inherited the parent's state
+        self._pending = []
+        self._closing = False
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.batch_size or self._closing,
+                    timeout=self.interval
+                )
+                batch, self._pending = self._pending, []
+                closing = self._closing
+            try:
+                if batch:
+                    self._write(batch)
+                elif time.monotonic() >= self._next_replay:
+                    self.replay()
+            except Exception as e:
+                print(f"Error in write-behind flush: {str(e)}")
+            if closing:
+                return
+
+    def _write(self, items):
+        groups = defaultdict(list)
+        for item in items:
+            groups[item[0]].append(item)
+
+        stored = []
+        for collection, group in groups.items():
+            try:
+                self.db[collection].insert_many([document for _, document, _ in group], ordered=False)
+                stored.extend(group)
+            except BulkWriteError as e:
+                errors = {error['index']: error.get('code') for error in e.details.get('writeErrors', [])}
+                # Duplicate keys were stored (and counted) by an earlier attempt
+                stored.extend(item for i, item in enumerate(group) if i not in errors)
+                retry = [group[i] for i, code in errors.items() if code != DUPLICATE_KEY]
+                if retry:
+                    self._spill(retry)
+            except PyMongoError as e:
+                print(f"Error writing {collection} batch, spilling to disk: {str(e)}")
+                self._spill(group)
+        self._count(stored)
+
+    def _count(self, items):
+        if self.stats is None:
+            return
+        counts = Counter(
+            (document['user_id'], counter)
+            for _, document, counter in items
+            if counter and document.get('user_id')
+        )
+        if counts:
+            self.stats.increment_many(counts)
+
+    def _spill_path(self):
+        return os.path.join(self.spill_dir, f'writebehind-{os.getpid()}.ndjson')
+
+    def _spill(self, items):
+        try:
+            with self._spill_lock:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with open(self._spill_path(), 'a') as spill:
+                    for collection, document, counter in items:
+                        spill.write(json_util.dumps({
+                            'collection': collection,
+                            'document': document,
+                            'counter': counter
+                        }) + '\n')
+        except OSError as e:
+            print(f"Error spilling {len(items)} write-behind documents: {str(e)}")
+
+    def _replayable(self):
+        """Spill files no worker is appending to or replaying: quiet spills, and
+        claims left behind by a worker that died while replaying them"""
+        for path in glob.glob(os.path.join(self.spill_dir, '*.ndjson')):
+            try:
+                if time.time() - os.path.getmtime(path) >= SPILL_QUIET_SECONDS:
+                    yield path
+            except OSError:
+                continue
+        for path in glob.glob(os.path.join(self.spill_dir, f'replaying-*{CLAIMED_SUFFIX}')):
+            try:
+                pid = int(os.path.basename(path).split('-')[1])
+            except (IndexError, ValueError):
+                continue
+            if pid != os.getpid() and not _alive(pid):
+                yield path
+
+    def replay(self):
+        """Retry spilled documents from any worker; safe to run concurrently, as
+        each file is claimed by an atomic rename that only one worker wins"""
+        self._next_replay = time.monotonic() + REPLAY_INTERVAL
+        for path in self._replayable():
+            claimed = os.path.join(self.spill_dir, f'replaying-{os.getpid()}-{ObjectId()}{CLAIMED_SUFFIX}')
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue  # another worker claimed it
+            items = []
+            try:
+                with open(claimed) as spill:
+                    for line in spill:
+                        if line.strip():
+                            record = json_util.loads(line)
+                            items.append((record['collection'], record['document'], record.get('counter')))
+            except FileNotFoundError:
+                continue
+            for start in range(0, len(items), self.batch_size):
+                self._write(items[start:start + self.batch_size])
+            os.remove(claimed)
+
+    def flush(self):
+        """Write everything queued so far on the calling thread"""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write(batch)
+
+    def close(self, timeout=10):
+        """Stop the background thread after a final flush; called from gunicorn's worker_exit"""
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            with self._cond:
+                self._closing = True
+                self._cond.notify()
+            thread.join(timeout)
+        self._thread = None
+        self.flush()
@@ -0,0 +1,79 @@
+"""Compare per-request Counter theme extraction with the TF-IDF journal index.
+
+Usage: python benchmarks/bench_journal_themes.py --entries 20000 --words 120
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.journal_index import term_frequencies, rank_themes
+
+VOCABULARY = (
+    "work family sleep anxious tired grateful walk friends exam deadline coffee rain run "
+    "meeting stress happy calm lonely weekend project dinner music call mom dad dog park "
+    "headache gym therapy breathe focus morning evening overwhelmed proud excited sad"
+).split()
+FILLER = "i the and was to it a of my so that felt today really but just".split()
+
+
+def make_journal(entries, words, seed=7):
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(VOCABULARY if rng.random() < 0.4 else FILLER) for _ in range(words))
+        for _ in range(entries)
+    ]
+
+
+def counter_themes(texts):
+    """What the routes did before: split and count the raw text on every request"""
+    return [word for word, count in Counter(' '.join(texts).split()).most_common(5) if len(word) > 3]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    texts = make_journal(args.entries, args.words)
+
+    # One-off cost of building the index, then the cost of keeping it current
+    start = time.perf_counter()
+    tf_maps = [term_frequencies(text) for text in texts]
+    df = Counter(term for tf in tf_maps for term in tf)
+    build_ms = (time.perf_counter() - start) * 1000
+    update_ms = timed(lambda: term_frequencies(texts[-1]), args.repeat)
+
+    results = {
+        'entries': args.entries,
+        'words_per_entry': args.words,
+        'index_build_ms': round(build_ms, 2),
+        'index_update_ms': round(update_ms, 4),
+        'recent_5': {
+            'counter_ms': round(timed(lambda: counter_themes(texts[-5:]), args.repeat), 4),
+            'index_ms': round(timed(lambda: rank_themes(tf_maps[-5:], df, len(tf_maps)), args.repeat), 4),
+        },
+        'full_journal': {
+            'counter_ms': round(timed(lambda: counter_themes(texts), max(1, args.repeat // 10)), 2),
+            'index_ms': round(timed(lambda: rank_themes(tf_maps, df, len(tf_maps)), max(1, args.repeat // 10)), 2),
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Compare storing a user's mood check-ins as embedded `mood_history`
+subdocuments with the bucketed columnar `mood_series`: BSON size, and the
+time to decode and turn a year of check-ins into score arrays the way
+/insights-data does.
+
+Decoding is timed with the driver's BSON codec, which is the per-event
+cost on the app side whatever the server; the server additionally reads
+and sends the bytes, so the size ratio is what it saves there.
+
+Usage: python benchmarks/bench_mood_series.py --events 100000 --days 730
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bson
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.mood import Mood, SCORES, mood_scores
+from app.services.mood_series import BUCKET_SIZE, MoodSeries, Series, to_ms
+
+
+def make_history(events, days, seed=11):
+    rng = random.Random(seed)
+    now = datetime(2024, 6, 1)
+    timestamps = sorted(now - timedelta(seconds=rng.randint(0, days * 86400)) for _ in range(events))
+    moods = [int(rng.choice(list(Mood)[:9])) for _ in range(events)]
+    return [
+        {'mood': mood, 'context': '', 'timestamp': timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)}
+        for mood, timestamp in zip(moods, timestamps)
+    ], now
+
+
+def bucket_docs(history, bucket_size):
+    series = MoodSeries(None, bucket_size)
+    timestamps = np.array([to_ms(m['timestamp']) for m in history], dtype=np.int64)
+    moods = np.array([m['mood'] for m in history], dtype=np.int8)
+    return [
+        series._bucket_doc(
+            'a' * 24, timestamps[start:start + bucket_size], moods[start:start + bucket_size],
+            sealed=start + bucket_size <= len(history)
+        )
+        for start in range(0, len(history), bucket_size)
+    ]
+
+
+def embedded_scan(raw_user, start):
+    """What /insights-data did: decode the user document, filter and score in Python"""
+    user = bson.decode(raw_user)
+    recent = [m for m in user['mood_history'] if m['timestamp'] >= start]
+    recent.sort(key=lambda m: m['timestamp'])
+    return np.array([to_ms(m['timestamp']) for m in recent], dtype=np.int64), mood_scores([m['mood'] for m in recent])
+
+
+def series_scan(raw_buckets, start):
+    """Decode the buckets overlapping the range (the server's `end` filter) and take their columns as arrays"""
+    docs = [bson.decode(raw) for end, raw in raw_buckets if end >= start]
+    series = MoodSeries._combine([MoodSeries._columns(doc) for doc in docs])
+    keep = series.timestamps >= to_ms(start)
+    series = Series(series.timestamps[keep], series.moods[keep])
+    return series.timestamps, SCORES[series.moods]
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=100000, help='Mood check-ins per user')
+    parser.add_argument('--days', type=int, default=730, help='Days the check-ins are spread over')
+    parser.add_argument('--bucket-size', type=int, default=BUCKET_SIZE)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    history, now = make_history(args.events, args.days)
+    raw_user = bson.encode({'_id': 1, 'username': 'bench', 'mood_history': history})
+    raw_buckets = [(doc['end'], bson.encode(doc)) for doc in bucket_docs(history, args.bucket_size)]
+
+    results = {
+        'events': args.events,
+        'bucket_size': args.bucket_size,
+        'embedded_bytes': len(raw_user),
+        'series_bytes': sum(len(raw) for _, raw in raw_buckets),
+        'series_buckets': len(raw_buckets),
+        'scan_ms': {}
+    }
+    results['bytes_ratio'] = round(results['embedded_bytes'] / results['series_bytes'], 1)
+    for period, days in (('week', 7), ('month', 30), ('year', 365)):
+        start = now - timedelta(days=days)
+        expected = embedded_scan(raw_user, start)
+        actual = series_scan(raw_buckets, start)
+        assert np.array_equal(expected[0], actual[0]) and np.array_equal(expected[1], actual[1]), period
+        embedded = timed(lambda: embedded_scan(raw_user, start), args.repeat)
+        series = timed(lambda: series_scan(raw_buckets, start), args.repeat)
+        results['scan_ms'][period] = {
+            'events': len(actual[0]),
+            'embedded': round(embedded, 2),
+            'series': round(series, 2),
+            'speedup': round(embedded / series, 1)
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
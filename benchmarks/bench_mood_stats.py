@@ -0,0 +1,101 @@
+"""Compare /insights-data's two ways of computing mood statistics over a
+long history: loading every check-in in range as one set of arrays, and
+streaming the mood_series buckets newest first through MoodStats. Reports
+peak Python heap (tracemalloc) and time for each, after checking that both
+give the same breakdowns.
+
+Usage: python benchmarks/bench_mood_stats.py --events 500000 --days 365
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+import bson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_mood_series import bucket_docs, make_history
+from app.services.mood_series import BUCKET_SIZE, MoodSeries, Series, to_ms
+from app.services.mood_stats import MoodStats, merge_newest_first
+
+
+def summary(stats):
+    return {
+        'series': stats.mood_series(),
+        'time_of_day': stats.time_of_day(),
+        'triggers': stats.triggers(),
+        'weekly_pattern': stats.weekly_pattern(),
+        'insights': stats.insights(),
+        'total': stats.total
+    }
+
+
+def whole(raw_buckets, start, now):
+    """Decode every bucket in range, combine them and fold the arrays in at once"""
+    series = MoodSeries._combine([MoodSeries._columns(bson.decode(raw)) for end, raw in raw_buckets if end >= start])
+    keep = series.timestamps >= to_ms(start)
+    stats = MoodStats('year', now)
+    stats.add(series.timestamps[keep], series.moods[keep])
+    return summary(stats)
+
+
+def streamed(raw_buckets, start, now):
+    """Decode one bucket at a time, newest first, as MoodSeries.iter_chunks does"""
+    def chunks():
+        for end, raw in sorted(raw_buckets, key=lambda bucket: bucket[0], reverse=True):
+            if end < start:
+                break
+            series = MoodSeries._combine([MoodSeries._columns(bson.decode(raw))])
+            keep = series.timestamps >= to_ms(start)
+            yield Series(series.timestamps[keep], series.moods[keep])
+
+    stats = MoodStats('year', now)
+    for timestamps, codes in merge_newest_first(chunks()):
+        stats.add(timestamps, codes)
+    return summary(stats)
+
+
+def measure(fn, repeat):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return peak, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=500000, help='Mood check-ins in the year')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--bucket-size', type=int, default=BUCKET_SIZE)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    history, now = make_history(args.events, args.days)
+    raw_buckets = [(doc['end'], bson.encode(doc)) for doc in bucket_docs(history, args.bucket_size)]
+    del history
+    start = now - timedelta(days=365)
+
+    assert whole(raw_buckets, start, now) == streamed(raw_buckets, start, now), 'streamed breakdowns differ'
+    whole_peak, whole_ms = measure(lambda: whole(raw_buckets, start, now), args.repeat)
+    streamed_peak, streamed_ms = measure(lambda: streamed(raw_buckets, start, now), args.repeat)
+    print(json.dumps({
+        'events': args.events,
+        'bucket_size': args.bucket_size,
+        'whole': {'peak_kb': round(whole_peak / 1024), 'ms': round(whole_ms, 1)},
+        'streamed': {'peak_kb': round(streamed_peak / 1024), 'ms': round(streamed_ms, 1)},
+        'peak_ratio': round(whole_peak / streamed_peak, 1)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
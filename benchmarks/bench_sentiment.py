@@ -0,0 +1,112 @@
+"""Compare per-message TextBlob mood scoring with the batch score_many API,
+and the lexicon sentiment engine with TextBlob for speed and agreement.
+
+Usage: python benchmarks/bench_sentiment.py --messages 50 --words 25
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+from app.services import emotion
+from app.services.emotion import score_many, _sentiment
+from app.services.sentiment import compare, lexicon_sentiment
+
+VOCABULARY = (
+    "happy sad anxious calm great terrible tired lonely proud worried excited angry grateful "
+    "stressful wonderful awful nervous relaxed hopeless good bad not very really"
+).split()
+FILLER = "i the and was to it a of my so that felt today but just work friend sleep".split()
+
+
+def make_messages(count, words, seed=7):
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(VOCABULARY if rng.random() < 0.3 else FILLER) for _ in range(words))
+        for _ in range(count)
+    ]
+
+
+# Negations, modifiers, contractions, punctuation, emoticons and abbreviations
+# exercise every rule the lexicon engine reimplements
+TRICKY = (
+    "not no never very really extremely quite so too don't can't won't isn't I'm it's , . ! ? ... "
+    "(!) :) :( :-D <3 ;) \"quoted\" “smart” well-being e.g. 3.5 Mr. Dr. etc. ok. #tag NOT Really Good!!"
+).split()
+
+
+def make_agreement_corpus(count, seed=3):
+    rng = random.Random(seed)
+    lexicon = list(pattern_sentiment.keys())
+    return [
+        ' '.join(rng.choice(lexicon) if rng.random() < 0.4 else rng.choice(TRICKY + FILLER) for _ in range(rng.randint(1, 30)))
+        for _ in range(count)
+    ]
+
+
+def loop_moods(texts):
+    """What EmotionService did before: one TextBlob per message, labelled in Python"""
+    moods = []
+    for text in texts:
+        sentiment = TextBlob(text).sentiment
+        if sentiment.polarity > 0.3:
+            moods.append('happy')
+        elif sentiment.polarity < -0.3:
+            moods.append('sad')
+        elif sentiment.subjectivity > 0.5:
+            moods.append('anxious')
+        else:
+            moods.append('neutral')
+    return moods
+
+
+def timed(fn, repeat, setup=None):
+    total = 0.0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        total += time.perf_counter() - start
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--words', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--agreement', type=int, default=20000, help='Texts in the engine agreement corpus')
+    args = parser.parse_args()
+
+    texts = make_messages(args.messages, args.words)
+    assert list(score_many(texts).moods) == loop_moods(texts), 'batch labels differ from the per-message loop'
+
+    results = {
+        'messages': args.messages,
+        'words_per_message': args.words,
+        'loop_ms': round(timed(lambda: loop_moods(texts), args.repeat), 3),
+        'score_many_cold_ms': round(timed(lambda: score_many(texts), args.repeat, setup=_sentiment.cache_clear), 3),
+        'score_many_warm_ms': round(timed(lambda: score_many(texts), args.repeat), 3),
+        'engines_us_per_text': {
+            'textblob': round(timed(lambda: [TextBlob(text).sentiment for text in texts], args.repeat) * 1000 / len(texts), 2),
+            'pattern': round(timed(lambda: [pattern_sentiment(text) for text in texts], args.repeat) * 1000 / len(texts), 2),
+            'lexicon': round(timed(lambda: [lexicon_sentiment(text) for text in texts], args.repeat) * 1000 / len(texts), 2),
+        },
+    }
+    emotion.settings['engine'] = 'lexicon'
+    _sentiment.cache_clear()
+    results['score_many_lexicon_cold_ms'] = round(timed(lambda: score_many(texts), args.repeat, setup=_sentiment.cache_clear), 3)
+    agreement = compare(make_agreement_corpus(args.agreement))
+    results['lexicon_agreement'] = {key: value for key, value in agreement.items() if key != 'examples'}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""Gunicorn entry point for load tests against a real mongod.
+
+    OPENROUTER_API_BASE=http://127.0.0.1:8089/api/v1 MONGODB_URI=mongodb://localhost:27017/ \
+        gunicorn -w 4 benchmarks.bench_wsgi:app
+"""
+import os
+
+from benchmarks import standins
+
+standins.install(mongo='real', llm_base=os.getenv('OPENROUTER_API_BASE'))
+app, _ = standins.load_app()
@@ -0,0 +1,200 @@
+"""Drive the app's hot routes at a fixed concurrency and report latency as JSON.
+
+In-process (mongomock, stub LLM, fake emotion model):
+    python -m benchmarks.loadtest --users 5 --history 2000 --concurrency 8 --requests 200
+
+Against gunicorn workers and a local mongod (start benchmarks.bench_wsgi first):
+    python -m benchmarks.loadtest --target http://127.0.0.1:8000 \
+        --mongo-uri mongodb://localhost:27017/ --gunicorn-pid <master pid>
+"""
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from benchmarks import seed as seeding
+from benchmarks import standins, stub_llm
+
+SCENARIOS = {
+    'get-response': ('POST', '/get-response', lambda ids: {'user_input': 'I feel anxious about work today.'}),
+    'insights-data': ('GET', '/insights-data?period=month', None),
+    'profile': ('GET', '/profile', None),
+    'journal-entries': ('GET', '/journal-entries', None),
+    'track-mood': ('POST', '/track-mood', lambda ids: {'mood': 'calm', 'context': 'benchmark'}),
+    'generate-report': ('POST', '/generate-report', lambda ids: {'entry_ids': ids}),
+    'counseling': ('POST', '/counseling', lambda ids: {'message': 'I keep worrying about deadlines.', 'session_type': 'stress'}),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def worker_pids(master_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()
+            if int(fields[1]) == master_pid:
+                pids.append(int(entry))
+        except OSError:
+            continue
+    return sorted(pids)
+
+
+def login(base_url, username, password):
+    http = requests.Session()
+    response = http.post(f'{base_url}/login', data={'username': username, 'password': password}, allow_redirects=False)
+    if response.status_code not in (302, 303):
+        raise SystemExit(f'Login failed for {username}: HTTP {response.status_code}')
+    return http
+
+
+def run_scenario(base_url, sessions, name, total, concurrency):
+    method, path, body = SCENARIOS[name]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker(slot):
+        nonlocal errors
+        http, entry_ids = sessions[slot % len(sessions)]
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                response = http.request(method, base_url + path, json=body(entry_ids) if body else None)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+def start_inprocess(args):
+    """Boot the app on a threaded local server with mongomock and the stub LLM"""
+    from werkzeug.serving import make_server
+
+    _, llm_base = stub_llm.start(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        slow_rate=args.llm_slow_rate,
+        slow_ms=args.llm_slow_ms
+    )
+    if args.llm_backup_latency_ms is not None:
+        # A second stub the router can hedge to
+        _, backup_base = stub_llm.start(latency_ms=args.llm_backup_latency_ms, jitter_ms=args.llm_jitter_ms)
+        os.environ['LLM_BACKENDS'] = json.dumps([
+            {'name': 'primary', 'base_url': llm_base, 'api_key': 'stub'},
+            {'name': 'backup', 'base_url': backup_base, 'api_key': 'stub'}
+        ])
+    standins.install(mongo='mock', llm_base=llm_base)
+    app, db = standins.load_app()
+    accounts = seeding.seed(db, users=args.users, history=args.history)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', accounts, [os.getpid()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', help='Base URL of an already running app; omit to run in-process')
+    parser.add_argument('--mongo-uri', help='Seed this mongod when using --target')
+    parser.add_argument('--gunicorn-pid', type=int, help='Gunicorn master pid, for per-worker RSS')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--history', type=int, default=1000, help='Mood and journal records per user')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    parser.add_argument('--llm-jitter-ms', type=float, default=50)
+    parser.add_argument('--llm-slow-rate', type=float, default=0.0, help='Fraction of stub LLM calls that take --llm-slow-ms')
+    parser.add_argument('--llm-slow-ms', type=float, default=3000)
+    parser.add_argument('--llm-backup-latency-ms', type=float, help='Start a second stub backend for hedging')
+    parser.add_argument('--output', help='Write the JSON report here as well as stdout')
+    args = parser.parse_args()
+
+    if args.target:
+        if not args.mongo_uri:
+            raise SystemExit('--mongo-uri is required with --target so users can be seeded')
+        from pymongo import MongoClient
+        accounts = seeding.seed(MongoClient(args.mongo_uri).emotio_db, users=args.users, history=args.history)
+        base_url = args.target.rstrip('/')
+        pids = worker_pids(args.gunicorn_pid) if args.gunicorn_pid else []
+    else:
+        base_url, accounts, pids = start_inprocess(args)
+
+    sessions = [(login(base_url, username, password), entry_ids) for username, password, entry_ids in accounts]
+
+    report = {
+        'started_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'config': {
+            'users': args.users,
+            'history': args.history,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'llm_latency_ms': args.llm_latency_ms,
+            'llm_slow_rate': args.llm_slow_rate,
+            'llm_backup_latency_ms': args.llm_backup_latency_ms,
+            'mode': 'external' if args.target else 'inprocess'
+        },
+        'scenarios': {}
+    }
+    for name in [s for s in args.scenarios.split(',') if s]:
+        report['scenarios'][name] = run_scenario(base_url, sessions, name, args.requests, args.concurrency)
+    report['rss_kb_per_worker'] = {str(pid): rss_kb(pid) for pid in pids}
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output)
+
+
+if __name__ == '__main__':
+    main()
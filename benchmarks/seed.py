@@ -0,0 +1,70 @@
+"""Seed synthetic users with a configurable amount of history."""
+import random
+from datetime import datetime, timedelta
+from bson import ObjectId
+from werkzeug.security import generate_password_hash
+
+MOODS = ('happy', 'calm', 'neutral', 'anxious', 'sad')
+PHRASES = (
+    "Work was stressful but the walk home helped.",
+    "Had dinner with friends and felt grateful.",
+    "Could not sleep, kept thinking about the deadline.",
+    "Morning run, felt calm and focused afterwards.",
+    "Lonely evening, called mom which made it better.",
+    "Therapy session went well, proud of the progress.",
+)
+PASSWORD = 'benchmark-password'
+
+
+def make_user(index, history, rng, now):
+    def timestamps(count):
+        return sorted(now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)) for _ in range(count))
+
+    journal_entries = [
+        {
+            '_id': ObjectId(),
+            'content': ' '.join(rng.choice(PHRASES) for _ in range(3)),
+            'mood': rng.choice(MOODS),
+            'timestamp': ts
+        }
+        for ts in timestamps(history)
+    ]
+    return {
+        '_id': ObjectId(),
+        'username': f'bench{index}',
+        'email': f'bench{index}@example.com',
+        'password': generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000'),
+        'created_at': now - timedelta(days=365),
+        'mood_history': [
+            {'mood': rng.choice(MOODS), 'context': '', 'timestamp': ts}
+            for ts in timestamps(history)
+        ],
+        'journal_entries': journal_entries,
+        'bmi_history': [
+            {'bmi': round(rng.uniform(18, 32), 1), 'timestamp': ts}
+            for ts in timestamps(max(1, history // 50))
+        ],
+        'streak': rng.randint(0, 30)
+    }
+
+
+def seed(db, users=10, history=1000, seed=42):
+    """Insert synthetic users and return [(username, password, journal entry ids)]"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    accounts = []
+    for index in range(users):
+        user = make_user(index, history, rng, now)
+        db.users.delete_many({'username': user['username']})
+        db.users.insert_one(user)
+        db.conversations.insert_many([
+            {
+                'user_id': user['_id'],
+                'user_message': rng.choice(PHRASES),
+                'ai_response': 'Thank you for sharing that.',
+                'timestamp': now - timedelta(minutes=i)
+            }
+            for i in range(max(1, history // 2))
+        ])
+        accounts.append((user['username'], PASSWORD, [str(e['_id']) for e in user['journal_entries'][-5:]]))
+    return accounts
@@ -0,0 +1,59 @@
+"""Local stand-ins so the real app can be benchmarked without network or GPUs."""
+import hashlib
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LABELS = ('joy', 'sadness', 'anger', 'fear', 'surprise', 'disgust', 'neutral')
+
+
+class FakeEmotionClassifier:
+    """Deterministic stand-in for the DistilRoBERTa emotion pipeline"""
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        return [self._classify(text) for text in texts]
+
+    def _classify(self, text):
+        digest = hashlib.md5(text.encode()).digest()
+        return {'label': LABELS[digest[0] % len(LABELS)], 'score': 0.5 + digest[1] / 510}
+
+
+def install(mongo='mock', llm_base=None):
+    """Patch heavy dependencies before the app is imported"""
+    for key in ('GOOGLE_CLIENT_ID', 'GOOGLE_CLIENT_SECRET', 'OPENROUTER_API_KEY', 'SECRET_KEY'):
+        os.environ.setdefault(key, 'benchmark')
+    # The stub LLM is free; keep token budgets from turning load into 429s
+    os.environ.setdefault('LLM_USER_TOKENS_PER_MINUTE', '100000000')
+    os.environ.setdefault('LLM_GLOBAL_TOKENS_PER_MINUTE', '100000000')
+    if llm_base:
+        os.environ['OPENROUTER_API_BASE'] = llm_base
+
+    transformers = types.ModuleType('transformers')
+    transformers.pipeline = lambda *args, **kwargs: FakeEmotionClassifier()
+    sys.modules['transformers'] = transformers
+
+    if mongo == 'mock':
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit('mongomock is required for --mongo mock (pip install mongomock)')
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def load_app():
+    """Build the application and return (app, db)"""
+    from app import create_app, db
+    from app.indexes import ensure_indexes
+    app = create_app()
+    try:
+        ensure_indexes(db)
+    except NotImplementedError:
+        pass  # mongomock cannot create the capped profile collection
+    return app, db
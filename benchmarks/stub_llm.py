@@ -0,0 +1,89 @@
+"""Local stand-in for the OpenRouter chat completions API.
+
+Usage: python benchmarks/stub_llm.py --port 8089 --latency-ms 300 --jitter-ms 100
+
+--slow-rate/--slow-ms add a latency tail (a fraction of requests take slow-ms
+instead), which is what hedged requests across two stubs are meant to hide.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "It sounds like you have a lot on your mind. Try taking a few slow breaths, "
+    "and let's look at one small step you could take today."
+)
+
+
+def make_handler(latency_ms, jitter_ms, error_rate, slow_rate=0.0, slow_ms=0):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            delay = slow_ms if random.random() < slow_rate else latency_ms + random.uniform(-jitter_ms, jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+            payload = {
+                'id': 'stub-completion',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': REPLY},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(REPLY.split()),
+                    'total_tokens': prompt_tokens + len(REPLY.split())
+                }
+            }
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start(port=0, latency_ms=300, jitter_ms=0, error_rate=0.0, slow_rate=0.0, slow_ms=0):
+    """Start the stub in a daemon thread and return (server, base_url)"""
+    handler = make_handler(latency_ms, jitter_ms, error_rate, slow_rate, slow_ms)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/api/v1'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--slow-rate', type=float, default=0.0)
+    parser.add_argument('--slow-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency_ms, args.jitter_ms, args.error_rate, args.slow_rate, args.slow_ms)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f'Stub LLM listening on http://127.0.0.1:{args.port}/api/v1')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Gunicorn settings; `gunicorn wsgi:app` picks this file up automatically."""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+
+def post_fork(server, worker):
+    # With preload_app the master imported the app; drop anything it opened
+    from app import db
+    db.reset()
+
+
+def post_worker_init(worker):
+    # Open this worker's own pool before it accepts requests
+    from app import db
+    db.connect()
+
+
+def worker_exit(server, worker):
+    # Drain the write-behind queue before the pool goes away
+    from app import db, llm_usage, persistence
+    persistence.close()
+    llm_usage.flush()
+    db.close()
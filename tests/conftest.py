@@ -0,0 +1,17 @@
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import standins
+
+# In-memory Mongo and the fake emotion model, before anything imports the app
+standins.install(mongo='mock')
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().get_database('emotio_test')
@@ -0,0 +1,95 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.mood import encode_mood
+from app.services import cohorts
+from app.services.cohorts import CohortAnalytics, CohortTotals
+
+SUMMARY_FIELDS = ('users', 'weekday_mood', 'weekday_entries', 'streaks', 'mood_mix', 'mood_totals')
+MOODS = ['happy', 'sad', 'anxious', 'calm', 'angry']
+
+
+@pytest.fixture
+def users(db):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    ids = []
+    for i in range(11):
+        history = [
+            {'mood': encode_mood(rng.choice(MOODS)), 'timestamp': now - timedelta(days=day, hours=rng.randint(0, 5))}
+            for day in range(rng.randint(0, 12))
+        ]
+        journal = [{'_id': ObjectId(), 'mood': rng.choice(MOODS + ['joy']), 'timestamp': now - timedelta(days=rng.randint(0, 30))}
+                   for _ in range(rng.randint(0, 4))]
+        ids.append(db.users.insert_one({'username': f'u{i}', 'mood_history': history, 'journal_entries': journal}).inserted_id)
+    # Chat from every user, plus messages whose user no longer exists
+    chat_users = ids + [ObjectId(), ObjectId()]
+    db.chat_messages.insert_many([
+        {'user_id': rng.choice(chat_users), 'mood': rng.choice([encode_mood('happy'), encode_mood('sad'), 'joy', None])}
+        for _ in range(200)
+    ])
+    return ids
+
+
+def summary(result):
+    return {key: result[key] for key in SUMMARY_FIELDS}
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(cohorts, 'BATCH_SIZE', 2)
+
+
+def test_sharded_run_matches_a_single_shard(db, users, small_batches):
+    job = CohortAnalytics(db)
+
+    single = job.run('single', shards=1)
+    sharded = job.run('sharded', shards=4)
+
+    assert summary(sharded) == summary(single)
+    assert single['users'] == len(users)
+    assert single['mood_totals']['chat'] == 200
+
+
+def test_interrupted_run_resumes_from_its_checkpoints(db, users, small_batches, monkeypatch):
+    job = CohortAnalytics(db)
+    expected = summary(job.run('reference', shards=1))
+
+    add_user = CohortTotals.add_user
+    seen = []
+
+    def interrupt(self, user):
+        seen.append(user['_id'])
+        if len(seen) == 7:
+            raise RuntimeError('worker killed')
+        return add_user(self, user)
+
+    monkeypatch.setattr(CohortTotals, 'add_user', interrupt)
+    with pytest.raises(RuntimeError):
+        job.run('resumed', shards=3)
+    checkpoints = list(db.cohort_checkpoints.find({'run_id': 'resumed'}))
+    assert checkpoints and not all(checkpoint['done'] for checkpoint in checkpoints)
+    before = len(seen)
+
+    resumed = job.run('resumed', shards=3)
+
+    assert summary(resumed) == expected
+    # Users folded into a checkpoint before the interruption are not read again
+    assert seen[0] not in seen[before:]
+    assert len(seen) - before < len(users)
+
+
+def test_finished_run_is_not_recomputed_unless_restarted(db, users):
+    job = CohortAnalytics(db)
+    first = job.run('daily', shards=2)
+    db.users.insert_one({'username': 'late', 'mood_history': [], 'journal_entries': []})
+
+    again = job.run('daily', shards=2)
+    restarted = job.run('daily', shards=2, restart=True)
+
+    assert summary(again) == summary(first)
+    assert again['users_per_second'] == 0
+    assert restarted['users'] == first['users'] + 1
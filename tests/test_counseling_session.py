@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models.session import RECENT_MESSAGES, CounselingSession
+
+
+def legacy_session(db, turns):
+    session = {
+        '_id': ObjectId(),
+        'user_id': ObjectId(),
+        'messages': [
+            {'user_message': f'question {i}', 'ai_response': f'answer {i}', 'timestamp': datetime(2024, 1, 1)}
+            for i in range(turns)
+        ],
+        'session_type': 'general',
+        'status': 'active'
+    }
+    db.counseling_sessions.insert_one(session)
+    return session
+
+
+def transcript(db, session_id):
+    session = db.counseling_sessions.find_one({'_id': session_id})
+    page = CounselingSession.get_messages_page(db, session, limit=100)
+    return page['total'], [message['user_message'] for message in page['messages']]
+
+
+def test_append_to_legacy_session_keeps_transcript(db):
+    session = legacy_session(db, 75)
+
+    CounselingSession.append_message(db, session['_id'], 'question 75', 'answer 75')
+
+    total, messages = transcript(db, session['_id'])
+    assert total == 76
+    assert messages == [f'question {i}' for i in range(76)]
+    stored = db.counseling_sessions.find_one({'_id': session['_id']})
+    assert stored['message_count'] == 76
+    assert len(stored['messages']) == RECENT_MESSAGES
+    assert stored['messages'][-1]['user_message'] == 'question 75'
+
+
+def test_legacy_session_is_bucketed_once(db):
+    session = legacy_session(db, 3)
+
+    CounselingSession.bucket_legacy_messages(db, session['_id'])
+    CounselingSession.bucket_legacy_messages(db, session['_id'])
+    CounselingSession.append_message(db, session['_id'], 'question 3', 'answer 3')
+
+    assert transcript(db, session['_id']) == (4, ['question 0', 'question 1', 'question 2', 'question 3'])
+
+
+def test_append_to_new_session(db):
+    session = CounselingSession.create(ObjectId())
+    db.counseling_sessions.insert_one(session)
+
+    for i in range(RECENT_MESSAGES + 5):
+        message = CounselingSession.append_message(db, session['_id'], f'question {i}', f'answer {i}')
+        assert message['seq'] == i
+
+    total, messages = transcript(db, session['_id'])
+    assert total == RECENT_MESSAGES + 5
+    assert messages == [f'question {i}' for i in range(RECENT_MESSAGES + 5)]
+
+
+def test_append_to_missing_session(db):
+    assert CounselingSession.append_message(db, ObjectId(), 'hello', 'hi') is None
@@ -0,0 +1,26 @@
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models.mood import encode_mood
+from app.routes.journal import parse_import_entry
+from app.services.export import ExportService
+
+
+def test_journal_export_lines_import_back(db):
+    entries = [
+        {'_id': ObjectId(), 'content': 'first', 'mood': encode_mood('happy'), 'timestamp': datetime(2024, 1, 1, 9)},
+        {'_id': ObjectId(), 'content': 'second', 'mood': encode_mood('sad'), 'timestamp': datetime(2024, 1, 2),
+         'tags': ['work']},
+    ]
+    user_id = db.users.insert_one({'journal_entries': entries}).inserted_id
+
+    lines = [json.loads(line) for line in ExportService(db, batch_size=1).ndjson(user_id, ['journal_entries'])]
+
+    assert [line['_id'] for line in lines] == [str(entry['_id']) for entry in entries]
+    imported = [parse_import_entry(line) for line in lines]
+    assert all(error is None for _, error in imported)
+    assert [(entry['content'], entry['mood'], entry['timestamp'], entry.get('tags')) for entry, _ in imported] == [
+        (entry['content'], entry['mood'], entry['timestamp'], entry.get('tags')) for entry in entries
+    ]
@@ -0,0 +1,14 @@
+from app import indexes
+
+
+def test_retired_mood_series_index_is_dropped_after_its_replacements(db):
+    db.mood_series.create_index([('user_id', 1), ('end', 1)])
+
+    actions = [(action, name) for action, collection, name, _ in indexes.plan(db) if collection == 'mood_series']
+
+    assert actions == [
+        ('create', 'user_id_1_gen_1_sealed_1'),
+        ('create', 'user_id_1_gen_1_end_1'),
+        ('drop', 'user_id_1_end_1'),
+    ]
+
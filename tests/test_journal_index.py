@@ -0,0 +1,154 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.journal_index import INDEX_VERSION, JournalIndex
+
+
+class InterleavedIndex(JournalIndex):
+    """Runs `during` once, after a rebuild has read the journal and before it writes"""
+
+    during = None
+
+    def _term_doc(self, user_id, entry):
+        hook, self.during = self.during, None
+        if hook is not None:
+            hook()
+        return JournalIndex._term_doc(self, user_id, entry)
+
+
+def entry(content):
+    return {'_id': ObjectId(), 'content': content, 'timestamp': datetime(2024, 1, 1)}
+
+
+@pytest.fixture
+def index(db):
+    return InterleavedIndex(db)
+
+
+@pytest.fixture
+def user_id(db):
+    return db.users.insert_one({'username': 'u', 'journal_entries': []}).inserted_id
+
+
+def stats(index, user_id):
+    doc = index.stats.find_one({'_id': user_id}) or {}
+    return doc.get('entries', 0), {term: count for term, count in doc.get('df', {}).items() if count}
+
+
+def rebuilt_stats(db, index, user_id, entries):
+    db.users.update_one({'_id': user_id}, {'$set': {'journal_entries': entries}})
+    index.rebuild(user_id)
+    return stats(index, user_id)
+
+
+def test_create_counts_a_new_entry(index, user_id):
+    index.index_entry(user_id, entry('Walked the dog, dog was happy'))
+
+    assert stats(index, user_id) == (1, {'walked': 1, 'dog': 1, 'happy': 1})
+
+
+def test_edit_moves_document_frequencies(index, user_id):
+    first = entry('work deadline stress')
+    index.index_entry(user_id, first)
+    index.index_entry(user_id, dict(first, content='work went fine'))
+
+    assert stats(index, user_id) == (1, {'work': 1, 'went': 1, 'fine': 1})
+
+
+def test_delete_uncounts_the_entry(index, user_id):
+    kept, removed = entry('sleep better tonight'), entry('sleep badly stress')
+    index.index_entry(user_id, kept)
+    index.index_entry(user_id, removed)
+
+    index.remove_entries(user_id, [removed['_id']])
+
+    assert stats(index, user_id) == (1, {'sleep': 1, 'better': 1, 'tonight': 1})
+    assert index.terms.count_documents({'user_id': user_id}) == 1
+
+
+def test_incremental_stats_match_a_rebuild(db, index, user_id):
+    entries = [entry('exam stress again'), entry('stress at work'), entry('calm evening walk')]
+    index.index_new_entries(user_id, entries[:2])
+    index.index_entry(user_id, entries[2])
+    entries[0] = dict(entries[0], content='exam went well')
+    index.index_entry(user_id, entries[0])
+    index.remove_entries(user_id, [entries[1]['_id']])
+    incremental = stats(index, user_id)
+
+    assert incremental == rebuilt_stats(db, index, user_id, [entries[0], entries[2]])
+
+
+def test_deleting_an_unindexed_entry_changes_nothing(index, user_id):
+    index.index_entry(user_id, entry('quiet day'))
+
+    index.remove_entries(user_id, [ObjectId()])
+
+    assert stats(index, user_id) == (1, {'quiet': 1, 'day': 1})
+
+
+def test_bulk_delete_drops_terms_no_entry_uses(index, user_id):
+    entries = [entry('rain again'), entry('rain and wind'), entry('sunny walk')]
+    index.index_new_entries(user_id, entries)
+
+    index.remove_entries(user_id, [entries[0]['_id'], entries[1]['_id']])
+
+    assert index.stats.find_one({'_id': user_id})['df'] == {'sunny': 1, 'walk': 1}
+    assert stats(index, user_id) == (1, {'sunny': 1, 'walk': 1})
+
+
+@pytest.fixture
+def journaled(db, user_id):
+    """A user whose entries predate the index"""
+    db.users.update_one({'_id': user_id}, {'$set': {'journal_entries': [entry('long run'), entry('short run')]}})
+    return user_id
+
+
+def test_overlapping_backfills_both_succeed(db, index, journaled):
+    index.during = lambda: JournalIndex(db).ensure_built(journaled)
+
+    index.ensure_built(journaled)
+
+    assert stats(index, journaled) == (2, {'long': 1, 'short': 1, 'run': 2})
+    assert index.terms.count_documents({'user_id': journaled}) == 2
+
+
+def test_entry_written_during_a_backfill_is_kept(db, index, journaled):
+    new = entry('run with friends')
+
+    def create():
+        db.users.update_one({'_id': journaled}, {'$push': {'journal_entries': new}})
+        index.index_entry(journaled, new)
+
+    index.during = create
+    index.ensure_built(journaled)
+
+    assert index.search(journaled, 'friends') == [new['_id']]
+    assert stats(index, journaled) == (3, {'long': 1, 'short': 1, 'run': 3, 'friends': 1})
+    assert db.users.find_one({'_id': journaled})['journal_index_version'] == INDEX_VERSION
+
+
+def test_import_during_a_backfill_counts_each_entry_once(db, index, journaled):
+    imported = [entry('yoga class'), entry('yoga again')]
+
+    def bulk_import():
+        db.users.update_one({'_id': journaled}, {'$push': {'journal_entries': {'$each': imported}}})
+        JournalIndex(db).rebuild(journaled)
+        index.index_new_entries(journaled, imported)
+
+    index.during = bulk_import
+    index.ensure_built(journaled)
+
+    assert stats(index, journaled) == (4, {'long': 1, 'short': 1, 'run': 2, 'yoga': 2, 'class': 1})
+
+
+def test_rebuild_drops_entries_no_longer_in_the_journal(db, index, journaled):
+    index.ensure_built(journaled)
+    removed = db.users.find_one({'_id': journaled})['journal_entries'][0]
+    db.users.update_one({'_id': journaled}, {'$pull': {'journal_entries': {'_id': removed['_id']}}})
+
+    index.rebuild(journaled)
+
+    assert stats(index, journaled) == (1, {'short': 1, 'run': 1})
+    assert index.terms.find_one({'_id': removed['_id']}) is None
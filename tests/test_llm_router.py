@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from app.services.llm_router import Backend, LLMOverloaded, LLMRouter, LLMTimeout
+
+
+class StubBackend(Backend):
+    """Answers with its name after `delay` seconds, or once `release` is set"""
+
+    def __init__(self, name, release=None, delay=0):
+        super().__init__(name, 'http://stub', None)
+        self.release = release
+        self.delay = delay
+        self.started = threading.Event()
+        self.answered = []
+
+    def complete(self, kwargs):
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        self.answered.append(kwargs)
+        return self.name
+
+
+def drain(router):
+    """Wait until every attempt already on the router's single thread has run"""
+    router.executor.submit(lambda: None).result(5)
+
+
+@pytest.fixture
+def release():
+    release = threading.Event()
+    yield release
+    release.set()
+
+
+def test_full_router_fails_fast_instead_of_queueing(release):
+    slow = StubBackend('slow', release)
+    router = LLMRouter([slow], max_inflight=1)
+    busy = threading.Thread(target=router.complete, args=({},), kwargs={'budget': 5})
+    busy.start()
+    slow.started.wait(5)
+
+    started = time.monotonic()
+    with pytest.raises(LLMOverloaded):
+        router.complete({}, budget=5)
+
+    assert time.monotonic() - started < 1
+    release.set()
+    busy.join(5)
+    assert len(slow.answered) == 1
+
+
+def test_slots_come_back_after_a_timeout(release):
+    slow = StubBackend('slow', release)
+    router = LLMRouter([slow], max_inflight=1)
+
+    with pytest.raises(LLMTimeout):
+        router.complete({}, budget=0.05)
+    release.set()
+    drain(router)
+
+    assert router.complete({}, budget=5) == 'slow'
+
+
+def test_attempt_started_after_the_budget_skips_the_backend():
+    backend = StubBackend('late')
+    router = LLMRouter([backend])
+
+    with pytest.raises(LLMTimeout):
+        router._run(backend, {}, None, time.monotonic() - 1)
+
+    assert backend.answered == []
+
+
+def test_queued_hedge_never_runs_once_the_caller_gave_up(release):
+    primary, hedge = StubBackend('primary', release), StubBackend('hedge')
+    router = LLMRouter([primary, hedge], hedge_delay=0.05, max_inflight=2)
+    # Hold one of the two threads so the hedge is queued rather than started
+    router.executor.submit(release.wait, 5)
+
+    with pytest.raises(LLMTimeout):
+        router.complete({}, hedge=True, budget=0.2)
+    release.set()
+    router.executor.shutdown(wait=True)
+
+    assert primary.answered and not hedge.started.is_set()
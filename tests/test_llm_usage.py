@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm
+from app.services.llm_usage import LLMUsage
+
+
+class StubRouter:
+    """Answers every call from one backend, reporting fixed token usage"""
+
+    def __init__(self, backend_name, prompt_tokens, completion_tokens):
+        self.backend = SimpleNamespace(name=backend_name)
+        self.usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=None
+        )
+
+    def complete(self, kwargs, hedge=False, on_attempt=None, budget=None):
+        response = SimpleNamespace(usage=self.usage, choices=[])
+        on_attempt(self.backend, response, 12.5)
+        return response
+
+
+@pytest.fixture
+def usage(db, monkeypatch):
+    tracker = LLMUsage(db)
+    tracker.prices = {'gpt-3.5-turbo': (0.0005, 0.0015)}
+    monkeypatch.setattr(tracker, '_ensure_flusher', lambda: None)
+    monkeypatch.setattr(llm, 'usage', tracker)
+    return tracker
+
+
+def test_cost_is_priced_by_model_and_recorded_per_backend(db, usage, monkeypatch):
+    monkeypatch.setattr(llm, 'router', StubRouter('openrouter', 1000, 2000))
+
+    llm.chat_completion(route='/chat', model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'hi'}])
+    usage.flush()
+
+    row = db.llm_usage.find_one()
+    assert row['backend'] == 'openrouter'
+    assert row['model'] == 'gpt-3.5-turbo'
+    assert row['cost_usd'] == pytest.approx(0.0005 + 0.003)
+    assert row['prompt_tokens'] == 1000 and row['completion_tokens'] == 2000
+
+
+def test_backends_serving_one_model_are_kept_apart(db, usage, monkeypatch):
+    for name in ('openrouter', 'stub'):
+        monkeypatch.setattr(llm, 'router', StubRouter(name, 1000, 0))
+        llm.chat_completion(route='/chat', model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'hi'}])
+    usage.flush()
+
+    by_backend = {row['backend']: row for row in usage.summary(group='backend')}
+    assert set(by_backend) == {'openrouter', 'stub'}
+    assert all(row['cost_usd'] == pytest.approx(0.0005) for row in by_backend.values())
+    by_model = usage.summary(group='model')
+    assert [(row['model'], row['calls']) for row in by_model] == [('gpt-3.5-turbo', 2)]
+
+
+def test_unpriced_model_costs_nothing(usage):
+    assert usage.cost('unknown-model', 1000, 1000) == 0
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks import standins
+
+OPERATOR_ENDPOINTS = ['/metrics', '/llm/usage', '/llm/backends']
+
+
+@pytest.fixture(scope='module')
+def client():
+    app, _ = standins.load_app()
+    return app.test_client()
+
+
+@pytest.mark.parametrize('path', OPERATOR_ENDPOINTS)
+def test_token_is_required_when_set(client, path, monkeypatch):
+    monkeypatch.setenv('METRICS_TOKEN', 's3cret')
+
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.get(f'{path}?token=s3cret').status_code == 200
+    assert client.get(path, headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+
+@pytest.mark.parametrize('path', OPERATOR_ENDPOINTS)
+def test_hidden_without_token(client, path, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize('path', OPERATOR_ENDPOINTS)
+def test_open_without_token_in_testing_mode(client, path, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    monkeypatch.setattr(client.application, 'testing', True)
+
+    assert client.get(path).status_code == 200
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from app.models import mood
+from app.models.mood import encode_mood
+
+
+@pytest.fixture(autouse=True)
+def array_filters(monkeypatch):
+    """mongomock has no arrayFilters; apply the one-condition form mood.apply issues in Python"""
+    update_many = mongomock.collection.Collection.update_many
+
+    def emulated(self, query, update, *args, array_filters=None, **kwargs):
+        if not array_filters:
+            return update_many(self, query, update, *args, **kwargs)
+        (target, code), = update['$set'].items()
+        array, _, field = target.split('.')
+        (_, value), = array_filters[0].items()
+        for doc in self.find(query, {array: 1}):
+            items = [dict(item, **{field: code}) if item.get(field) == value else item for item in doc[array]]
+            self.update_one({'_id': doc['_id']}, {'$set': {array: items}})
+
+    monkeypatch.setattr(mongomock.collection.Collection, 'update_many', emulated)
+
+
+@pytest.fixture
+def legacy(db):
+    """Moods stored as labels by older versions, next to ones already stored as codes"""
+    user_id = db.users.insert_one({
+        'username': 'u',
+        'mood_history': [
+            {'mood': 'happy', 'timestamp': datetime(2024, 1, 1)},
+            {'mood': encode_mood('sad'), 'timestamp': datetime(2024, 1, 2)},
+            {'mood': 'happy', 'timestamp': datetime(2024, 1, 3)},
+            {'mood': 'sleepy', 'timestamp': datetime(2024, 1, 4)},
+        ],
+        'journal_entries': [{'_id': ObjectId(), 'content': 'x', 'mood': 'anxious'}]
+    }).inserted_id
+    db.chat_messages.insert_many([{'user_id': user_id, 'mood': 'joy'}, {'user_id': user_id, 'mood': encode_mood('calm')}])
+    db.journal_entries.insert_one({'user_id': user_id, 'emotion': 'sadness'})
+    return user_id
+
+
+def test_plan_lists_labels_with_their_codes(db, legacy):
+    actions = {(collection, path, value): (code, count) for collection, path, value, code, count in mood.plan(db)}
+
+    assert actions == {
+        ('users', 'mood_history.mood', 'happy'): (encode_mood('happy'), 1),
+        ('users', 'mood_history.mood', 'sleepy'): (None, 1),
+        ('users', 'journal_entries.mood', 'anxious'): (encode_mood('anxious'), 1),
+        ('chat_messages', 'mood', 'joy'): (encode_mood('joy'), 1),
+        ('journal_entries', 'emotion', 'sadness'): (encode_mood('sadness'), 1),
+    }
+
+
+def test_apply_converts_every_known_label(db, legacy):
+    mood.apply(db, mood.plan(db))
+
+    user = db.users.find_one({'_id': legacy})
+    assert [m['mood'] for m in user['mood_history']] == [
+        encode_mood('happy'), encode_mood('sad'), encode_mood('happy'), 'sleepy'
+    ]
+    assert user['journal_entries'][0]['mood'] == encode_mood('anxious')
+    assert sorted(m['mood'] for m in db.chat_messages.find()) == sorted([encode_mood('joy'), encode_mood('calm')])
+    assert db.journal_entries.find_one()['emotion'] == encode_mood('sadness')
+
+
+def test_rerunning_is_a_no_op(db, legacy):
+    mood.apply(db, mood.plan(db))
+
+    assert [(value, code) for _, _, value, code, _ in mood.plan(db)] == [('sleepy', None)]
+
+
+def test_dry_run_changes_nothing(db, legacy, monkeypatch, capsys):
+    monkeypatch.setattr(db, 'close', lambda: None, raising=False)
+    monkeypatch.setattr('app.database.connect_from_config', lambda config=None: db)
+    before = db.users.find_one({'_id': legacy})
+
+    assert mood.migrate(dry_run=True) == 0
+
+    assert db.users.find_one({'_id': legacy}) == before
+    assert "would convert users.mood_history.mood 'happy'" in capsys.readouterr().out
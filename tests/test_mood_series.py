@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.mood import encode_mood
+from app.services.mood_series import MoodSeries, SERIES_VERSION, to_ms
+
+START = datetime(2024, 3, 1)
+
+
+class InterleavedSeries(MoodSeries):
+    """Runs `during` once, after a rebuild has snapshotted mood_history and before it writes"""
+
+    during = None
+
+    def _combine(self, columns):
+        hook, self.during = self.during, None
+        if hook is not None:
+            hook()
+        return MoodSeries._combine(columns)
+
+
+def checkin(i, mood='happy'):
+    return {'mood': encode_mood(mood), 'context': '', 'timestamp': START + timedelta(hours=i)}
+
+
+@pytest.fixture
+def user_id(db):
+    return db.users.insert_one({'username': 'u', 'mood_history': [checkin(i) for i in range(5)]}).inserted_id
+
+
+@pytest.fixture
+def series(db):
+    return InterleavedSeries(db, bucket_size=4)
+
+
+def hours(series, user_id):
+    return [(ms - to_ms(START)) // 3600000 for ms in series.read(user_id).timestamps.tolist()]
+
+
+def test_backfills_on_first_read_and_records_into_the_live_series(db, series, user_id):
+    assert hours(series, user_id) == [0, 1, 2, 3, 4]
+
+    series.record(user_id, checkin(5, 'sad'))
+
+    read = series.read(user_id)
+    assert hours(series, user_id) == [0, 1, 2, 3, 4, 5]
+    assert read.moods[-1] == encode_mood('sad')
+    assert db.users.find_one({'_id': user_id})['mood_series_version'] == SERIES_VERSION
+
+
+def test_checkin_tracked_during_a_rebuild_is_caught_up_once(db, series, user_id):
+    series.ensure_built(user_id)
+    series.during = lambda: series.record(user_id, checkin(5))
+
+    series.rebuild(user_id)
+
+    assert hours(series, user_id) == [0, 1, 2, 3, 4, 5]
+    assert len(db.users.find_one({'_id': user_id})['mood_history']) == 6
+
+
+def test_append_in_flight_when_a_rebuild_starts_is_not_duplicated(db, series, user_id):
+    live = series.ensure_built(user_id)
+    # The check-in reached mood_history before the rebuild, but its series append lands during it
+    entry = checkin(5)
+    db.users.update_one({'_id': user_id}, {'$push': {'mood_history': entry}})
+    series.during = lambda: series.append(user_id, entry['mood'], entry['timestamp'], live)
+
+    series.rebuild(user_id)
+
+    assert hours(series, user_id) == [0, 1, 2, 3, 4, 5]
+    assert db.mood_series.count_documents({'user_id': user_id, 'gen': {'$ne': series.ensure_built(user_id)}}) == 0
+
+
+def test_late_append_to_a_replaced_generation_is_not_read(db, series, user_id):
+    old = series.ensure_built(user_id)
+    series.rebuild(user_id)
+
+    series.append(user_id, encode_mood('happy'), START + timedelta(hours=9), old)
+
+    assert hours(series, user_id) == [0, 1, 2, 3, 4]
+
+
+def test_overlapping_rebuilds_leave_one_generation(db, series, user_id):
+    series.ensure_built(user_id)
+
+    def second_rebuild():
+        series.record(user_id, checkin(5))
+        MoodSeries(db, bucket_size=4).rebuild(user_id)
+
+    series.during = second_rebuild
+    series.rebuild(user_id)
+    series.record(user_id, checkin(6))
+
+    assert hours(series, user_id) == [0, 1, 2, 3, 4, 5, 6]
+    gens = db.mood_series.distinct('gen', {'user_id': user_id})
+    assert gens == [db.users.find_one({'_id': user_id})['mood_series_gen']]
+
+
+def test_rebuild_replaces_buckets_from_before_generations(db, series, user_id):
+    db.mood_series.insert_one({'user_id': user_id, 'sealed': False, 'count': 1, 'ts': [0], 'moods': [1],
+                               'start': START, 'end': START})
+    db.users.update_one({'_id': user_id}, {'$set': {'mood_series_version': 1}})
+
+    assert hours(series, user_id) == [0, 1, 2, 3, 4]
+    assert db.mood_series.count_documents({'user_id': user_id, 'gen': None}) == 0
+
+
+def test_checkins_are_not_appended_before_the_series_is_built(db, series, user_id):
+    series.record(user_id, checkin(5))
+
+    assert db.mood_series.count_documents({}) == 0
+    assert hours(series, user_id) == [0, 1, 2, 3, 4, 5]
@@ -0,0 +1,72 @@
+import sys
+
+import pytest
+from bson import ObjectId
+
+from app.models.mood import encode_mood
+from app.services import emotion
+from app.services.emotion import EMOTION_MODEL
+from app.services.relabel import Relabeler, main
+
+
+class ModelClassifier:
+    """Labels every text with the label configured for its model"""
+
+    def __init__(self, label):
+        self.label = label
+
+    def __call__(self, texts, **kwargs):
+        return [{'label': self.label, 'score': 0.9} for _ in texts]
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Models loaded through transformers.pipeline, in order"""
+    loaded = []
+    labels = {EMOTION_MODEL: 'joy', 'acme/emotion-v2': 'sadness'}
+
+    def pipeline(task, model=None, **kwargs):
+        loaded.append(model)
+        return ModelClassifier(labels[model])
+
+    monkeypatch.setattr(sys.modules['transformers'], 'pipeline', pipeline)
+    monkeypatch.setattr(emotion, '_classifiers', {})
+    return loaded
+
+
+def add_messages(db, count):
+    user_id = ObjectId()
+    db.chat_messages.insert_many([{'user_id': user_id, 'message': f'message {i}'} for i in range(count)])
+
+
+def test_labels_with_the_requested_model(db, loaded):
+    add_messages(db, 5)
+
+    report = Relabeler(db, model='acme/emotion-v2', chunk_size=2).run(['chat'])
+
+    assert loaded == ['acme/emotion-v2']
+    assert report['chat']['records'] == 5
+    labels = {(doc['classifier']['model'], doc['classifier']['emotion']) for doc in db.chat_messages.find()}
+    assert labels == {('acme/emotion-v2', encode_mood('sadness'))}
+
+
+def test_switching_models_relabels_everything(db, loaded):
+    add_messages(db, 3)
+
+    Relabeler(db).run(['chat'])
+    assert Relabeler(db).run(['chat'])['chat']['records'] == 0
+    Relabeler(db, model='acme/emotion-v2').run(['chat'])
+
+    assert loaded == [EMOTION_MODEL, 'acme/emotion-v2']
+    assert {doc['classifier']['emotion'] for doc in db.chat_messages.find()} == {encode_mood('sadness')}
+
+
+def test_cli_passes_the_model_through(db, loaded, monkeypatch):
+    add_messages(db, 2)
+    monkeypatch.setattr(db, 'close', lambda: None, raising=False)
+    monkeypatch.setattr('app.database.connect_from_config', lambda config=None: db)
+
+    assert main(['--sources', 'chat', '--workers', '1', '--model', 'acme/emotion-v2']) == 0
+
+    assert loaded == ['acme/emotion-v2']
+    assert db.chat_messages.count_documents({'classifier.model': 'acme/emotion-v2'}) == 2
@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.sentiment import lexicon_sentiment
+
+# (polarity, subjectivity) as TextBlob 0.17.1 scores them
+GOLDEN = [
+    ('', (0.0, 0.0)),
+    ('   ', (0.0, 0.0)),
+    ('Meh.', (0.0, 0.0)),
+    ('GOOD', (0.7, 0.6)),
+    ('The day was good.', (0.7, 0.6)),
+    # Negation
+    ('The day was not good.', (-0.35, 0.6)),
+    ('Not bad at all', (0.35, 0.666667)),
+    ('I never feel calm', (0.3, 0.75)),
+    # Intensifiers
+    ('I am very happy', (1.0, 1.0)),
+    ('pretty good', (0.475, 0.8)),
+    ('not very good', (-0.269231, 0.461538)),
+    ('I am really not happy', (-0.4, 1.0)),
+    ("I'm extremely angry and very sad", (-0.575, 1.0)),
+    # Punctuation and emoticons
+    ('It was okay', (0.5, 0.5)),
+    ('It was okay!', (0.625, 0.5)),
+    ('This is great!!!', (1.0, 0.75)),
+    ('It was okay (!)', (0.25, 0.75)),
+    ('I feel sad :(', (-0.625, 1.0)),
+    ('Best day ever :)', (0.75, 0.65)),
+    ('good, good, bad', (0.233333, 0.622222)),
+    ('Good... but tiring, really tiring', (0.45, 0.4)),
+]
+
+
+@pytest.mark.parametrize('text, expected', GOLDEN)
+def test_matches_textblob_golden_values(text, expected):
+    assert lexicon_sentiment(text) == pytest.approx(expected, abs=1e-6)
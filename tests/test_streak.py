@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.mood import encode_mood
+from app.routes import profile
+from app.services.mood_series import MoodSeries
+from app.services.wellness import calculate_streak
+
+
+def history(*days_ago):
+    now = datetime.utcnow()
+    return [{'mood': encode_mood('happy'), 'timestamp': now - timedelta(days=days)} for days in days_ago]
+
+
+@pytest.fixture
+def streak(db, monkeypatch):
+    monkeypatch.setattr(profile, 'mood_series', MoodSeries(db, bucket_size=4))
+    monkeypatch.setattr(profile, 'STREAK_WINDOW', 2)
+
+    def streak(mood_history):
+        user_id = db.users.insert_one({'mood_history': mood_history}).inserted_id
+        return profile.current_streak(user_id)
+    return streak
+
+
+@pytest.mark.parametrize('days_ago', [
+    (),
+    (0,),
+    (3, 2),
+    (30, 9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1),
+    (5, 4, 2, 1, 0, 0),
+    (9, 8, 7, 6),
+])
+def test_series_streak_matches_calculate_streak(streak, days_ago):
+    assert streak(history(*days_ago)) == calculate_streak({'mood_history': history(*days_ago)})
+
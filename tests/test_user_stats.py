@@ -0,0 +1,47 @@
+import pytest
+from bson import ObjectId
+
+from app.services.stats import UserStats
+
+
+@pytest.fixture
+def stats(db):
+    return UserStats(db)
+
+
+@pytest.fixture
+def user_id(db):
+    """A user with history from before counters existed, and no stats document"""
+    user_id = db.users.insert_one({'username': 'u'}).inserted_id
+    db.conversations.insert_many([{'user_id': user_id} for _ in range(500)])
+    db.chat_messages.insert_many([{'user_id': user_id} for _ in range(3)])
+    db.counseling_sessions.insert_one({'user_id': user_id, 'message_count': 4})
+    return user_id
+
+
+def test_first_write_for_an_existing_user_counts_their_history(db, stats, user_id):
+    db.conversations.insert_one({'user_id': user_id})
+    stats.increment(user_id, conversations=1)
+
+    assert stats.get(user_id) == {'conversations': 501, 'chat_messages': 3, 'counseling_turns': 4}
+
+
+def test_batched_increments_do_not_create_stats(db, stats, user_id):
+    db.chat_messages.insert_one({'user_id': user_id})
+    stats.increment_many({(str(user_id), 'chat_messages'): 1})
+
+    assert db.user_stats.count_documents({}) == 0
+    assert stats.get(user_id)['chat_messages'] == 4
+
+
+def test_increments_apply_once_reconciled(stats, user_id):
+    stats.get(user_id)
+
+    stats.increment(user_id, conversations=1, counseling_turns=2)
+    stats.increment_many({(str(user_id), 'chat_messages'): 2})
+
+    assert stats.get(user_id) == {'conversations': 501, 'chat_messages': 5, 'counseling_turns': 6}
+
+
+def test_unknown_user_starts_at_zero(stats):
+    assert stats.get(ObjectId()) == {'conversations': 0, 'chat_messages': 0, 'counseling_turns': 0}
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import pytest
+from bson import ObjectId
+
+from app.services.writebehind import CLAIMED_SUFFIX, WriteBehindQueue
+
+
+class StubStats:
+    def __init__(self):
+        self.counts = Counter()
+
+    def increment_many(self, counts):
+        self.counts.update(counts)
+
+
+@pytest.fixture
+def queue(db, tmp_path):
+    queue = WriteBehindQueue(db, StubStats())
+    queue.enabled = False
+    queue.spill_dir = str(tmp_path)
+    return queue
+
+
+def spill(queue, user_id, count):
+    """Spill `count` chat messages and age the file past the quiet period"""
+    items = [('chat_messages', {'_id': ObjectId(), 'user_id': user_id, 'message': f'm{i}'}, 'chat_messages')
+             for i in range(count)]
+    queue._spill(items)
+    stale = time.time() - 60
+    os.utime(queue._spill_path(), (stale, stale))
+    return [document['_id'] for _, document, _ in items]
+
+
+def test_replay_writes_spilled_documents_and_counts_them_once(db, queue):
+    user_id = ObjectId()
+    ids = spill(queue, user_id, 3)
+
+    queue.replay()
+
+    assert sorted(doc['_id'] for doc in db.chat_messages.find()) == sorted(ids)
+    assert queue.stats.counts == Counter({(user_id, 'chat_messages'): 3})
+    assert os.listdir(queue.spill_dir) == []
+
+
+def test_replay_skips_documents_already_stored(db, queue):
+    user_id = ObjectId()
+    ids = spill(queue, user_id, 3)
+    db.chat_messages.insert_one({'_id': ids[0], 'user_id': user_id, 'message': 'm0'})
+
+    queue.replay()
+
+    assert db.chat_messages.count_documents({}) == 3
+    assert queue.stats.counts == Counter({(user_id, 'chat_messages'): 2})
+
+
+def test_recent_spill_is_left_for_its_worker(db, queue):
+    queue._spill([('chat_messages', {'_id': ObjectId(), 'user_id': ObjectId()}, None)])
+
+    queue.replay()
+
+    assert db.chat_messages.count_documents({}) == 0
+    assert os.path.exists(queue._spill_path())
+
+
+def claim_as(queue, pid):
+    claimed = os.path.join(queue.spill_dir, f'replaying-{pid}-{ObjectId()}{CLAIMED_SUFFIX}')
+    os.rename(queue._spill_path(), claimed)
+    return claimed
+
+
+def test_file_claimed_by_a_live_worker_is_not_replayed_again(db, queue):
+    spill(queue, ObjectId(), 2)
+    claimed = claim_as(queue, os.getppid())
+
+    queue.replay()
+
+    assert db.chat_messages.count_documents({}) == 0
+    assert os.listdir(queue.spill_dir) == [os.path.basename(claimed)]
+
+
+def test_claim_left_by_a_dead_worker_is_replayed(db, queue):
+    spill(queue, ObjectId(), 2)
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                              capture_output=True, text=True, check=True)
+    claim_as(queue, int(finished.stdout))
+
+    queue.replay()
+
+    assert db.chat_messages.count_documents({}) == 2
+    assert os.listdir(queue.spill_dir) == []
+
+
+def test_file_taken_by_another_worker_mid_scan_is_skipped(db, queue, monkeypatch):
+    spill(queue, ObjectId(), 2)
+    rename = os.rename
+
+    def lose_race(src, dst):
+        rename(src, os.path.join(queue.spill_dir, f'replaying-{os.getppid()}-{ObjectId()}{CLAIMED_SUFFIX}'))
+        raise FileNotFoundError(src)
+
+    monkeypatch.setattr(os, 'rename', lose_race)
+    queue.replay()
+
+    assert db.chat_messages.count_documents({}) == 0